@@ -0,0 +1,76 @@
+"""Benchmark the hardcoded diff averaging on models made of many small
+tensors.
+
+Compares the per-param reduce (one th.add per param and worker, then one
+subtraction per param) against the running sum kept in a flat buffer.
+
+Usage:
+    poetry run python benchmarks/bench_flat_params.py --params 10 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+from functools import reduce
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import torch as th
+
+from main.core.model_centric.cycles.aggregator import DiffAccumulator
+from main.core.model_centric.models.flat_params import FlatParams
+
+
+def timeit(func, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return sorted(elapsed)[len(elapsed) // 2] * 1000
+
+
+def per_param(model_params, diffs):
+    raw_diffs = [
+        [diffs[worker][param] for worker in range(len(diffs))]
+        for param in range(len(model_params))
+    ]
+    sums = [reduce(th.add, param_diffs) for param_diffs in raw_diffs]
+    diff_avg = [diff_sum / len(diffs) for diff_sum in sums]
+    return [
+        model_param - diff_param
+        for model_param, diff_param in zip(model_params, diff_avg)
+    ]
+
+
+def flat(model_params, diffs):
+    accumulator = DiffAccumulator()
+    for worker_cycle_id, diff in enumerate(diffs):
+        accumulator.add(worker_cycle_id, diff)
+    return FlatParams.from_tensors(model_params).sub_(accumulator.average())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--params", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--param-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'params':>8} {'per param (ms)':>15} {'flat (ms)':>10}")
+
+    for num_params in args.params:
+        model_params = [th.randn(args.param_size) for _ in range(num_params)]
+        diffs = [
+            [th.randn(args.param_size) for _ in range(num_params)]
+            for _ in range(args.workers)
+        ]
+
+        per_param_ms = timeit(lambda: per_param(model_params, diffs), args.repeat)
+        flat_ms = timeit(lambda: flat(model_params, diffs), args.repeat)
+        print(f"{num_params:>8} {per_param_ms:>15.3f} {flat_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark the "latest row" lookups used by /get-model, /get-plan and cycle
+requests as the checkpoint and cycle history grows.
+
+Compares DatabaseManager.latest (ordered LIMIT 1 with deferred binary
+columns) against materializing every matching row and picking the last one.
+
+Usage:
+    poetry run python benchmarks/bench_latest_query.py --sizes 10 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+from flask import Flask
+
+from main.core.database import db
+from main.core.model_centric.cycles import cycle_manager
+from main.core.model_centric.cycles.cycle import Cycle
+from main.core.model_centric.models import model_manager
+from main.core.model_centric.models.ai_model import Model, ModelCheckPoint
+from main.core.model_centric.processes.fl_process import FLProcess
+
+
+def timeit(func, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return sorted(elapsed)[len(elapsed) // 2] * 1000
+
+
+def populate(fl_process_id, version, model_id, start, stop, blob_size):
+    db.session.query(Cycle).update({"is_completed": True})
+
+    # Rows are stored inline, as checkpoints saved before blob storage
+    payload = os.urandom(blob_size)
+    for number in range(start, stop):
+        db.session.add(
+            ModelCheckPoint(_value=payload, number=number + 1, model_id=model_id)
+        )
+        db.session.add(
+            Cycle(
+                start=datetime.now(),
+                sequence=number + 1,
+                version=version,
+                fl_process_id=fl_process_id,
+                is_completed=True,
+            )
+        )
+
+    # The current cycle is always the newest one
+    db.session.add(
+        Cycle(
+            start=datetime.now(),
+            sequence=stop + 1,
+            version=version,
+            fl_process_id=fl_process_id,
+        )
+    )
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--blob-size", type=int, default=64 * 1024)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database", default="sqlite://")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.database
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    app.app_context().push()
+    db.create_all()
+
+    fl_process = FLProcess(name="bench", version="1.0")
+    db.session.add(fl_process)
+    db.session.commit()
+    model = Model(fl_process_id=fl_process.id)
+    db.session.add(model)
+    db.session.commit()
+    model_id, fl_process_id = model.id, fl_process.id
+
+    print(
+        f"{'history':>10} {'load (ms)':>12} {'load all() (ms)':>16} "
+        f"{'cycle (ms)':>12} {'cycle all() (ms)':>17}"
+    )
+
+    populated = 0
+    for size in sorted(args.sizes):
+        populate(fl_process_id, "1.0", model_id, populated, size, args.blob_size)
+        populated = size
+
+        load = timeit(lambda: model_manager.load(model_id=model_id), args.repeat)
+        load_all = timeit(
+            lambda: db.session.query(ModelCheckPoint)
+            .filter_by(model_id=model_id)
+            .all()[-1],
+            args.repeat,
+        )
+        cycle = timeit(lambda: cycle_manager.last(fl_process_id), args.repeat)
+        cycle_all = timeit(
+            lambda: db.session.query(Cycle)
+            .filter_by(fl_process_id=fl_process_id, is_completed=False)
+            .all()[-1],
+            args.repeat,
+        )
+        print(
+            f"{size:>10} {load:>12.3f} {load_all:>16.3f} {cycle:>12.3f} {cycle_all:>17.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark the worker cycle lookups used by the assignment and report paths
+on a large worker cycle table.
+
+Populates the database with `--rows` worker cycles (one million by default)
+and measures the median time of:
+    - assignment: last open cycle + "is this worker already assigned" check.
+    - report: worker cycle lookup by (worker_id, request_key) + count of the
+      cycle's completed reports.
+    - participation: last cycle sequence joined by a worker.
+
+Run with --without-indexes to compare against the tables without the
+composite indexes.
+
+Usage:
+    poetry run python benchmarks/bench_worker_cycle_indexes.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+from flask import Flask
+
+from main.core.database import db
+from main.core.model_centric.cycles import cycle_manager
+from main.core.model_centric.cycles.cycle import Cycle
+from main.core.model_centric.cycles.worker_cycle import WorkerCycle
+from main.core.model_centric.processes.fl_process import FLProcess
+
+BATCH_SIZE = 50000
+
+
+def timeit(func, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return sorted(elapsed)[len(elapsed) // 2] * 1000
+
+
+def populate(fl_process_id, rows, workers_per_cycle):
+    num_cycles = max(rows // workers_per_cycle, 1)
+    db.session.execute(
+        Cycle.__table__.insert(),
+        [
+            {
+                "start": datetime.now(),
+                "sequence": sequence + 1,
+                "version": "1.0",
+                "fl_process_id": fl_process_id,
+                "is_completed": sequence + 1 < num_cycles,
+            }
+            for sequence in range(num_cycles)
+        ],
+    )
+    cycle_ids = [_id for (_id,) in db.session.query(Cycle.id).order_by(Cycle.id)]
+
+    now = datetime.now()
+    for start in range(0, rows, BATCH_SIZE):
+        db.session.execute(
+            WorkerCycle.__table__.insert(),
+            [
+                {
+                    "cycle_id": cycle_ids[i // workers_per_cycle % num_cycles],
+                    "worker_id": f"worker-{i % workers_per_cycle}",
+                    "request_key": f"key-{i}",
+                    "started_at": now,
+                    "is_completed": i % 3 != 0,
+                }
+                for i in range(start, min(start + BATCH_SIZE, rows))
+            ],
+        )
+    db.session.commit()
+    return cycle_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers-per-cycle", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--database", default="sqlite://")
+    parser.add_argument("--without-indexes", action="store_true")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.database
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    app.app_context().push()
+    db.create_all()
+
+    if args.without_indexes:
+        for table in (WorkerCycle.__table__, Cycle.__table__):
+            for index in table.indexes:
+                index.drop(bind=db.engine)
+
+    fl_process = FLProcess(name="bench", version="1.0")
+    db.session.add(fl_process)
+    db.session.commit()
+    fl_process_id = fl_process.id
+    fl_process = FLProcess(id=fl_process_id)
+
+    start = time.perf_counter()
+    cycle_ids = populate(fl_process_id, args.rows, args.workers_per_cycle)
+    print(f"Populated {args.rows} worker cycles in {time.perf_counter() - start:.1f}s")
+
+    def assignment():
+        cycle = cycle_manager.last(fl_process_id)
+        worker_id = f"worker-{random.randrange(args.workers_per_cycle)}"
+        cycle_manager.is_assigned(worker_id, cycle.id)
+
+    def report():
+        i = random.randrange(args.rows)
+        worker_cycle = cycle_manager._worker_cycles.first(
+            worker_id=f"worker-{i % args.workers_per_cycle}", request_key=f"key-{i}"
+        )
+        db.session.query(WorkerCycle.id).filter_by(
+            cycle_id=worker_cycle.cycle_id, is_completed=True
+        ).count()
+
+    def participation():
+        # Bypass the participation cache to time the query
+        cycle_manager._participations.clear()
+        worker_id = f"worker-{random.randrange(args.workers_per_cycle)}"
+        cycle_manager.last_participation(fl_process, worker_id)
+
+    def completed_count():
+        db.session.query(WorkerCycle.id).filter_by(
+            cycle_id=random.choice(cycle_ids), is_completed=True
+        ).count()
+
+    print(f"{'path':>12} {'median (ms)':>12}")
+    print(f"{'assignment':>12} {timeit(assignment, args.repeat):>12.3f}")
+    print(f"{'report':>12} {timeit(report, args.repeat):>12.3f}")
+    print(f"{'completed':>12} {timeit(completed_count, args.repeat):>12.3f}")
+    print(f"{'participated':>12} {timeit(participation, args.repeat):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Stress the cycle admission from several processes, as gunicorn workers
+serving cycle requests concurrently would.
+
+Every process tries to admit the same pool of workers (each worker is
+requested by several processes at once) into a cycle limited to
+`--max-workers` slots, then the database is checked for over-admission and
+duplicated assignments.
+
+Usage:
+    poetry run python benchmarks/stress_cycle_admission.py --processes 8 --workers 500
+    poetry run python benchmarks/stress_cycle_admission.py --database postgresql://...
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+from flask import Flask
+from sqlalchemy import func
+
+from main.core.database import db
+from main.core.model_centric.cycles import cycle_manager
+from main.core.model_centric.cycles.cycle import Cycle
+from main.core.model_centric.cycles.worker_cycle import WorkerCycle
+from main.core.model_centric.processes.fl_process import FLProcess
+from main.core.model_centric.workers.worker import Worker
+
+
+def create_app(database):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def setup(database, num_workers):
+    with create_app(database).app_context():
+        db.create_all()
+        fl_process = FLProcess(name="stress", version="1.0")
+        db.session.add(fl_process)
+        db.session.commit()
+
+        cycle = Cycle(
+            start=datetime.now(),
+            sequence=1,
+            version="1.0",
+            fl_process_id=fl_process.id,
+        )
+        db.session.add(cycle)
+        db.session.add_all(Worker(id=f"worker-{i}") for i in range(num_workers))
+        db.session.commit()
+        return cycle.id
+
+
+def request_slots(database, cycle_id, worker_ids, max_slots, results):
+    with create_app(database).app_context():
+        cycle = db.session.query(Cycle).get(cycle_id)
+        accepted = 0
+        elapsed = []
+        for worker_id in worker_ids:
+            start = time.perf_counter()
+            if cycle_manager.assign(
+                Worker(id=worker_id), cycle, uuid.uuid4().hex, max_slots
+            ):
+                accepted += 1
+            elapsed.append(time.perf_counter() - start)
+        results.put((accepted, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=500)
+    parser.add_argument("--max-workers", type=int, default=100)
+    parser.add_argument("--expected-failure-rate", type=float, default=0.2)
+    parser.add_argument("--database", default=None)
+    args = parser.parse_args()
+
+    database = args.database
+    if database is None:
+        database = f"sqlite:///{tempfile.mkdtemp()}/stress.db"
+
+    cycle_id = setup(database, args.workers)
+    max_slots = cycle_manager.max_slots(
+        {
+            "max_workers": args.max_workers,
+            "expected_failure_rate": args.expected_failure_rate,
+        }
+    )
+
+    results = multiprocessing.Queue()
+    processes = []
+    for _ in range(args.processes):
+        # Every process requests every worker, in a different order
+        worker_ids = [f"worker-{i}" for i in range(args.workers)]
+        random.shuffle(worker_ids)
+        processes.append(
+            multiprocessing.Process(
+                target=request_slots,
+                args=(database, cycle_id, worker_ids, max_slots, results),
+            )
+        )
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    total = time.perf_counter() - start
+
+    accepted = sum(outcome[0] for outcome in outcomes)
+    elapsed = sorted(sample for outcome in outcomes for sample in outcome[1])
+
+    with create_app(database).app_context():
+        rows = db.session.query(WorkerCycle).filter_by(cycle_id=cycle_id).count()
+        distinct = (
+            db.session.query(func.count(func.distinct(WorkerCycle.worker_id)))
+            .filter_by(cycle_id=cycle_id)
+            .scalar()
+        )
+        counter = (
+            db.session.query(Cycle.assigned_workers).filter_by(id=cycle_id).scalar()
+        )
+
+    print(f"requests: {len(elapsed)} in {total:.2f}s")
+    print(
+        f"latency p50: {elapsed[len(elapsed) // 2] * 1000:.2f}ms "
+        f"p99: {elapsed[int(len(elapsed) * 0.99)] * 1000:.2f}ms"
+    )
+    print(f"slots: {max_slots}, accepted: {accepted}, rows: {rows}, counter: {counter}")
+
+    assert accepted == rows == counter, "Slot counter out of sync"
+    assert rows == distinct, "Worker assigned twice"
+    assert rows <= max_slots, "Cycle over-admitted"
+    assert rows == min(max_slots, args.workers), "Free slots left unused"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
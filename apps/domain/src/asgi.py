@@ -0,0 +1,26 @@
+"""ASGI entry point serving the model-centric WebSocket events (see
+main.events.gateway), e.g. with uvicorn:
+
+    poetry install -E asgi
+    poetry run uvicorn --app-dir src asgi:app --port 5001
+
+HTTP routes are still served by the WSGI app (wsgi.py), the reverse proxy
+sends the WebSocket upgrades to this server.
+"""
+from app import create_app
+import os
+
+from main.events.gateway import WebSocketGateway
+
+args = {
+    "port": os.environ.get("GRID_NODE_PORT", 5000),
+    "host": os.environ.get("GRID_NODE_HOST", "0.0.0.0"),
+    "name": os.environ.get("GRID_NODE_NAME", "OpenMined"),
+    "start_local_db": os.environ.get("LOCAL_DATABASE", False),
+}
+args_obj = type("args", (object,), args)()
+
+app = WebSocketGateway(
+    create_app(args=args_obj),
+    max_workers=int(os.environ.get("WS_GATEWAY_WORKERS", 32)),
+)
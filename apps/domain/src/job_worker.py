@@ -0,0 +1,49 @@
+"""Consume the model-centric background jobs (e.g. cycle completion and
+averaging) outside of the request worker processes, and complete the cycles
+reaching their end time.
+
+Start the domain with MODEL_CENTRIC_JOB_WORKER=external and run one (or
+more) job workers sharing the same database and MODEL_CENTRIC_JOB_QUEUE
+(path of the SQLite job queue, default: "jobs.db" next to the database):
+
+    poetry run python src/job_worker.py
+"""
+import argparse
+import os
+
+# The domain app must not start its own consumer in this process
+os.environ["MODEL_CENTRIC_JOB_WORKER"] = "external"
+
+from app import create_app
+from main.core.model_centric.cycles import cycle_manager
+from main.core.model_centric.tasks.cycle import create_job_worker
+
+parser = argparse.ArgumentParser(description="Run PyGrid model-centric job worker.")
+
+parser.add_argument(
+    "--name",
+    type=str,
+    help="Grid node name, e.g. --name=OpenMined. Default is os.environ.get('GRID_NODE_NAME','OpenMined').",
+    default=os.environ.get("GRID_NODE_NAME", "OpenMined"),
+)
+
+parser.add_argument(
+    "--start_local_db",
+    dest="start_local_db",
+    action="store_true",
+    help="If this flag is used a SQLAlchemy DB URI is generated to use a local db.",
+)
+
+parser.add_argument(
+    "--poll_interval",
+    type=float,
+    help="Seconds to wait when the queue is empty, e.g. --poll_interval=0.5.",
+    default=0.5,
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    app = create_app(args)
+    cycle_manager.scheduler.start(app)
+    create_job_worker(app, poll_interval=args.poll_interval).run_forever()
@@ -22,6 +22,8 @@ class MODEL_CENTRIC_FL_EVENTS(object):
     REPORT = "model-centric/report"
     AUTHENTICATE = "model-centric/authenticate"
     CYCLE_REQUEST = "model-centric/cycle-request"
+    SUBSCRIBE = "model-centric/subscribe"
+    CYCLE_OPEN = "model-centric/cycle-open"
 
 
 class USER_EVENTS(object):
@@ -71,6 +73,7 @@ class CYCLE(object):
     SERVER_CONFIG = "server_config"
     TIMEOUT = "timeout"
     DIFF = "diff"
+    DIFF_ENCODING = "diff_encoding"
     AVG_PLAN = "averaging_plan"
     ACCEPTED = "accepted"
     REJECTED = "rejected"
@@ -0,0 +1,76 @@
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+
+def add_missing_columns(db, table_names):
+    """Add the columns declared in the models that are missing from already
+    existing tables.
+
+    `db.create_all()` only creates missing tables, so databases created by a
+    previous version wouldn't get the new (nullable) columns.
+
+    Args:
+        db: SQLAlchemy database instance.
+        table_names: Names of the tables to upgrade.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table_name in table_names:
+        table = db.metadata.tables.get(table_name)
+        if table is None or table_name not in existing_tables:
+            continue
+
+        existing_columns = {col["name"] for col in inspector.get_columns(table_name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+
+            if not column.nullable:
+                logging.warning(
+                    f"Can't add non nullable column {table_name}.{column.name}"
+                )
+                continue
+
+            column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            logging.info(f"Adding column {table_name}.{column.name}")
+            with engine.begin() as connection:
+                connection.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}")
+
+
+def add_missing_indexes(db, table_names):
+    """Create the indexes declared in the models that are missing from already
+    existing tables.
+
+    Unique indexes can't be created while the table holds duplicated rows,
+    these are reported and skipped.
+
+    Args:
+        db: SQLAlchemy database instance.
+        table_names: Names of the tables to upgrade.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table_name in table_names:
+        table = db.metadata.tables.get(table_name)
+        if table is None or table_name not in existing_tables:
+            continue
+
+        existing_indexes = {
+            index["name"] for index in inspector.get_indexes(table_name)
+        }
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+
+            logging.info(f"Creating index {index.name}")
+            try:
+                index.create(bind=engine)
+            except IntegrityError as e:
+                logging.warning(f"Can't create index {index.name}: {e}")
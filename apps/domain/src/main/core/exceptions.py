@@ -152,6 +152,13 @@ class RequestError(PyGridError):
         super().__init__(message)
 
 
+class InvalidDiffError(PyGridError):
+    def __init__(self, message=""):
+        if not message:
+            message = "Reported diff doesn't match the model!"
+        super().__init__(message)
+
+
 class InvalidParameterValueError(PyGridError):
     def __init__(self, message=""):
         if not message:
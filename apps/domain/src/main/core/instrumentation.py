@@ -0,0 +1,141 @@
+"""Request, SQL and syft service timings, exposed with the other metrics
+on a Prometheus `/metrics` endpoint."""
+# Standard python imports
+import functools
+import time
+
+# External imports
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Local imports
+from .metrics import metrics
+
+HTTP_REQUEST_SECONDS = "http_request_duration_seconds"
+HTTP_REQUEST_SQL_QUERIES = "http_request_sql_queries"
+HTTP_REQUEST_SQL_SECONDS = "http_request_sql_seconds"
+SQL_QUERY_SECONDS = "sql_query_duration_seconds"
+SERVICE_SECONDS = "syft_service_duration_seconds"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Statement types used as SQL metric label, the others are reported as "OTHER"
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+metrics.declare(HTTP_REQUEST_SECONDS, "Duration of the HTTP requests.")
+metrics.declare(
+    HTTP_REQUEST_SQL_QUERIES,
+    "SQL queries run by each HTTP request.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+metrics.declare(HTTP_REQUEST_SQL_SECONDS, "Time spent in SQL queries per HTTP request.")
+metrics.declare(SQL_QUERY_SECONDS, "Duration of the SQL queries.")
+metrics.declare(SERVICE_SECONDS, "Duration of the syft service message handlers.")
+
+
+def init_metrics(app, node=None, path: str = "/metrics"):
+    """Time the HTTP requests, the SQL queries and the node's syft services,
+    and serve the metrics in the Prometheus text format.
+
+    Args:
+        app: Flask app.
+        node: Syft node whose service handlers are timed.
+        path: URL of the metrics endpoint.
+    """
+    app.before_request(_start_request)
+    app.after_request(_end_request)
+
+    if not event.contains(Engine, "before_cursor_execute", _start_query):
+        event.listen(Engine, "before_cursor_execute", _start_query)
+        event.listen(Engine, "after_cursor_execute", _end_query)
+
+    if node is not None:
+        instrument_services(node)
+
+    app.add_url_rule(path, "metrics", _metrics_view)
+
+
+def instrument_services(node):
+    """Time every message handler of the node's services (the values of
+    their `msg_handler_map`), labelled by service and message type.
+
+    Args:
+        node: Syft node.
+    """
+    services = []
+    for attribute in (
+        "immediate_services_with_reply",
+        "immediate_services_without_reply",
+        "eventual_services_with_reply",
+        "eventual_services_without_reply",
+    ):
+        services += getattr(node, attribute, None) or []
+
+    for service in services:
+        handler_map = getattr(service, "msg_handler_map", None)
+        if not handler_map or getattr(service, "_metrics_instrumented", False):
+            continue
+        for msg_type, handler in handler_map.items():
+            handler_map[msg_type] = _timed(
+                handler, service=service.__name__, message=msg_type.__name__
+            )
+        service._metrics_instrumented = True
+
+
+def _timed(handler, **labels):
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        with metrics.timer(SERVICE_SECONDS, **labels):
+            return handler(*args, **kwargs)
+
+    return wrapper
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_sql_queries = 0
+    g._metrics_sql_seconds = 0.0
+
+
+def _end_request(response):
+    start = getattr(g, "_metrics_start", None)
+    if start is None:
+        return response
+
+    # Route templates (e.g. /users/<user_id>) keep the number of labels bounded
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.observe(
+        HTTP_REQUEST_SECONDS,
+        time.perf_counter() - start,
+        route=route,
+        method=request.method,
+        status=str(response.status_code),
+    )
+    metrics.observe(HTTP_REQUEST_SQL_QUERIES, g._metrics_sql_queries, route=route)
+    metrics.observe(HTTP_REQUEST_SQL_SECONDS, g._metrics_sql_seconds, route=route)
+    return response
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    operation = statement.lstrip()[:6].upper()
+    if operation not in _SQL_OPERATIONS:
+        operation = "OTHER"
+    metrics.observe(SQL_QUERY_SECONDS, elapsed, operation=operation)
+
+    if has_request_context() and hasattr(g, "_metrics_sql_queries"):
+        g._metrics_sql_queries += 1
+        g._metrics_sql_seconds += elapsed
+
+
+def _metrics_view():
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
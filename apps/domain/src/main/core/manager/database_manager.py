@@ -2,9 +2,27 @@ from typing import Dict
 from typing import Type
 from typing import Union
 from typing import List
+from sqlalchemy import LargeBinary
+from sqlalchemy.orm import defer
 from ..database import BaseModel, db
 
 
+def deferred_binary_columns(schema) -> List:
+    """Loader options deferring the binary columns of a table, these columns
+    are only loaded when accessed.
+
+    Args:
+        schema: Database model class.
+    Returns:
+        options: List of SQLAlchemy loader options.
+    """
+    return [
+        defer(attr.key)
+        for attr in schema.__mapper__.column_attrs
+        if any(isinstance(col.type, LargeBinary) for col in attr.columns)
+    ]
+
+
 class DatabaseManager:
     def register(self, **kwargs) -> BaseModel:
         """Register e  new object into the database.
@@ -27,12 +45,16 @@ class DatabaseManager:
         objects = self.db.session.query(self._schema).filter_by(**kwargs).all()
         return objects
 
-    def first(self, **kwargs) -> Union[None, BaseModel]:
+    def first(self, defer_binary: bool = False, **kwargs) -> Union[None, BaseModel]:
         """Query db objects filtering by parameters
         Args:
+            defer_binary: Don't load binary columns until they're accessed.
             parameters : List of parameters used to filter.
         """
-        objects = self.db.session.query(self._schema).filter_by(**kwargs).first()
+        query = self.db.session.query(self._schema)
+        if defer_binary:
+            query = query.options(*deferred_binary_columns(self._schema))
+        objects = query.filter_by(**kwargs).first()
         return objects
 
     def last(self, **kwargs):
@@ -41,11 +63,35 @@ class DatabaseManager:
         Args:
             parameters: List of parameters used to filter.
         Return:
-            obj: Last object instance.
+            obj: Last object instance or None if not found.
+        """
+        return self.latest(**kwargs)
+
+    def latest(self, order_by: str = None, defer_binary: bool = True, **kwargs):
+        """Query and return the newest occurrence using an ordered LIMIT 1
+        query, so only one row is loaded regardless of the table size.
+
+        Args:
+            order_by: Column used to sort occurrences (default: primary key).
+            defer_binary: Don't load binary columns until they're accessed.
+            parameters: List of parameters used to filter.
+        Return:
+            obj: Newest object instance or None if not found.
         """
+        if order_by is None:
+            order_columns = self._schema.__mapper__.primary_key
+        else:
+            order_columns = [getattr(self._schema, order_by)]
+
+        query = self.db.session.query(self._schema)
+        if defer_binary:
+            query = query.options(*deferred_binary_columns(self._schema))
 
-        obj = self.db.session.query(self._schema).filter_by(**kwargs).all()[-1]
-        return obj
+        return (
+            query.filter_by(**kwargs)
+            .order_by(*[column.desc() for column in order_columns])
+            .first()
+        )
 
     def all(self) -> List[BaseModel]:
         return list(self.db.session.query(self._schema).all())
@@ -0,0 +1,85 @@
+import os
+from urllib.parse import urlparse
+
+from sqlalchemy.engine.url import make_url
+
+from .blob_store import BlobRef, BlobStore
+from .filesystem import FileSystemBlobStore
+from .uploads import ResumableUploads
+
+
+def create_blob_store(url: str) -> BlobStore:
+    """Create a blob store from its URL.
+
+    Args:
+        url: "file:///path/to/dir" or "s3://bucket/prefix".
+            The S3 endpoint can be changed with MODEL_CENTRIC_BLOB_STORE_ENDPOINT
+            to use an S3-compatible service (e.g. MinIO).
+    Returns:
+        blob_store: BlobStore instance.
+    """
+    parsed = urlparse(url)
+
+    if parsed.scheme == "s3":
+        # boto3 is only required when S3 storage is used
+        from .s3 import S3BlobStore
+
+        return S3BlobStore(
+            bucket=parsed.netloc,
+            prefix=parsed.path,
+            endpoint_url=os.environ.get("MODEL_CENTRIC_BLOB_STORE_ENDPOINT"),
+        )
+    elif parsed.scheme in ("", "file"):
+        return FileSystemBlobStore(parsed.path)
+
+    raise ValueError(f"Unsupported blob store: {url}")
+
+
+# Directory of the Flask app, relative SQLite paths are resolved from there
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir] * 4))
+
+
+def default_data_dir(database_url: str = None) -> str:
+    """Directory of the local SQLite database (or the app directory if the
+    database isn't a local file). Model-centric data that has to outlive
+    the server process (blobs, job queue) is kept there by default.
+
+    Args:
+        database_url: SQLAlchemy database URL (default: DATABASE_URL).
+    Returns:
+        directory: Absolute path.
+    """
+    database_url = database_url or os.environ.get("DATABASE_URL")
+    if database_url:
+        url = make_url(database_url)
+        if url.drivername.startswith("sqlite") and url.database not in (
+            None,
+            "",
+            ":memory:",
+        ):
+            return os.path.dirname(os.path.join(APP_ROOT, url.database))
+    return APP_ROOT
+
+
+def default_blob_url(database_url: str = None) -> str:
+    """Default blob store, a "blobs" directory in the data directory (see
+    `default_data_dir`), so blobs live as long as the rows pointing at them.
+
+    Args:
+        database_url: SQLAlchemy database URL (default: DATABASE_URL).
+    Returns:
+        url: "file://" URL of the blob directory.
+    """
+    return "file://" + os.path.join(default_data_dir(database_url), "blobs")
+
+
+blob_store = create_blob_store(
+    os.environ.get("MODEL_CENTRIC_BLOB_STORE") or default_blob_url()
+)
+
+# Partial uploads live on local disk: chunks of an upload have to reach the
+# same host (e.g. sticky sessions) when the domain is scaled horizontally.
+report_uploads = ResumableUploads(
+    os.environ.get("MODEL_CENTRIC_UPLOAD_DIR", "/tmp/pygrid/uploads"),
+    max_size=int(os.environ.get("MODEL_CENTRIC_MAX_DIFF_SIZE", 1024**3)),
+)
@@ -0,0 +1,155 @@
+# Standard python imports
+import hashlib
+import tempfile
+from typing import NamedTuple
+
+# Streams are read and hashed in chunks of this size
+CHUNK_SIZE = 1024**2
+# Streamed blobs larger than this are spooled to disk before upload
+SPOOL_SIZE = 16 * 1024**2
+
+
+class BlobRef(NamedTuple):
+    """Reference to a stored blob, this is what the database rows keep.
+
+    Fields:
+        key (String): Content address used to retrieve the blob.
+        size (Integer): Blob size in bytes.
+        checksum (String): SHA256 hex digest of the blob content.
+    """
+
+    key: str
+    size: int
+    checksum: str
+
+
+class BlobStore:
+    """Content-addressed storage for large binaries (model checkpoints and
+    worker diffs).
+
+    Blobs are addressed by the SHA256 of their content, so storing the same
+    bytes twice is a no-op and a key always points to immutable data.
+    Subclasses implement the backend specific `_write`, `_exists`, `get`,
+    `open` and `delete` methods.
+    """
+
+    @staticmethod
+    def make_key(namespace: str, checksum: str) -> str:
+        """Build the content address of a blob.
+
+        Args:
+            namespace: Kind of blob (e.g. "diffs", "checkpoints").
+            checksum: SHA256 hex digest of the blob content.
+        Returns:
+            key: Blob key.
+        """
+        return f"{namespace}/{checksum[:2]}/{checksum}"
+
+    def put(self, data: bytes, namespace: str) -> BlobRef:
+        """Store a blob.
+
+        Args:
+            data: Blob content.
+            namespace: Kind of blob (e.g. "diffs", "checkpoints").
+        Returns:
+            blob: BlobRef of the stored content.
+        """
+        data = memoryview(data)
+        checksum = hashlib.sha256(data).hexdigest()
+        key = self.make_key(namespace, checksum)
+
+        if not self._exists(key):
+            self._write(key, data)
+
+        return BlobRef(key=key, size=data.nbytes, checksum=checksum)
+
+    def put_stream(self, stream, namespace: str) -> BlobRef:
+        """Store a blob read from a binary file-like object, hashing it chunk
+        by chunk so the content is never held as a single bytes object.
+
+        Args:
+            stream: Readable binary file-like object.
+            namespace: Kind of blob (e.g. "diffs", "checkpoints").
+        Returns:
+            blob: BlobRef of the stored content.
+        """
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            checksum, size = self.copy_stream(stream, spool)
+            key = self.make_key(namespace, checksum)
+
+            if not self._exists(key):
+                spool.seek(0)
+                self._write_stream(key, spool)
+
+        return BlobRef(key=key, size=size, checksum=checksum)
+
+    @staticmethod
+    def copy_stream(source, destination) -> tuple:
+        """Copy a binary stream while computing its SHA256.
+
+        Args:
+            source: Readable binary file-like object.
+            destination: Writable binary file-like object.
+        Returns:
+            checksum, size: SHA256 hex digest and number of bytes copied.
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            destination.write(chunk)
+            size += len(chunk)
+        return sha256.hexdigest(), size
+
+    def get(self, key: str) -> bytes:
+        """Read a whole blob.
+
+        Args:
+            key: Blob key.
+        Returns:
+            data: Blob content.
+        Raises:
+            KeyError: If the blob doesn't exist.
+        """
+        raise NotImplementedError
+
+    def view(self, key: str) -> memoryview:
+        """Read-only view of a blob, backends that can map the blob in memory
+        avoid copying it.
+
+        Args:
+            key: Blob key.
+        Returns:
+            data: Blob content.
+        """
+        return memoryview(self.get(key))
+
+    def open(self, key: str):
+        """Open a blob as a binary file-like object.
+
+        Args:
+            key: Blob key.
+        Returns:
+            file: Readable file-like object.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Remove a blob, missing blobs are ignored.
+
+        Args:
+            key: Blob key.
+        """
+        raise NotImplementedError
+
+    def _exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _write(self, key: str, data: memoryview):
+        raise NotImplementedError
+
+    def _write_stream(self, key: str, stream):
+        self._write(key, memoryview(stream.read()))
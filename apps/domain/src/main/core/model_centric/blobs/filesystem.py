@@ -0,0 +1,100 @@
+# Standard python imports
+import mmap
+import os
+import tempfile
+
+# Local imports
+from .blob_store import BlobRef, BlobStore
+
+
+class FileSystemBlobStore(BlobStore):
+    """Blob store backed by a local directory.
+
+    Blobs are written to a temporary file and atomically renamed to their
+    content address, so concurrent writers of the same blob never expose a
+    partial file. Reads are served through read-only memory maps.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """Local path of a blob.
+
+        Args:
+            key: Blob key.
+        Returns:
+            path: Absolute file path.
+        """
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_stream(self, stream, namespace: str) -> BlobRef:
+        # Write straight to a staging file, it's renamed to its content
+        # address once the checksum is known.
+        staging = os.path.join(self.root, ".staging")
+        os.makedirs(staging, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=staging, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                checksum, size = self.copy_stream(stream, tmp_file)
+
+            key = self.make_key(namespace, checksum)
+            path = self.path(key)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return BlobRef(key=key, size=size, checksum=checksum)
+
+    def get(self, key: str) -> bytes:
+        return bytes(self.view(key))
+
+    def view(self, key: str) -> memoryview:
+        try:
+            with open(self.path(key), "rb") as blob_file:
+                if not os.fstat(blob_file.fileno()).st_size:
+                    return memoryview(b"")
+                # The map stays valid after the file is closed
+                # and is released with the last view referencing it.
+                mapped = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise KeyError(key)
+
+        return memoryview(mapped)
+
+    def open(self, key: str):
+        try:
+            return open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def _exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def _write(self, key: str, data: memoryview):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
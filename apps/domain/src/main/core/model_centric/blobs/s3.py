@@ -0,0 +1,61 @@
+# External imports
+import boto3
+from botocore.exceptions import ClientError
+
+# Local imports
+from .blob_store import BlobStore
+
+
+class S3BlobStore(BlobStore):
+    """Blob store backed by an S3 bucket.
+
+    Any S3-compatible service works, e.g. a local MinIO instance can be used
+    as a stand-in for AWS S3 by setting `endpoint_url`.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def object_key(self, key: str) -> str:
+        """S3 object key of a blob.
+
+        Args:
+            key: Blob key.
+        Returns:
+            object_key: Object key inside the bucket.
+        """
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def get(self, key: str) -> bytes:
+        return self.open(key).read()
+
+    def open(self, key: str):
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket, Key=self.object_key(key)
+            )
+        except self.client.exceptions.NoSuchKey:
+            raise KeyError(key)
+
+        return response["Body"]
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError:
+            return False
+        return True
+
+    def _write(self, key: str, data: memoryview):
+        self.client.put_object(
+            Bucket=self.bucket, Key=self.object_key(key), Body=data.tobytes()
+        )
+
+    def _write_stream(self, key: str, stream):
+        # Multipart upload, the blob is sent in parts instead of a single body
+        self.client.upload_fileobj(stream, self.bucket, self.object_key(key))
@@ -0,0 +1,197 @@
+# Standard python imports
+import fcntl
+import hashlib
+import os
+import time
+import uuid
+
+# Local imports
+from .blob_store import CHUNK_SIZE
+
+
+class ResumableUploads:
+    """Partial uploads kept on local disk until they are complete, so a
+    worker whose connection dropped resumes from the last received byte.
+
+    Each upload is a single file named after the hash of its key, appended
+    to under an exclusive lock, so concurrent or replayed chunks can't
+    corrupt it. The total size announced by the first chunk is kept next
+    to it, the following chunks have to announce the same size. Uploads not
+    touched for `ttl` seconds are deleted.
+
+    Args:
+        root: Directory of the partial uploads.
+        ttl: Seconds an idle upload is kept.
+        max_size: Largest upload in bytes (default: unlimited).
+    """
+
+    # Suffix of the files holding the total size of the uploads
+    SIZE_SUFFIX = ".size"
+
+    def __init__(self, root: str, ttl: float = 24 * 60 * 60, max_size: int = None):
+        self.root = os.path.abspath(root)
+        self.ttl = ttl
+        self.max_size = max_size
+
+    def offset(self, key: str) -> int:
+        """Number of bytes received.
+
+        Args:
+            key: Upload key.
+        Returns:
+            offset: Size of the partial upload.
+        """
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return 0
+
+    def append(
+        self, key: str, start: int, stream, length: int, total: int = None
+    ) -> int:
+        """Append a chunk to an upload.
+
+        The chunk is ignored if it doesn't start where the upload ends, e.g.
+        a chunk that was already received.
+
+        Args:
+            key: Upload key.
+            start: Offset of the chunk in the upload.
+            stream: Binary file-like object with the chunk.
+            length: Bytes of the chunk.
+            total: Size of the whole upload.
+        Returns:
+            offset: Size of the partial upload after the append.
+        Raises:
+            ValueError: If the upload is too large, or a chunk not starting
+                the upload over announces another size than the previous chunks.
+        """
+        self.check_size(total)
+        if total is not None and start + length > total:
+            raise ValueError("Chunk ends after the end of the upload")
+
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.cleanup()
+
+        with open(path, "ab") as upload:
+            fcntl.flock(upload, fcntl.LOCK_EX)
+            if total is not None:
+                expected = self._total(path)
+                if expected is not None and expected != total:
+                    if start != 0:
+                        raise ValueError(
+                            f"Upload size changed from {expected} to {total} bytes"
+                        )
+                    # The worker restarted the upload with another diff
+                    upload.truncate(0)
+                    expected = None
+                if expected is None:
+                    with open(path + self.SIZE_SUFFIX, "w") as size_file:
+                        size_file.write(str(total))
+
+            offset = upload.seek(0, os.SEEK_END)
+            if offset != start:
+                return offset
+
+            while length > 0:
+                chunk = stream.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                upload.write(chunk)
+                length -= len(chunk)
+            return upload.tell()
+
+    def check_size(self, total: int):
+        """Check that an upload isn't larger than `max_size`.
+
+        Args:
+            total: Size of the whole upload.
+        Raises:
+            ValueError: If the upload is too large.
+        """
+        if self.max_size is not None and total is not None and total > self.max_size:
+            raise ValueError(f"Upload is larger than {self.max_size} bytes")
+
+    def _total(self, path: str) -> int:
+        try:
+            with open(path + self.SIZE_SUFFIX) as size_file:
+                return int(size_file.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def open(self, key: str):
+        """Open a complete upload.
+
+        Args:
+            key: Upload key.
+        Returns:
+            file: Binary file object.
+        """
+        return open(self.path(key), "rb")
+
+    def claim(self, key: str):
+        """Take a complete upload out of the partial uploads, so only one of
+        concurrent requests (e.g. a replayed last chunk) finalizes it.
+
+        Args:
+            key: Upload key.
+        Returns:
+            file: Binary file object, the upload is deleted once it's closed.
+        Raises:
+            FileNotFoundError: If there's no such upload, e.g. it was
+                claimed by another request.
+        """
+        path = self.path(key)
+        claimed = f"{path}.{uuid.uuid4().hex}"
+        os.rename(path, claimed)
+        try:
+            return open(claimed, "rb")
+        finally:
+            os.remove(claimed)
+            try:
+                os.remove(path + self.SIZE_SUFFIX)
+            except FileNotFoundError:
+                pass
+
+    def discard(self, key: str):
+        """Delete an upload.
+
+        Args:
+            key: Upload key.
+        """
+        self._remove(self.path(key))
+
+    def cleanup(self, now: float = None):
+        """Delete the uploads idle for longer than the TTL.
+
+        Args:
+            now: Unix time.
+        """
+        now = time.time() if now is None else now
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(self.SIZE_SUFFIX):
+                continue
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    self._remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _remove(self, path: str):
+        for name in (path, path + self.SIZE_SUFFIX):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+
+    def path(self, key: str) -> str:
+        """Local path of an upload.
+
+        Args:
+            key: Upload key.
+        Returns:
+            path: Absolute file path.
+        """
+        return os.path.join(self.root, hashlib.sha256(key.encode()).hexdigest())
@@ -0,0 +1,7 @@
+import os
+
+from .download_cache import CachedAsset, DownloadCache
+
+download_cache = DownloadCache(
+    max_bytes=int(os.environ.get("MODEL_CENTRIC_DOWNLOAD_CACHE_SIZE", 512 * 1024**2))
+)
@@ -0,0 +1,134 @@
+# Standard python imports
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+
+class CachedAsset(NamedTuple):
+    """Immutable bytes served to workers.
+
+    Fields:
+        data (bytes): Asset content.
+        etag (String): Strong validator of the content.
+    """
+
+    data: bytes
+    etag: str
+
+
+class DownloadCache:
+    """Process-level LRU cache of the model checkpoints and plans downloaded
+    by the workers.
+
+    Entries are keyed by immutable identifiers ((model_id, checkpoint number)
+    and (plan_id, format)), so an entry never becomes stale, even when another
+    process saves a new checkpoint. Invalidation only releases memory.
+    """
+
+    CHECKPOINT = "checkpoint"
+    DELTA = "delta"
+    PLAN = "plan"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total bytes held by the cache."""
+        return self._size
+
+    def checkpoint(self, model_id: int, number: int, loader: Callable):
+        """Retrieve a model checkpoint.
+
+        Args:
+            model_id: Model's ID.
+            number: Checkpoint number.
+            loader: Called on cache miss, returns (data, etag or None).
+        Returns:
+            asset: CachedAsset instance.
+        """
+        return self._get((self.CHECKPOINT, model_id, number), loader)
+
+    def delta(self, model_id: int, number: int, loader: Callable):
+        """Retrieve the delta from the previous checkpoint of a model to
+        checkpoint `number`.
+
+        Args:
+            model_id: Model's ID.
+            number: Checkpoint number produced by the delta.
+            loader: Called on cache miss, returns (data, etag or None).
+        Returns:
+            asset: CachedAsset instance.
+        """
+        return self._get((self.DELTA, model_id, number), loader)
+
+    def plan(self, plan_id: int, fmt: str, loader: Callable):
+        """Retrieve a plan in the requested format.
+
+        Args:
+            plan_id: Plan's ID.
+            fmt: Plan format ("list", "torchscript" or "tfjs").
+            loader: Called on cache miss, returns (data, etag or None).
+        Returns:
+            asset: CachedAsset instance.
+        """
+        return self._get((self.PLAN, plan_id, fmt), loader)
+
+    def invalidate_model(self, model_id: int, keep_number: int = None):
+        """Drop the cached checkpoints (and deltas) of a model.
+
+        Args:
+            model_id: Model's ID.
+            keep_number: Checkpoint number that should be kept (e.g. the new latest).
+        """
+        with self._lock:
+            for key in list(self._entries):
+                kind, _id, number = key
+                if (
+                    kind in (self.CHECKPOINT, self.DELTA)
+                    and _id == model_id
+                    and number != keep_number
+                ):
+                    self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _get(self, key: tuple, loader: Callable) -> CachedAsset:
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is not None:
+                self._entries.move_to_end(key)
+                return asset
+
+        # Load outside the lock, concurrent misses may load the same asset twice
+        data, etag = loader()
+        data = bytes(data)
+        if etag is None:
+            etag = hashlib.sha256(data).hexdigest()
+        asset = CachedAsset(data=data, etag=etag)
+
+        if len(data) > self.max_bytes:
+            return asset
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = asset
+                self._size += len(data)
+            while self._size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+        return asset
+
+    def _pop(self, key: tuple):
+        asset = self._entries.pop(key)
+        self._size -= len(asset.data)
@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime
 
 from ...codes import CYCLE, MSG_FIELD
-from ...exceptions import ProtocolNotFoundError
+from ...exceptions import ModelNotFoundError
 from ..cycles import cycle_manager
 from ..models import model_manager
 from ..processes import process_manager
@@ -76,7 +76,7 @@ class FLController:
         Return:
             last_participation: Index of the last cycle assigned to this worker.
         """
-        process = process_manager.first(name=name, version=version)
+        process = process_manager.descriptor(name, version)
         return cycle_manager.last_participation(process, worker_id)
 
     def assign(self, name: str, version: str, worker, last_participation: int):
@@ -91,26 +91,28 @@ class FLController:
         """
         _accepted = False
 
-        if version:
-            _fl_process = process_manager.first(name=name, version=version)
-        else:
-            _fl_process = process_manager.last(name=name)
-
-        server_config, client_config = process_manager.get_configs(
-            name=name, version=version
+        # Configs, plans, protocols and model ID are cached
+        _fl_process = process_manager.descriptor(name, version)
+        server_config = _fl_process.server_config
+        client_config = _fl_process.client_config
+
+        # Advertise the diff encoding the workers should report with
+        # (see models.param_encoding), raw syft params are still accepted
+        diff_encoding = server_config.get(CYCLE.DIFF_ENCODING, None)
+        if diff_encoding:
+            client_config = {**client_config, CYCLE.DIFF_ENCODING: diff_encoding}
+
+        # Retrieve the last cycle used by this fl process/ version,
+        # whether the worker is already assigned to it and the number of completed cycles
+        _cycle, _assigned, n_completed_cycles = cycle_manager.assignment_state(
+            _fl_process.id, worker.id
         )
-
-        # Retrieve the last cycle used by this fl process/ version
-        _cycle = cycle_manager.last(_fl_process.id, None)
-
-        # Check if already exists a relation between the worker and the cycle.
-        _assigned = cycle_manager.is_assigned(worker.id, _cycle.id)
         logging.info(
             f"Worker {worker.id} is already assigned to cycle {_cycle.id}: {_assigned}"
         )
 
         # Check bandwidth
-        _comp_bandwidth = worker_manager.is_eligible(worker.id, server_config)
+        _comp_bandwidth = worker_manager.is_eligible(worker, server_config)
 
         # Check if the current worker is allowed to join into this cycle
         _allowed = True
@@ -120,9 +122,6 @@ class FLController:
         #     last_participation + server.config["do_not_reuse_workers_until_cycle"]
         #     >= _cycle.sequence
         # )
-        n_completed_cycles = cycle_manager.count(
-            fl_process_id=_fl_process.id, is_completed=True
-        )
 
         _max_cycles = server_config["num_cycles"]
 
@@ -135,35 +134,35 @@ class FLController:
         logging.info(f"Worker is accepted: {_accepted}")
 
         if _accepted:
+            # The process is still being created, don't take a slot
+            if _fl_process.model_id is None:
+                raise ModelNotFoundError
+
             # Assign
             # 1 - Generate new request key
-            # 2 - Assign the worker with the cycle.
+            # 2 - Assign the worker with the cycle, if it still has free slots.
             key = self._generate_hash_key(uuid.uuid4().hex)
-            _worker_cycle = cycle_manager.assign(worker, _cycle, key)
-
-            # Create a plan dictionary
-            _plans = process_manager.get_plans(
-                fl_process_id=_fl_process.id, is_avg_plan=False
+            _worker_cycle = cycle_manager.assign(
+                worker,
+                _cycle,
+                key,
+                max_slots=cycle_manager.slots(_cycle, server_config),
             )
 
-            # Create a protocol dictionary
-            try:
-                _protocols = process_manager.get_protocols(fl_process_id=_fl_process.id)
-            except ProtocolNotFoundError:
-                # Protocols are optional
-                _protocols = {}
+            # The cycle may be full, or a concurrent request assigned this worker first
+            _accepted = _worker_cycle is not None
 
-            # Get model ID
-            _model = model_manager.get(fl_process_id=_fl_process.id)
+        if _accepted:
             return {
                 CYCLE.STATUS: "accepted",
                 CYCLE.KEY: _worker_cycle.request_key,
                 CYCLE.VERSION: _cycle.version,
                 MSG_FIELD.MODEL: name,
-                CYCLE.PLANS: _plans,
-                CYCLE.PROTOCOLS: _protocols,
+                CYCLE.PLANS: _fl_process.plans,
+                # Protocols are optional
+                CYCLE.PROTOCOLS: _fl_process.protocols,
                 CYCLE.CLIENT_CONFIG: client_config,
-                MSG_FIELD.MODEL_ID: _model.id,
+                MSG_FIELD.MODEL_ID: _fl_process.model_id,
             }
         else:
 
@@ -186,14 +185,16 @@ class FLController:
         """
         return hashlib.sha256(primary_key.encode()).hexdigest()
 
-    def submit_diff(self, worker_id: str, request_key: str, diff: bytes):
+    def submit_diff(self, worker_id: str, request_key: str, diff):
         """Submit worker model diff to the assigned cycle.
 
         Args:
             worker_id: Worker's ID.
             request_key: request (token) used by this worker during this cycle.
-            diff: Model params trained by this worker.
+            diff: Model params trained by this worker (bytes or a binary
+                file-like object streamed into the blob store).
         Raises:
-            ProcessLookupError : If Not found any relation between the worker/cycle.
+            ProcessLookupError : If Not found any relation between the worker/cycle,
+                or the worker already reported.
         """
         return cycle_manager.submit_worker_diff(worker_id, request_key, diff)
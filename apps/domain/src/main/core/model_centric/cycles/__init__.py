@@ -1,4 +1,15 @@
+import os
+
 from .cycle_manager import CycleManager
+from .pool_selection import PoolSelector
 from ...database import db
 
-cycle_manager = CycleManager(db)
+cycle_manager = CycleManager(
+    db,
+    scheduler_refresh_interval=float(
+        os.environ.get("MODEL_CENTRIC_CYCLE_SCHEDULER_REFRESH", 60)
+    ),
+)
+pool_selector = PoolSelector(
+    confidence=float(os.environ.get("MODEL_CENTRIC_POOL_SELECTION_CONFIDENCE", 0.95))
+)
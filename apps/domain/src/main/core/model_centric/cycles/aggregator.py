@@ -0,0 +1,103 @@
+# Standard python imports
+import threading
+
+# Local imports
+from ..models import param_encoding
+from ..models.flat_params import FlatParams, ParamLayout
+
+
+class DiffAccumulator:
+    """Running sum of the model diffs reported during a single cycle.
+
+    Every diff is folded into the sum shortly after it is reported, so
+    averaging at the end of the cycle costs a single division and the memory
+    footprint stays at one model copy regardless of the number of reporting
+    workers.
+
+    The sum is kept in a single flat buffer (see FlatParams), so folding a
+    diff is one copy into a reused scratch buffer plus one add. Encoded diffs
+    (fp16, int8, top-k, see models.param_encoding) are added straight into
+    the sum, without decoding them first.
+
+    Args:
+        layout: ParamLayout of the model. The sum is allocated from it, so
+            diffs have to match the model. Needed to add encoded diffs.
+    """
+
+    def __init__(self, layout: ParamLayout = None):
+        self._layout = layout
+        self._sum = None
+        self._scratch = None
+        self._count = 0
+        # worker_cycle_id -> checksum of the folded diff
+        self._reports = {}
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        """Number of diffs folded into the accumulator."""
+        return self._count
+
+    def __contains__(self, worker_cycle_id: int) -> bool:
+        return worker_cycle_id in self._reports
+
+    def is_stale(self, worker_cycle_id: int, checksum: str) -> bool:
+        """Check if a worker cycle was folded with a different diff.
+
+        Args:
+            worker_cycle_id: ID of the WorkerCycle that reported the diff.
+            checksum: Checksum of the currently reported diff.
+        Returns:
+            result: Boolean flag.
+        """
+        return self._reports.get(worker_cycle_id, checksum) != checksum
+
+    def add(self, worker_cycle_id: int, diff: list, checksum: str = None):
+        """Fold a worker diff into the running sum.
+
+        Args:
+            worker_cycle_id: ID of the WorkerCycle that reported this diff.
+            diff: List of tensors (one per model param), FlatParams or an
+                encoded payload.
+            checksum: Checksum of the reported diff.
+        Returns:
+            result: False if this worker cycle was already accumulated.
+        Raises:
+            ValueError: If the diff doesn't match the model layout (or the
+                layout of the previous diffs).
+        """
+        with self._lock:
+            if worker_cycle_id in self._reports:
+                return False
+
+            if self._sum is None and self._layout is not None:
+                self._sum = FlatParams.zeros(self._layout)
+
+            if isinstance(diff, (bytes, bytearray, memoryview)):
+                if self._sum is None:
+                    raise ValueError("Encoded diffs need the model layout")
+                param_encoding.add_into(diff, self._sum)
+            elif self._sum is None:
+                self._sum = FlatParams.from_tensors(diff)
+            else:
+                if self._scratch is None:
+                    self._scratch = self._sum.zeros_like()
+                self._sum.add_(FlatParams.from_tensors(diff, out=self._scratch))
+
+            self._reports[worker_cycle_id] = checksum
+            self._count += 1
+            return True
+
+    def average(self) -> list:
+        """Divide the running sum by the number of accumulated diffs.
+
+        The running sum is left untouched, so a failed cycle completion can
+        average the same accumulator again.
+
+        Returns:
+            diff_avg: New FlatParams holding the averaged diff, or None if no diff was added.
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            return FlatParams(self._sum.buffer / self._count, self._sum.layout)
@@ -12,9 +12,19 @@ class Cycle(BaseModel):
         end (TIME): End time.
         worker_cycles (WorkerCycle): Relationship between workers and cycles (One to many).
         fl_process_id (Integer,ForeignKey): Federated learning ID that owns this cycle.
+        assigned_workers (Integer): Number of workers admitted into this cycle.
+        completion_lease (TIME): Until when the cycle is being completed by a server process.
     """
 
     __tablename__ = "model_centric_cycle"
+    __table_args__ = (
+        db.Index(
+            "ix_model_centric_cycle_process_version_completed",
+            "fl_process_id",
+            "version",
+            "is_completed",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     start = db.Column(db.DateTime())
@@ -24,6 +34,8 @@ class Cycle(BaseModel):
     worker_cycles = db.relationship("WorkerCycle", backref="cycle")
     fl_process_id = db.Column(db.Integer, db.ForeignKey("model_centric_fl_process.id"))
     is_completed = db.Column(db.Boolean, default=False)
+    assigned_workers = db.Column(db.Integer, default=0)
+    completion_lease = db.Column(db.DateTime())
 
     def __str__(self):
         return f"< Cycle id : {self.id}, sequence: {self.sequence}, start: {self.start}, end: {self.end}, fl_process_id: {self.fl_process_id}, is_completed: {self.is_completed}>"
@@ -1,25 +1,60 @@
 # Cycle module imports
-import json
 import logging
+import math
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import closing
 
 # Generic imports
 from datetime import datetime, timedelta
-from functools import reduce
 
 import torch as th
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 
-from ...exceptions import CycleNotFoundError
+from ...exceptions import CycleNotFoundError, InvalidDiffError, PlanNotFoundError
 
 # PyGrid modules
 from ...manager.database_manager import DatabaseManager
+from ...metrics import metrics
+from ..blobs import blob_store
 from ..models import model_manager
+from ..models import param_encoding
+from ..models.flat_params import FlatParams, ParamLayout
 from ..processes import process_manager
-from ..syft_assets import PlanManager
-from ..tasks.cycle import complete_cycle, run_task_once
+from ..stats import stats_tracker
+from ..syft_assets import plans
+from ..tasks.cycle import (
+    enqueue_compact_checkpoints,
+    enqueue_complete_cycle,
+    enqueue_purge_cycle_diffs,
+)
+from .aggregator import DiffAccumulator
 from .cycle import Cycle
+from .cycle_scheduler import CycleScheduler
 from .worker_cycle import WorkerCycle
 
 
+# Number of (process, worker) pairs kept in the participation cache
+PARTICIPATION_CACHE_SIZE = 100000
+
+# Seconds a cached participation is trusted before it's read again from the
+# database, so assignments made by the other server processes are seen
+PARTICIPATION_CACHE_TTL = 30
+
+# Seconds a server process has to complete a cycle before another one can
+COMPLETION_LEASE = 600
+
+# Blob keys checked per query when purging diffs
+PURGE_BATCH_SIZE = 500
+
+# Seconds spent in each phase of the cycle averaging
+CYCLE_PHASE_SECONDS = "model_centric_cycle_phase_seconds"
+
+
 class WorkerCycleManager(DatabaseManager):
     schema = WorkerCycle
 
@@ -37,12 +72,38 @@ class _CycleManager(DatabaseManager):
 
 
 class CycleManager(DatabaseManager):
-    def __init__(self, database):
+    def __init__(self, database, scheduler_refresh_interval: float = 60):
         self.db = database
 
+        # Completes the cycles once their end time has passed
+        self.scheduler = CycleScheduler(
+            on_expire=enqueue_complete_cycle,
+            loader=self.open_cycles,
+            refresh_interval=scheduler_refresh_interval,
+        )
+
         self._cycles = _CycleManager(database)
         self._worker_cycles = WorkerCycleManager(database)
 
+        # Running sums of reported diffs (cycle_id -> DiffAccumulator).
+        # None means the cycle is averaged by a hosted avg plan instead.
+        self._accumulators = {}
+        self._accumulators_lock = threading.Lock()
+
+        # Last cycle sequence each worker joined
+        # ((fl_process_id, worker_id) -> (sequence, expires_at)). Assignments made
+        # by other processes are only seen once the entry expires.
+        self._participations = OrderedDict()
+        self._participations_lock = threading.Lock()
+        self._participations_max_size = PARTICIPATION_CACHE_SIZE
+        self._participations_ttl = PARTICIPATION_CACHE_TTL
+
+        # Called with every cycle created by this process
+        self._cycle_listeners = []
+
+        # Failure rate observed before the open cycle (fl_process_id -> (cycle_id, rate))
+        self._failure_rates = {}
+
     def create(self, fl_process_id: int, version: str, cycle_time: int):
         """Create a new federated learning cycle.
 
@@ -55,10 +116,9 @@ class CycleManager(DatabaseManager):
         """
         _new_cycle = None
 
-        # Retrieve a list of cycles using the same model_id/version
-        sequence_number = len(
-            self._cycles.query(fl_process_id=fl_process_id, version=version)
-        )
+        # Retrieve the last cycle using the same model_id/version
+        _last_cycle = self._cycles.latest(fl_process_id=fl_process_id, version=version)
+        sequence_number = _last_cycle.sequence if _last_cycle else 0
         _now = datetime.now()
         _end = _now + timedelta(seconds=cycle_time) if cycle_time is not None else None
         _new_cycle = self._cycles.register(
@@ -68,9 +128,53 @@ class CycleManager(DatabaseManager):
             version=version,
             fl_process_id=fl_process_id,
         )
+        self.scheduler.schedule(_new_cycle.id, _end)
+
+        for listener in self._cycle_listeners:
+            try:
+                listener(_new_cycle)
+            except Exception:
+                logging.error(f"Cycle listener failed: {traceback.format_exc()}")
 
         return _new_cycle
 
+    def on_cycle_created(self, listener):
+        """Register a function called with the cycles created by this process.
+
+        Args:
+            listener: Function receiving the new Cycle instance.
+        """
+        self._cycle_listeners.append(listener)
+
+    def cycles_after(self, cycle_id: int = None):
+        """Open cycles created after a given cycle, e.g. by other processes.
+
+        Args:
+            cycle_id: Cycle's ID (default: only return the newest cycle).
+        Returns:
+            cycles: List of (cycle ID, FL process ID), oldest first.
+        """
+        query = self.db.session.query(Cycle.id, Cycle.fl_process_id)
+        if cycle_id is None:
+            return query.order_by(Cycle.id.desc()).limit(1).all()
+        return (
+            query.filter(Cycle.id > cycle_id, Cycle.is_completed == False)
+            .order_by(Cycle.id)
+            .all()
+        )
+
+    def open_cycles(self):
+        """End time of the cycles not completed yet.
+
+        Returns:
+            cycles: List of (cycle ID, end time), cycles without end time are skipped.
+        """
+        return (
+            self.db.session.query(Cycle.id, Cycle.end)
+            .filter(Cycle.is_completed == False, Cycle.end != None)
+            .all()
+        )
+
     def last_participation(self, process: int, worker_id: str):
         """Retrieve the last time the worker participated from this cycle.
 
@@ -80,21 +184,44 @@ class CycleManager(DatabaseManager):
         Returns:
             last_participation: last cycle.
         """
-        _cycles = self._cycles.query(fl_process_id=process.id)
-
-        last = 0
-        if not len(_cycles):
-            return last
-
-        for cycle in _cycles:
-            worker_cycle = self._worker_cycles.first(
-                cycle_id=cycle.id, worker_id=worker_id
+        key = (process.id, worker_id)
+        with self._participations_lock:
+            cached = self._participations.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                self._participations.move_to_end(key)
+                return cached[0]
+
+        last = (
+            self.db.session.query(func.max(Cycle.sequence))
+            .join(WorkerCycle, WorkerCycle.cycle_id == Cycle.id)
+            .filter(
+                Cycle.fl_process_id == process.id, WorkerCycle.worker_id == worker_id
             )
-            if worker_cycle and cycle.sequence > last:
-                last = cycle.sequence
+            .scalar()
+        ) or 0
 
+        self._cache_participation(key, last, read=True)
         return last
 
+    def _cache_participation(self, key: tuple, sequence: int, read: bool = False):
+        """Cache the last cycle sequence a worker joined.
+
+        Args:
+            key: (fl_process_id, worker_id) pair.
+            sequence: Cycle sequence joined by the worker.
+            read: Whether the sequence was just read from the database, in
+                which case it replaces the cached one.
+        """
+        now = time.monotonic()
+        with self._participations_lock:
+            cached = self._participations.get(key)
+            if not read and cached is not None and cached[1] > now:
+                sequence = max(cached[0], sequence)
+            self._participations[key] = (sequence, now + self._participations_ttl)
+            self._participations.move_to_end(key)
+            while len(self._participations) > self._participations_max_size:
+                self._participations.popitem(last=False)
+
     def last(self, fl_process_id: int, version: str = None):
         """Retrieve the last not completed registered cycle.
 
@@ -105,17 +232,29 @@ class CycleManager(DatabaseManager):
             cycle: Cycle Instance / None
         """
         if version:
-            _cycle = self._cycles.last(
+            _cycle = self._cycles.latest(
                 fl_process_id=fl_process_id, version=version, is_completed=False
             )
         else:
-            _cycle = self._cycles.last(fl_process_id=fl_process_id, is_completed=False)
+            _cycle = self._cycles.latest(
+                fl_process_id=fl_process_id, is_completed=False
+            )
 
         if not _cycle:
             raise CycleNotFoundError
 
         return _cycle
 
+    def first(self, **kwargs):
+        """Retrieve a registered Cycle.
+
+        Args:
+            parameters: Parameters used to filter the cycle.
+        Returns:
+            cycle: Cycle Instance / None
+        """
+        return self._cycles.first(**kwargs)
+
     def delete(self, **kwargs):
         """Delete a registered Cycle.
 
@@ -123,6 +262,8 @@ class CycleManager(DatabaseManager):
             model_id: Model's ID.
         """
         self._cycles.delete(**kwargs)
+        with self._participations_lock:
+            self._participations.clear()
 
     def is_assigned(self, worker_id: str, cycle_id: int):
         """Check if a workers is already assigned to an specific cycle.
@@ -135,11 +276,90 @@ class CycleManager(DatabaseManager):
         """
         return self._worker_cycles.first(worker_id=worker_id, cycle_id=cycle_id) != None
 
-    def assign(self, worker, cycle, hash_key: str):
-        _worker_cycle = self._worker_cycles.register(
-            worker=worker, cycle=cycle, request_key=hash_key
+    @staticmethod
+    def max_slots(server_config: dict, failure_rate: float = None):
+        """Number of workers that can be admitted into a cycle.
+
+        Cycles are over-subscribed by the expected failure rate, so enough
+        diffs are reported even if some of the workers drop out.
+
+        Args:
+            server_config: FL Process Server Config.
+            failure_rate: Observed failure rate (default: server_config's expected_failure_rate).
+        Returns:
+            slots: Number of slots or None if the process doesn't limit workers.
+        """
+        max_workers = server_config.get("max_workers", None)
+        if max_workers is None:
+            return None
+        if failure_rate is None:
+            failure_rate = server_config.get("expected_failure_rate", 0)
+        return math.ceil(max_workers * (1 + failure_rate))
+
+    def slots(self, cycle, server_config: dict):
+        """Number of workers admitted into a cycle, padded by the decayed
+        failure rate of the process, or the failure rate of its previous
+        cycle, or else the expected failure rate.
+
+        Both the join decision (/req-join) and the assignment (cycle
+        requests) use it, so they agree on when a cycle is full.
+
+        Args:
+            cycle: Open cycle of the process.
+            server_config: FL Process Server Config.
+        Returns:
+            slots: Number of slots or None if the process doesn't limit workers.
+        """
+        failure_rate = stats_tracker.failure_rate(cycle.fl_process_id)
+        if failure_rate is None:
+            failure_rate = self.failure_rate(cycle)
+        return self.max_slots(server_config, failure_rate)
+
+    def assign(self, worker, cycle, hash_key: str, max_slots: int = None):
+        """Admit a worker into a cycle.
+
+        A slot is claimed with a conditional increment of the cycle's worker
+        counter (compare-and-swap on the cycle row, which also row-locks it
+        until commit) and the worker cycle is inserted in the same transaction.
+        Concurrent requests, from any server process, can't exceed the cycle
+        slots nor assign the same worker twice.
+
+        Args:
+            worker: Worker instance.
+            cycle: Cycle instance.
+            hash_key: Request key given to the worker.
+            max_slots: Maximum number of workers admitted into the cycle (default: unlimited).
+        Returns:
+            worker_cycle: WorkerCycle instance or None if the cycle is full or
+                the worker was already assigned.
+        """
+        session = self.db.session
+        assigned_workers = func.coalesce(Cycle.assigned_workers, 0)
+
+        claim = session.query(Cycle).filter_by(id=cycle.id, is_completed=False)
+        if max_slots is not None:
+            claim = claim.filter(assigned_workers < max_slots)
+
+        claimed = claim.update(
+            {Cycle.assigned_workers: assigned_workers + 1}, synchronize_session=False
         )
+        if not claimed:
+            # The cycle is full (or was completed meanwhile)
+            session.rollback()
+            return None
 
+        _worker_cycle = WorkerCycle(
+            worker_id=worker.id, cycle_id=cycle.id, request_key=hash_key
+        )
+        session.add(_worker_cycle)
+        try:
+            session.commit()
+        except IntegrityError:
+            # (worker_id, cycle_id) is unique, rolling back releases the slot
+            session.rollback()
+            return None
+
+        self._cache_participation((cycle.fl_process_id, worker.id), cycle.sequence)
         return _worker_cycle
 
     def validate(self, worker_id: str, cycle_id: int, request_key: str):
@@ -163,22 +383,153 @@ class CycleManager(DatabaseManager):
 
         return _worker_cycle.request_key == request_key
 
-    def count(self, **kwargs):
-        return len(self._cycles)
+    def count(self, **kwargs) -> int:
+        """Count the registered cycles with a single COUNT query.
+
+        Args:
+            parameters: Parameters used to filter the cycles.
+        Returns:
+            count: Number of cycles.
+        """
+        return (
+            self.db.session.query(func.count(Cycle.id))
+            .select_from(Cycle)
+            .filter_by(**kwargs)
+            .scalar()
+        )
+
+    def assignment_state(self, fl_process_id: int, worker_id: str):
+        """Retrieve, in a single query, what's needed to decide whether a
+        worker can join the current cycle.
+
+        Args:
+            fl_process_id: Federated Learning Process ID.
+            worker_id: Worker's ID.
+        Returns:
+            cycle, assigned, completed_cycles: Last not completed cycle, whether
+                the worker is already assigned to it and the number of completed cycles.
+        Raises:
+            CycleNotFoundError (PyGridError) : If the process has no open cycle.
+        """
+        session = self.db.session
+        assigned = (
+            session.query(WorkerCycle.id)
+            .filter(
+                WorkerCycle.cycle_id == Cycle.id, WorkerCycle.worker_id == worker_id
+            )
+            .exists()
+        )
+        # Aliased, so it isn't correlated with the outer query
+        completed = aliased(Cycle)
+        completed_cycles = (
+            session.query(func.count(completed.id))
+            .filter(completed.fl_process_id == fl_process_id, completed.is_completed)
+            .label("completed_cycles")
+        )
+
+        row = (
+            session.query(Cycle, assigned, completed_cycles)
+            .filter_by(fl_process_id=fl_process_id, is_completed=False)
+            .order_by(Cycle.id.desc())
+            .first()
+        )
+
+        if row is None:
+            raise CycleNotFoundError
+
+        _cycle, _assigned, _completed_cycles = row
+        return _cycle, bool(_assigned), _completed_cycles
+
+    def failure_rate(self, cycle):
+        """Fraction of the workers assigned to the previous cycle of the
+        process that didn't report a diff.
+
+        The result is cached until the process moves on to a new cycle.
+
+        Args:
+            cycle: Open cycle of the process.
+        Returns:
+            failure_rate: Failure rate or None if there's no completed cycle with workers yet.
+        """
+        cached = self._failure_rates.get(cycle.fl_process_id)
+        if cached is not None and cached[0] == cycle.id:
+            return cached[1]
+
+        reports = (
+            self.db.session.query(func.count(WorkerCycle.id))
+            .filter(WorkerCycle.cycle_id == Cycle.id, WorkerCycle.is_completed)
+            .label("reports")
+        )
+        row = (
+            self.db.session.query(Cycle.assigned_workers, reports)
+            .filter(
+                Cycle.fl_process_id == cycle.fl_process_id,
+                Cycle.is_completed,
+                Cycle.id < cycle.id,
+            )
+            .order_by(Cycle.id.desc())
+            .first()
+        )
+
+        rate = None
+        if row is not None and row[0]:
+            assigned_workers, reported = row
+            rate = max(0.0, 1 - reported / assigned_workers)
+
+        self._failure_rates[cycle.fl_process_id] = (cycle.id, rate)
+        return rate
+
+    def has_request_key(self, worker_id: str, request_key: str) -> bool:
+        """Check if a request key was given to a worker, in any cycle.
+
+        Args:
+            worker_id: Worker's ID.
+            request_key: Request key to check.
+        Returns:
+            result: Boolean flag.
+        """
+        if not request_key:
+            return False
+        return (
+            self.db.session.query(WorkerCycle.id)
+            .filter_by(worker_id=worker_id, request_key=request_key)
+            .first()
+            is not None
+        )
+
+    def can_report(self, worker_id: str, request_key: str) -> bool:
+        """Check if a worker is assigned to a cycle and still has to report.
 
-    def submit_worker_diff(self, worker_id: str, request_key: str, diff: bytes):
+        Args:
+            worker_id: Worker's ID.
+            request_key: request (token) used by this worker during this cycle.
+        Returns:
+            result: Boolean flag.
+        """
+        return (
+            self.db.session.query(WorkerCycle.id)
+            .filter_by(worker_id=worker_id, request_key=request_key, is_completed=False)
+            .first()
+            is not None
+        )
+
+    def submit_worker_diff(self, worker_id: str, request_key: str, diff):
         """Submit reported diff
         Args:
              worker_id: Worker's ID.
              request_key: request (token) used by this worker during this cycle.
-             diff: Model params trained by this worker.
+             diff: Model params trained by this worker (bytes or a binary
+                 file-like object streamed into the blob store).
         Returns:
              cycle_id : Cycle's ID.
         Raises:
-             ProcessLookupError : If Not found any relation between the worker/cycle.
+             ProcessLookupError : If Not found any relation between the worker/cycle,
+                 or the worker already reported (see can_report).
+             InvalidDiffError : If an encoded diff doesn't match the model or
+                 can't be decoded by this server.
         """
         _worker_cycle = self._worker_cycles.first(
-            worker_id=worker_id, request_key=request_key
+            worker_id=worker_id, request_key=request_key, is_completed=False
         )
 
         if not _worker_cycle:
@@ -190,29 +541,86 @@ class CycleManager(DatabaseManager):
         _worker_cycle.completed_at = datetime.utcnow()
         _worker_cycle.diff = diff
 
+        try:
+            self._check_diff(_worker_cycle)
+        except ValueError as e:
+            diff_key = _worker_cycle.diff_key
+            self._worker_cycles.db.session.rollback()
+            # Identical diffs share their blob
+            if not self._worker_cycles.query(diff_key=diff_key):
+                blob_store.delete(diff_key)
+            raise InvalidDiffError(f"Invalid diff: {e}")
+
         self._worker_cycles.db.session.commit()
 
-        # Run cycle end task async to we don't block report request
-        # (for prod we probably should be replace this with Redis queue + separate worker)
-        run_task_once("complete_cycle", complete_cycle, self, _worker_cycle.cycle_id)
+        # Queue the cycle end check so we don't block the report request,
+        # the check also folds the new diff into the cycle's running sum.
+        enqueue_complete_cycle(_worker_cycle.cycle_id)
+
+    def _check_diff(self, worker_cycle):
+        """Check a reported diff, so a diff that can't be averaged is refused
+        when it is reported instead of failing the cycle completion.
+
+        The header of an encoded diff is read first, the body is only
+        decompressed once the header matches the model. Syft serialized
+        diffs are deserialized.
+
+        Args:
+            worker_cycle: WorkerCycle instance holding the diff.
+        Raises:
+            ValueError: If the diff doesn't match the model layout, is
+                malformed or its encoding isn't supported.
+        """
+        cycle = self._cycles.first(id=worker_cycle.cycle_id)
+        layout = self._model_layout(cycle.fl_process_id)
+
+        with closing(blob_store.open(worker_cycle.diff_key)) as diff:
+            header = param_encoding.read_header(diff)
+        if header is not None:
+            param_encoding.check_header(header, layout)
+            param_encoding.check(blob_store.view(worker_cycle.diff_key), layout)
+            return
+
+        try:
+            params = model_manager.unserialize_model_params(
+                blob_store.get(worker_cycle.diff_key)
+            )
+        except Exception as e:
+            raise ValueError(f"Can't deserialize the diff: {e}")
+        if ParamLayout.of(params).shapes != layout.shapes:
+            raise ValueError("Diff shapes don't match the params")
+
+    def _model_layout(self, fl_process_id: int):
+        """Layout of the params of a process' model.
+
+        Args:
+            fl_process_id: FL Process ID.
+        Returns:
+            layout: ParamLayout instance.
+        """
+        _model = model_manager.get(fl_process_id=fl_process_id)
+        return model_manager.layout(_model.id)
 
     def complete_cycle(self, cycle_id: int):
         """Checks if the cycle is completed and runs plan avg."""
-        logging.info("running complete_cycle for cycle_id: %s" % cycle_id)
+        logging.debug("running complete_cycle for cycle_id: %s", cycle_id)
         cycle = self._cycles.first(id=cycle_id)
-        logging.info("found cycle: %s" % str(cycle))
+        logging.debug("found cycle: %s", cycle)
 
         if cycle.is_completed:
             logging.info("cycle is already completed!")
+            self._drop_accumulator(cycle_id)
             return
 
         server_config, _ = process_manager.get_configs(id=cycle.fl_process_id)
-        logging.info("server_config: %s" % json.dumps(server_config, indent=2))
+        logging.debug("server_config: %s", server_config)
 
-        received_diffs = len(
-            self._worker_cycles.query(cycle_id=cycle_id, is_completed=True)
+        received_diffs = (
+            self.db.session.query(WorkerCycle.id)
+            .filter_by(cycle_id=cycle_id, is_completed=True)
+            .count()
         )
-        logging.info("# of diffs: %d" % received_diffs)
+        logging.debug("# of diffs: %d", received_diffs)
 
         min_diffs = server_config.get("min_diffs", None)
         max_diffs = server_config.get("max_diffs", None)
@@ -232,10 +640,90 @@ class CycleManager(DatabaseManager):
 
         no_protocol = True  # only deal with plans for now
 
-        logging.info("ready_to_average: %d" % int(ready_to_average))
+        logging.debug("ready_to_average: %s", ready_to_average)
 
         if ready_to_average and no_protocol:
-            self._average_plan_diffs(server_config, cycle)
+            # Completion is triggered by the reports and by the cycle
+            # scheduler, from any server process: only one may average.
+            if not self._claim_completion(cycle_id):
+                logging.info("cycle is being completed by another process!")
+                return
+            try:
+                with metrics.timer(CYCLE_PHASE_SECONDS, phase="total"):
+                    self._average_plan_diffs(server_config, cycle)
+            except Exception:
+                # The retry folds every diff again from the database
+                self._drop_accumulator(cycle_id)
+                self._release_completion(cycle_id)
+                raise
+            self.scheduler.cancel(cycle_id)
+            stats_tracker.record_cycle(
+                cycle.fl_process_id, cycle.assigned_workers or 0, received_diffs
+            )
+        elif hit_time_limit and not has_enough_diffs:
+            # Not enough reports before the deadline: keep the cycle open for
+            # another cycle length instead of leaving it expired forever.
+            self._extend(cycle, server_config.get("cycle_length"))
+        elif self._accumulator(cycle) is not None:
+            # Fold the diffs reported so far, so averaging only costs a division
+            self._collect_diffs(cycle)
+
+    def _claim_completion(self, cycle_id: int) -> bool:
+        """Take the completion lease of a cycle (compare-and-swap on the
+        cycle row), so a cycle is averaged once across server processes.
+
+        Args:
+            cycle_id: Cycle's ID.
+        Returns:
+            result: False if the cycle is completed or being completed.
+        """
+        session = self.db.session
+        now = datetime.now()
+        claimed = (
+            session.query(Cycle)
+            .filter(
+                Cycle.id == cycle_id,
+                Cycle.is_completed == False,
+                (Cycle.completion_lease == None) | (Cycle.completion_lease < now),
+            )
+            .update(
+                {Cycle.completion_lease: now + timedelta(seconds=COMPLETION_LEASE)},
+                synchronize_session=False,
+            )
+        )
+        session.commit()
+        return claimed == 1
+
+    def _release_completion(self, cycle_id: int):
+        session = self.db.session
+        session.rollback()
+        session.query(Cycle).filter_by(id=cycle_id).update(
+            {Cycle.completion_lease: None}, synchronize_session=False
+        )
+        session.commit()
+
+    def _extend(self, cycle, cycle_time: int):
+        """Postpone the end of an expired cycle.
+
+        Args:
+            cycle: Cycle instance.
+            cycle_time: Seconds added from now.
+        """
+        if cycle_time is None:
+            return
+
+        session = self.db.session
+        end = datetime.now() + timedelta(seconds=cycle_time)
+        # Only the first process seeing the expired end time extends it
+        extended = (
+            session.query(Cycle)
+            .filter_by(id=cycle.id, is_completed=False, end=cycle.end)
+            .update({Cycle.end: end}, synchronize_session=False)
+        )
+        session.commit()
+        if extended:
+            logging.info(f"cycle {cycle.id} extended until {end}")
+            self.scheduler.schedule(cycle.id, end)
 
     def _average_plan_diffs(self, server_config: dict, cycle):
         """skeleton code Plan only.
@@ -244,103 +732,313 @@ class CycleManager(DatabaseManager):
         - track how many has reported successfully
         - get diffs: list of (worker_id, diff_from_this_worker) on cycle._diffs
         - check if we have enough diffs? vs. max_worker
-        - if enough diffs => average every param (by turning tensors into python matrices => reduce th.add => torch.div by number of diffs)
+        - if enough diffs => average every param (diffs are summed as they are reported => torch.div by number of diffs)
         - save as new model value => M_prime (save params new values)
         - create new cycle & new checkpoint
         at this point new workers can join because a cycle for a model exists
         """
-        logging.info("start diffs averaging!")
-        logging.info("cycle: %s" % str(cycle))
-        logging.info("fl id: %d" % cycle.fl_process_id)
+        logging.debug("start diffs averaging!")
+        phase_start = time.perf_counter()
+        logging.debug("cycle: %s", cycle)
+        logging.debug("fl id: %d", cycle.fl_process_id)
         _model = model_manager.get(fl_process_id=cycle.fl_process_id)
-        logging.info("model: %s" % str(_model))
+        logging.debug("model: %s", _model)
         model_id = _model.id
-        logging.info("model id: %d" % model_id)
+        logging.debug("model id: %d", model_id)
         _checkpoint = model_manager.load(model_id=model_id)
-        logging.info("current checkpoint: %s" % str(_checkpoint))
-        model_params = model_manager.unserialize_model_params(_checkpoint.value)
-        logging.info("model params shapes: %s" % str([p.shape for p in model_params]))
-
-        reports_to_average = self._worker_cycles.query(
-            cycle_id=cycle.id, is_completed=True
+        logging.debug("current checkpoint: %s", _checkpoint)
+        model_params = model_manager.unserialize_model_params(
+            _checkpoint.value, flat=True
         )
+        logging.debug("model params shapes: %s", model_params.layout.shapes)
+        phase_start = self._phase_done("load_checkpoint", phase_start)
 
-        diffs = [
-            model_manager.unserialize_model_params(report.diff)
-            for report in reports_to_average
-        ]
-
-        avg_plan_rec = process_manager.get_plan(
-            fl_process_id=cycle.fl_process_id, is_avg_plan=True
-        )
+        avg_plan = self._hosted_avg_plan(cycle.fl_process_id)
 
-        if avg_plan_rec and avg_plan_rec.value:
-            logging.info("Doing hosted avg plan")
-            avg_plan = PlanManager.deserialize_plan(avg_plan_rec.value)
+        if avg_plan is not None:
+            logging.debug("Doing hosted avg plan")
 
             # check if the uploaded avg plan is iterative or not
             iterative_plan = server_config.get("iterative_plan", False)
+            # run the plan on chunks of diffs instead of all (or one) at once
+            batch_size = server_config.get("avg_plan_batch_size", None)
 
-            # diffs if list [diff1, diff2, ...] of len == received_diffs
-            # each diff is list [param1, param2, ...] of len == model params
-            # diff_avg is list [param1_avg, param2_avg, ...] of len == model params
-            if iterative_plan:
-                diff_avg = diffs[0]
-                for i, diff in enumerate(diffs[1:]):
-                    diff_avg = avg_plan(
-                        avg=list(diff_avg), item=diff, num=th.tensor([i + 1])
-                    )
+            if batch_size:
+                diff_avg = self._batched_avg(avg_plan, cycle, batch_size)
             else:
-                diff_avg = avg_plan(diffs)
+                reports_to_average = self._worker_cycles.query(
+                    cycle_id=cycle.id, is_completed=True
+                )
+
+                diffs = [
+                    model_manager.unserialize_model_params(report.diff)
+                    for report in reports_to_average
+                ]
+
+                # diffs if list [diff1, diff2, ...] of len == received_diffs
+                # each diff is list [param1, param2, ...] of len == model params
+                # diff_avg is list [param1_avg, param2_avg, ...] of len == model params
+                if iterative_plan:
+                    diff_avg = diffs[0]
+                    for i, diff in enumerate(diffs[1:]):
+                        diff_avg = avg_plan(
+                            avg=list(diff_avg), item=diff, num=th.tensor([i + 1])
+                        )
+                else:
+                    diff_avg = avg_plan(diffs)
 
         else:
             # Fallback to simple hardcoded avg plan
-            logging.info("Doing hardcoded avg plan")
-            raw_diffs = [
-                [diff[model_param] for diff in diffs]
-                for model_param in range(len(model_params))
-            ]
-            # raw_diffs is [param1_diffs, param2_diffs, ...] with len == num of model params
-            # each param1_diffs is [ diff1, diff2, ... ] with len == num of received_diffs
-            # diff_avg going to be [ param1_diffs_avg, param2_diffs_avg, ...] with len == num of model params
-            # where param1_diffs_avg is avg of tensors in param1_diffs
-            logging.info("raw diffs lengths: %s" % str([len(row) for row in raw_diffs]))
-            logging.info("raw diffs lengths: %s" % str([len(row) for row in raw_diffs]))
-            sums = [reduce(th.add, param) for param in raw_diffs]
-            logging.info("sums shapes: %s" % str([sum.shape for sum in sums]))
-            diff_avg = [th.div(param, len(diffs)) for param in sums]
-
-        logging.info("diff_avg shapes: %s" % str([d.shape for d in diff_avg]))
-
-        _updated_model_params = [
-            model_param - diff_param
-            for model_param, diff_param in zip(model_params, diff_avg)
-        ]
+            # The diffs were summed while they were reported,
+            # so averaging only costs a division.
+            logging.debug("Doing hardcoded avg plan")
+            accumulator = self._collect_diffs(cycle)
+            logging.debug("# of accumulated diffs: %d", accumulator.count)
+            diff_avg = accumulator.average()
 
-        logging.info(
-            "_updated_model_params shapes: %s"
-            % str([p.shape for p in _updated_model_params])
-        )
+        # Update the params in place with a single op over the flat buffer
+        if diff_avg is not None:
+            model_params.sub_(diff_avg)
 
-        # make new checkpoint
-        serialized_params = model_manager.serialize_model_params(_updated_model_params)
-        _new_checkpoint = model_manager.save(model_id, serialized_params)
-        logging.info("new checkpoint: %s" % str(_new_checkpoint))
+        phase_start = self._phase_done("average", phase_start)
 
-        # mark current cycle completed
+        # make new checkpoint, committed with the cycle completion: if either
+        # fails, the retried completion starts over from the previous checkpoint
         cycle.is_completed = True
+        serialized_params = model_manager.serialize_model_params(model_params)
+        _new_checkpoint = model_manager.save(
+            model_id,
+            serialized_params,
+            deltas=server_config.get("checkpoint_deltas", None),
+            commit=False,
+            diff=diff_avg,
+        )
         self._cycles.db.session.commit()
-
-        completed_cycles_num = len(
-            self._cycles.query(fl_process_id=cycle.fl_process_id, is_completed=True)
+        model_manager.release_downloads(_new_checkpoint)
+        logging.info("new checkpoint: %s", _new_checkpoint)
+        self._phase_done("save_checkpoint", phase_start)
+        self._drop_accumulator(cycle.id)
+
+        # Drop the expired checkpoints and the averaged diffs in the background
+        retention = model_manager.retention_policy(server_config)
+        if retention.enabled:
+            enqueue_compact_checkpoints(model_id, *retention)
+        enqueue_purge_cycle_diffs(cycle.id)
+
+        completed_cycles_num = self.count(
+            fl_process_id=cycle.fl_process_id, is_completed=True
         )
-        logging.info("completed_cycles_num: %d" % completed_cycles_num)
+        logging.debug("completed_cycles_num: %d", completed_cycles_num)
         max_cycles = server_config.get("num_cycles", 0)
         if completed_cycles_num < max_cycles or max_cycles == 0:
             # make new cycle
             _new_cycle = self.create(
                 cycle.fl_process_id, cycle.version, server_config.get("cycle_length")
             )
-            logging.info("Creating new cycle: %s" % str(_new_cycle))
+            logging.info("Creating new cycle: %s", _new_cycle)
         else:
             logging.info("FL is done!")
+
+    @staticmethod
+    def _phase_done(phase: str, start: float) -> float:
+        """Record the duration of a cycle averaging phase.
+
+        Args:
+            phase: Phase name.
+            start: perf_counter() value at the start of the phase.
+        Returns:
+            now: perf_counter() value, start of the next phase.
+        """
+        now = time.perf_counter()
+        metrics.observe(CYCLE_PHASE_SECONDS, now - start, phase=phase)
+        return now
+
+    def _hosted_avg_plan(self, fl_process_id: int):
+        """Retrieve the avg plan uploaded with the FL process, if any.
+
+        Args:
+            fl_process_id: Federated Learning Process ID.
+        Returns:
+            plan: Deserialized sy.Plan or None if the process has no hosted avg plan.
+        """
+        try:
+            return plans.avg_plan(fl_process_id)
+        except PlanNotFoundError:
+            return None
+
+    def _batched_avg(self, avg_plan, cycle, batch_size: int) -> FlatParams:
+        """Average the cycle diffs running the hosted avg plan on chunks of
+        `batch_size` diffs, then combining the chunk averages weighted by
+        their size.
+
+        Only one chunk of diffs is deserialized at once, and the plan is
+        called once per chunk instead of once per diff.
+
+        Args:
+            avg_plan: Hosted avg plan, receiving a list of diffs and returning their average.
+            cycle: Cycle instance.
+            batch_size: Number of diffs per chunk.
+        Returns:
+            diff_avg: FlatParams with the averaged diff, or None if no diff was reported.
+        """
+        report_ids = [
+            _id
+            for (_id,) in self.db.session.query(WorkerCycle.id)
+            .filter_by(cycle_id=cycle.id, is_completed=True)
+            .order_by(WorkerCycle.id)
+        ]
+
+        diff_avg = None
+        averaged = 0
+        for start in range(0, len(report_ids), batch_size):
+            chunk = [
+                model_manager.unserialize_model_params(
+                    self._worker_cycles.first(id=_id).diff
+                )
+                for _id in report_ids[start : start + batch_size]
+            ]
+            chunk_avg = FlatParams.from_tensors(avg_plan(chunk))
+
+            averaged += len(chunk)
+            if diff_avg is None:
+                diff_avg = chunk_avg
+            else:
+                # Running mean: avg += (chunk_avg - avg) * chunk_size / total
+                diff_avg.lerp_(chunk_avg, len(chunk) / averaged)
+
+        logging.debug("# of diffs averaged in chunks: %d", averaged)
+        return diff_avg
+
+    def _accumulator(self, cycle):
+        """Retrieve the running sum of the cycle diffs.
+
+        Args:
+            cycle: Cycle instance.
+        Returns:
+            accumulator: DiffAccumulator or None if the cycle is averaged by a hosted avg plan.
+        """
+        with self._accumulators_lock:
+            if cycle.id not in self._accumulators:
+                hosted = self._hosted_avg_plan(cycle.fl_process_id) is not None
+                self._accumulators[cycle.id] = (
+                    None
+                    if hosted
+                    else DiffAccumulator(self._model_layout(cycle.fl_process_id))
+                )
+            return self._accumulators[cycle.id]
+
+    def _collect_diffs(self, cycle) -> DiffAccumulator:
+        """Fold the diffs reported since the last call into the running sum.
+
+        Diffs are loaded and folded one at a time, so only a single diff is
+        deserialized at once.
+
+        Args:
+            cycle: Cycle instance.
+        Returns:
+            accumulator: DiffAccumulator holding every completed diff.
+        """
+        reports = (
+            self.db.session.query(WorkerCycle.id, WorkerCycle.diff_checksum)
+            .filter_by(cycle_id=cycle.id, is_completed=True)
+            .all()
+        )
+
+        with self._accumulators_lock:
+            accumulator = self._accumulators.get(cycle.id)
+            if accumulator is None or any(
+                accumulator.is_stale(_id, checksum) for _id, checksum in reports
+            ):
+                # A worker replaced a diff that was already summed, start over.
+                accumulator = self._accumulators[cycle.id] = DiffAccumulator(
+                    self._model_layout(cycle.fl_process_id)
+                )
+
+        missing = [
+            (_id, checksum) for _id, checksum in reports if _id not in accumulator
+        ]
+        logging.debug("# of diffs missing from accumulator: %d", len(missing))
+
+        for worker_cycle_id, checksum in missing:
+            try:
+                diff = self._worker_cycles.first(id=worker_cycle_id).diff
+                if not param_encoding.is_encoded(diff):
+                    diff = model_manager.unserialize_model_params(diff)
+                # Encoded diffs are decoded straight into the running sum
+                accumulator.add(worker_cycle_id, diff, checksum=checksum)
+            except (ValueError, TypeError) as e:
+                # A single bad diff mustn't fail the cycle completion
+                logging.warning(
+                    "Excluding the diff of worker cycle %d: %s", worker_cycle_id, e
+                )
+                self._exclude_report(worker_cycle_id)
+
+        return accumulator
+
+    def _exclude_report(self, worker_cycle_id: int):
+        """Mark a report as not completed, so its diff isn't averaged and the
+        worker may report again.
+
+        Args:
+            worker_cycle_id: WorkerCycle's ID.
+        """
+        self.db.session.query(WorkerCycle).filter_by(id=worker_cycle_id).update(
+            {"is_completed": False}
+        )
+        self.db.session.commit()
+
+    def purge_diffs(self, cycle_id: int) -> int:
+        """Delete the diffs reported to a completed cycle. Their size and
+        checksum are kept on the worker cycles.
+
+        Blobs are deleted once no worker cycle references them, as blobs are
+        shared by identical diffs.
+
+        Args:
+            cycle_id: Cycle's ID.
+        Returns:
+            deleted: Number of worker cycles whose diff was deleted.
+        """
+        session = self.db.session
+        completed = (
+            session.query(Cycle.id).filter_by(id=cycle_id, is_completed=True).scalar()
+        )
+        if completed is None:
+            return 0
+
+        keys = {
+            key
+            for (key,) in session.query(WorkerCycle.diff_key).filter(
+                WorkerCycle.cycle_id == cycle_id, WorkerCycle.diff_key != None
+            )
+        }
+        deleted = (
+            session.query(WorkerCycle)
+            .filter(
+                WorkerCycle.cycle_id == cycle_id,
+                (WorkerCycle.diff_key != None) | (WorkerCycle._diff != None),
+            )
+            .update(
+                {WorkerCycle.diff_key: None, WorkerCycle._diff: None},
+                synchronize_session=False,
+            )
+        )
+        session.commit()
+
+        keys = list(keys)
+        for start in range(0, len(keys), PURGE_BATCH_SIZE):
+            batch = keys[start : start + PURGE_BATCH_SIZE]
+            referenced = {
+                key
+                for (key,) in session.query(WorkerCycle.diff_key)
+                .filter(WorkerCycle.diff_key.in_(batch))
+                .distinct()
+            }
+            for key in batch:
+                if key not in referenced:
+                    blob_store.delete(key)
+        return deleted
+
+    def _drop_accumulator(self, cycle_id: int):
+        with self._accumulators_lock:
+            self._accumulators.pop(cycle_id, None)
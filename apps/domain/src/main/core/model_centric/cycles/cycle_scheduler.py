@@ -0,0 +1,178 @@
+# Standard python imports
+import heapq
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime
+
+
+class CycleScheduler:
+    """Track the end time of the open cycles and trigger their completion
+    once it has passed, so cycles are closed even if no worker reports.
+
+    Deadlines are kept in a heap, a single thread sleeps until the earliest
+    one. Cycles created by other processes are picked up by reloading the
+    open cycles every `refresh_interval` seconds. Every process may fire the
+    same cycle, `on_expire` must be idempotent (cycle completion is claimed
+    in the database, see CycleManager.complete_cycle).
+
+    Args:
+        on_expire: Called with the cycle ID once its end time has passed.
+        loader: Returns the (cycle ID, end time) of every open cycle.
+        refresh_interval: Seconds between reloads of the open cycles.
+        clock: Returns the current unix time.
+    """
+
+    def __init__(
+        self, on_expire, loader=None, refresh_interval: float = 60, clock=None
+    ):
+        self.on_expire = on_expire
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self.clock = clock or time.time
+
+        self._heap = []
+        self._deadlines = {}
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+
+    def schedule(self, cycle_id: int, end):
+        """Track (or update) the end time of a cycle.
+
+        Args:
+            cycle_id: Cycle's ID.
+            end: End time (datetime or unix time), None for cycles without end.
+        """
+        if end is None:
+            self.cancel(cycle_id)
+            return
+        if isinstance(end, datetime):
+            end = end.timestamp()
+
+        with self._condition:
+            if self._deadlines.get(cycle_id) == end:
+                return
+            self._deadlines[cycle_id] = end
+            heapq.heappush(self._heap, (end, cycle_id))
+            if self._heap[0] == (end, cycle_id):
+                self._condition.notify()
+
+    def cancel(self, cycle_id: int):
+        """Stop tracking a cycle.
+
+        Args:
+            cycle_id: Cycle's ID.
+        """
+        with self._condition:
+            # Heap entries are dropped lazily, when they're popped
+            self._deadlines.pop(cycle_id, None)
+
+    def refresh(self):
+        """Replace the tracked cycles by the open cycles returned by the loader."""
+        open_cycles = {
+            cycle_id: end for cycle_id, end in self.loader() if end is not None
+        }
+        with self._condition:
+            for cycle_id in set(self._deadlines) - set(open_cycles):
+                del self._deadlines[cycle_id]
+        for cycle_id, end in open_cycles.items():
+            self.schedule(cycle_id, end)
+
+    def run_pending(self, now: float = None) -> list:
+        """Fire the cycles whose end time has passed.
+
+        Args:
+            now: Unix time.
+        Returns:
+            expired: IDs of the fired cycles.
+        """
+        now = self.clock() if now is None else now
+        expired = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                end, cycle_id = heapq.heappop(self._heap)
+                if self._deadlines.get(cycle_id) == end:
+                    del self._deadlines[cycle_id]
+                    expired.append(cycle_id)
+
+        for cycle_id in expired:
+            try:
+                self.on_expire(cycle_id)
+            except Exception:
+                logging.error(
+                    f"Can't complete expired cycle {cycle_id}: {traceback.format_exc()}"
+                )
+        return expired
+
+    def next_deadline(self):
+        """Earliest tracked end time.
+
+        Returns:
+            deadline: Unix time or None if no cycle is tracked.
+        """
+        with self._condition:
+            while (
+                self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]
+            ):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._deadlines)
+
+    def run_forever(self, app=None):
+        """Fire the expired cycles until `stop` is called.
+
+        Args:
+            app: Flask app, the loader and `on_expire` run inside its
+                application context.
+        """
+        next_refresh = 0
+        while not self._stop.is_set():
+            now = self.clock()
+            try:
+                if self.loader is not None and now >= next_refresh:
+                    next_refresh = now + self.refresh_interval
+                    self._in_context(app, self.refresh)
+                self._in_context(app, self.run_pending)
+            except Exception:
+                logging.error(f"Cycle scheduler failed: {traceback.format_exc()}")
+
+            deadline = self.next_deadline()
+            wake_at = (
+                next_refresh if self.loader is not None else now + self.refresh_interval
+            )
+            if deadline is not None:
+                wake_at = min(wake_at, deadline)
+            with self._condition:
+                # Woken up early when an earlier deadline is scheduled
+                self._condition.wait(max(wake_at - self.clock(), 0))
+
+    def start(self, app=None) -> threading.Thread:
+        """Run the scheduler in a daemon thread.
+
+        Args:
+            app: Flask app (see `run_forever`).
+        Returns:
+            thread: Scheduler thread.
+        """
+        thread = threading.Thread(
+            target=self.run_forever, args=(app,), name="cycle-scheduler"
+        )
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+
+    @staticmethod
+    def _in_context(app, function):
+        if app is None:
+            return function()
+        with app.app_context():
+            return function()
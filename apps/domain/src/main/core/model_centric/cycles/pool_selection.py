@@ -0,0 +1,188 @@
+# Standard python imports
+import threading
+import time
+from typing import NamedTuple
+
+# External imports
+import numpy as np
+from scipy.special import gammaincinv
+
+# Refresh intervals after which the table of an idle cycle is dropped
+IDLE_INTERVALS = 10
+
+
+class RejectionTable(NamedTuple):
+    """Rejection probabilities of a cycle.
+
+    Fields:
+        probabilities (np.ndarray): [workers still needed, time left bucket] -> rejection probability.
+        bucket_seconds (Float): Width of the time left buckets.
+        arrival_rate (Float): Requests per second the table was built for.
+        config (Tuple): (slots, cycle_length, confidence) the table was built for.
+        expires_at (Float): Monotonic time after which the table is rebuilt.
+    """
+
+    probabilities: np.ndarray
+    bucket_seconds: float
+    arrival_rate: float
+    config: tuple
+    expires_at: float
+
+
+class PoolSelector:
+    """Probabilistic worker pool selection ("random" pool_selection).
+
+    Join requests are modeled as a poisson process. With `k` workers still
+    needed and `t` seconds left in the cycle, enough requests arrive with
+    probability `confidence` if the expected number of accepted requests is
+    the smallest `lambda'` such that P(K >= k) = confidence, i.e. the inverse
+    of the regularized lower incomplete gamma function:
+
+        lambda'(k) = gammaincinv(k, confidence)
+
+    so requests are rejected with probability
+    1 - lambda'(k) / (arrival_rate * t), letting workers that would likely be
+    wasted on a full cycle go elsewhere.
+
+    The probabilities of every (k, t) pair are computed at once with numpy
+    for each cycle and refreshed every `refresh_interval` seconds with the
+    observed arrival rate (see StatsTracker), so a join decision is a table
+    lookup and a random draw.
+
+    Args:
+        confidence: Target probability of filling the cycle slots.
+        time_buckets: Number of time left buckets of the tables.
+        refresh_interval: Seconds between table rebuilds.
+        seed: Random generator seed.
+    """
+
+    def __init__(
+        self,
+        confidence: float = 0.95,
+        time_buckets: int = 256,
+        refresh_interval: float = 60,
+        seed: int = None,
+    ):
+        self.confidence = confidence
+        self.time_buckets = time_buckets
+        self.refresh_interval = refresh_interval
+
+        # cycle_id -> RejectionTable
+        self._tables = {}
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def rejection_probability(
+        self,
+        cycle_id: int,
+        workers_needed: int,
+        time_left: float,
+        slots: int,
+        cycle_length: float,
+        arrival_rate: float,
+        now: float = None,
+    ) -> float:
+        """Probability of rejecting a join request.
+
+        Args:
+            cycle_id: Cycle ID.
+            workers_needed: Slots of the cycle still free.
+            time_left: Seconds until the end of the cycle.
+            slots: Total number of slots of the cycle.
+            cycle_length: Cycle length in seconds.
+            arrival_rate: Observed requests per second (None if unknown).
+            now: Monotonic time.
+        Returns:
+            probability: Rejection probability.
+        """
+        if workers_needed <= 0:
+            return 1.0
+        if not arrival_rate:
+            # Nothing to pace the requests against, don't reject
+            return 0.0
+
+        table = self._table(cycle_id, slots, cycle_length, arrival_rate, now)
+
+        k = min(workers_needed, table.probabilities.shape[0] - 1)
+        bucket = min(int(time_left / table.bucket_seconds), self.time_buckets - 1)
+        return float(table.probabilities[k, max(bucket, 0)])
+
+    def admit(self, *args, **kwargs) -> bool:
+        """Draw a join decision, see `rejection_probability` for the arguments.
+
+        Returns:
+            result: True if the worker should be admitted.
+        """
+        probability = self.rejection_probability(*args, **kwargs)
+        with self._lock:
+            return self._rng.random() >= probability
+
+    def forget(self, cycle_id: int):
+        """Drop the state of a finished cycle.
+
+        Args:
+            cycle_id: Cycle ID.
+        """
+        with self._lock:
+            self._tables.pop(cycle_id, None)
+
+    def build_table(
+        self, slots: int, cycle_length: float, arrival_rate: float
+    ) -> np.ndarray:
+        """Compute the rejection probabilities of every (workers needed, time
+        left) pair.
+
+        Args:
+            slots: Total number of slots of the cycle.
+            cycle_length: Cycle length in seconds.
+            arrival_rate: Requests per second.
+        Returns:
+            probabilities: Array of shape (slots + 1, time_buckets).
+        """
+        # Expected requests needed to get k more workers with the target confidence
+        needed = np.zeros(slots + 1)
+        needed[1:] = gammaincinv(np.arange(1, slots + 1), self.confidence)
+
+        # Lower edge of each time bucket, so the estimate errs on accepting
+        bucket_seconds = cycle_length / self.time_buckets
+        time_left = np.arange(self.time_buckets) * bucket_seconds
+        expected = arrival_rate * time_left
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            probabilities = 1 - needed[:, None] / expected[None, :]
+        # No time left (or no arrivals): accept while slots are free
+        probabilities[:, expected == 0] = 0
+        probabilities[0, :] = 1
+        return np.clip(probabilities, 0, 1, out=probabilities)
+
+    def _table(self, cycle_id, slots, cycle_length, arrival_rate, now):
+        now = time.monotonic() if now is None else now
+        config = (slots, cycle_length, self.confidence)
+
+        with self._lock:
+            table = self._tables.get(cycle_id)
+        if table is not None and table.config == config and table.expires_at > now:
+            return table
+
+        table = RejectionTable(
+            probabilities=self.build_table(slots, cycle_length, arrival_rate),
+            bucket_seconds=cycle_length / self.time_buckets,
+            arrival_rate=arrival_rate,
+            config=config,
+            expires_at=now + self.refresh_interval,
+        )
+        with self._lock:
+            if cycle_id not in self._tables:
+                self._evict_idle(now)
+            self._tables[cycle_id] = table
+        return table
+
+    def _evict_idle(self, now):
+        # Drop the tables of cycles without requests for a while (usually finished ones)
+        horizon = now - IDLE_INTERVALS * self.refresh_interval
+        for cycle_id in [
+            cycle_id
+            for cycle_id, table in self._tables.items()
+            if table.expires_at < horizon
+        ]:
+            del self._tables[cycle_id]
@@ -3,6 +3,7 @@ import datetime
 
 # Local imports
 from ...database import BaseModel, db
+from ..blobs import blob_store
 
 
 class WorkerCycle(BaseModel):
@@ -13,9 +14,29 @@ class WorkerCycle(BaseModel):
         cycle_id (Integer, ForeignKey): Cycle Foreign key that owns this worker cycle.
         worker_id (String, ForeignKey): Worker Foreign key that owns this worker cycle.
         request_key (String): unique token that permits downloading specific Plans, Protocols, etc.
+        diff_key (String): Blob store key of the reported diff.
+        diff_size (Integer): Size of the reported diff in bytes.
+        diff_checksum (String): SHA256 of the reported diff.
     """
 
     __tablename__ = "model_centric_worker_cycle"
+    __table_args__ = (
+        # A worker is assigned at most once to each cycle
+        db.Index(
+            "ix_model_centric_worker_cycle_worker_cycle",
+            "worker_id",
+            "cycle_id",
+            unique=True,
+        ),
+        db.Index(
+            "ix_model_centric_worker_cycle_worker_request_key",
+            "worker_id",
+            "request_key",
+        ),
+        db.Index(
+            "ix_model_centric_worker_cycle_cycle_completed", "cycle_id", "is_completed"
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     request_key = db.Column(db.String(2048))
@@ -24,7 +45,29 @@ class WorkerCycle(BaseModel):
     started_at = db.Column(db.DateTime(), default=datetime.datetime.utcnow())
     is_completed = db.Column(db.Boolean(), default=False)
     completed_at = db.Column(db.DateTime())
-    diff = db.Column(db.LargeBinary)
+    # Diffs reported before blob storage was introduced are kept inline.
+    _diff = db.Column("diff", db.LargeBinary)
+    diff_key = db.Column(db.String(255))
+    diff_size = db.Column(db.Integer)
+    diff_checksum = db.Column(db.String(64))
+
+    @property
+    def diff(self):
+        if self.diff_key is None:
+            return self._diff
+        return blob_store.get(self.diff_key)
+
+    @diff.setter
+    def diff(self, value):
+        # Binary uploads are streamed into the blob store
+        if hasattr(value, "read"):
+            blob = blob_store.put_stream(value, namespace="diffs")
+        else:
+            blob = blob_store.put(value, namespace="diffs")
+        self.diff_key = blob.key
+        self.diff_size = blob.size
+        self.diff_checksum = blob.checksum
+        self._diff = None
 
     def __str__(self):
         return f"<WorkerCycle id: {self.id}, cycle: {self.cycle_id}, worker: {self.worker_id}, is_completed: {self.is_completed}>"
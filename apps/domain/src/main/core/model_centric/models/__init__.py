@@ -1,4 +1,13 @@
+import os
+
 from .model_manager import ModelManager
+from .retention import RetentionPolicy
 from ...database import db
 
-model_manager = ModelManager(db)
+model_manager = ModelManager(
+    db,
+    retention=RetentionPolicy(
+        keep_last=int(os.environ.get("MODEL_CENTRIC_CHECKPOINT_KEEP_LAST", 0)),
+        keep_every=int(os.environ.get("MODEL_CENTRIC_CHECKPOINT_KEEP_EVERY", 0)),
+    ),
+)
@@ -3,6 +3,7 @@ import syft as sy
 
 # Local imports
 from ...database import BaseModel, db
+from ..blobs import blob_store
 
 
 class Model(BaseModel):
@@ -12,6 +13,7 @@ class Model(BaseModel):
         id (Int, Primary Key) : Model's id, used to recover stored model.
         version (String) : Model version.
         checkpoints (ModelCheckPoint) : Model Checkpoints. (One to Many relationship)
+        checkpoint_count (Integer) : Number of the newest checkpoint (checkpoints are numbered from 1).
         fl_process_id (Integer, ForeignKey) : FLProcess Foreign Key.
     """
 
@@ -19,7 +21,8 @@ class Model(BaseModel):
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     version = db.Column(db.String(255))
-    checkpoints = db.relationship("ModelCheckPoint", backref="model")
+    checkpoints = db.relationship("ModelCheckPoint", backref="model", lazy="dynamic")
+    checkpoint_count = db.Column(db.Integer)
     fl_process_id = db.Column(
         db.Integer, db.ForeignKey("model_centric_fl_process.id"), unique=True
     )
@@ -33,18 +36,46 @@ class ModelCheckPoint(BaseModel):
 
     Columns:
         id (Integer, Primary Key): Checkpoint ID.
-        value (Binary): Value of the model at a given checkpoint.
+        value (Binary): Value of the model at a given checkpoint (read from the blob store).
+        value_key (String): Blob store key of the checkpoint value.
+        value_size (Integer): Size of the checkpoint value in bytes.
+        value_checksum (String): SHA256 of the checkpoint value.
         model_id (String, Foreign Key): Model's ID.
     """
 
     __tablename__ = "model_centric_model_checkpoint"
+    __table_args__ = (
+        db.Index(
+            "ix_model_centric_model_checkpoint_model_number", "model_id", "number"
+        ),
+        db.Index("ix_model_centric_model_checkpoint_model_alias", "model_id", "alias"),
+        db.Index("ix_model_centric_model_checkpoint_value_key", "value_key"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    value = db.Column(db.LargeBinary)
+    # Checkpoints saved before blob storage was introduced are kept inline.
+    _value = db.Column("value", db.LargeBinary)
+    value_key = db.Column(db.String(255))
+    value_size = db.Column(db.Integer)
+    value_checksum = db.Column(db.String(64))
     number = db.Column(db.Integer)
     alias = db.Column(db.String(255))
     model_id = db.Column(db.Integer, db.ForeignKey("model_centric_model.id"))
 
+    @property
+    def value(self):
+        if self.value_key is None:
+            return self._value
+        return blob_store.get(self.value_key)
+
+    @value.setter
+    def value(self, value):
+        blob = blob_store.put(value, namespace="checkpoints")
+        self.value_key = blob.key
+        self.value_size = blob.size
+        self.value_checksum = blob.checksum
+        self._value = None
+
     @property
     def object(self):
         return sy.serde.deserialize(self.value)
@@ -55,3 +86,54 @@ class ModelCheckPoint(BaseModel):
 
     def __str__(self):
         return f"<CheckPoint id: {self.id}, number: {self.number}, alias: {self.alias}, model_id: {self.model_id}>"
+
+
+class CheckPointDelta(BaseModel):
+    """Difference between a checkpoint and the previous one, sent to the
+    workers that already have the previous checkpoint.
+
+    Columns:
+        id (Integer, Primary Key): Delta ID.
+        model_id (Integer, Foreign Key): Model's ID.
+        base_number (Integer): Number of the checkpoint the delta applies to.
+        number (Integer): Number of the checkpoint the delta produces.
+        encoding (String): Quantization and compression ("<quantization>+<compression>").
+        value (Binary): Encoded delta, see models.param_encoding (read from the blob store).
+        value_key (String): Blob store key of the encoded delta.
+        value_size (Integer): Size of the encoded delta in bytes.
+        value_checksum (String): SHA256 of the encoded delta.
+    """
+
+    __tablename__ = "model_centric_checkpoint_delta"
+    __table_args__ = (
+        db.Index(
+            "ix_model_centric_checkpoint_delta_model_number",
+            "model_id",
+            "number",
+            "base_number",
+        ),
+        db.Index("ix_model_centric_checkpoint_delta_value_key", "value_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    model_id = db.Column(db.Integer, db.ForeignKey("model_centric_model.id"))
+    base_number = db.Column(db.Integer)
+    number = db.Column(db.Integer)
+    encoding = db.Column(db.String(64))
+    value_key = db.Column(db.String(255))
+    value_size = db.Column(db.Integer)
+    value_checksum = db.Column(db.String(64))
+
+    @property
+    def value(self):
+        return blob_store.get(self.value_key)
+
+    @value.setter
+    def value(self, value):
+        blob = blob_store.put(value, namespace="deltas")
+        self.value_key = blob.key
+        self.value_size = blob.size
+        self.value_checksum = blob.checksum
+
+    def __str__(self):
+        return f"<CheckPointDelta id: {self.id}, model_id: {self.model_id}, base_number: {self.base_number}, number: {self.number}, encoding: {self.encoding}>"
@@ -0,0 +1,194 @@
+# Standard python imports
+from typing import NamedTuple
+
+# External imports
+import torch as th
+
+
+class ParamLayout(NamedTuple):
+    """Position of every model param inside a flat buffer.
+
+    Fields:
+        shapes (Tuple): Shape of each param.
+        offsets (Tuple): Index of the first element of each param in the buffer.
+        dtypes (Tuple): Original dtype of each param.
+        numel (Integer): Total number of elements.
+    """
+
+    shapes: tuple
+    offsets: tuple
+    dtypes: tuple
+    numel: int
+
+    @classmethod
+    def of(cls, tensors: list) -> "ParamLayout":
+        """Compute the layout of a list of tensors.
+
+        Args:
+            tensors: List of tensors (one per model param).
+        Returns:
+            layout: ParamLayout instance.
+        """
+        offsets = []
+        numel = 0
+        for tensor in tensors:
+            offsets.append(numel)
+            numel += tensor.numel()
+
+        return cls(
+            shapes=tuple(tuple(tensor.shape) for tensor in tensors),
+            offsets=tuple(offsets),
+            dtypes=tuple(tensor.dtype for tensor in tensors),
+            numel=numel,
+        )
+
+
+class FlatParams:
+    """Model params stored in a single contiguous 1-D buffer.
+
+    Averaging and updating a model are then single tensor ops over the whole
+    buffer instead of one op (and one allocation) per param, which matters
+    for models made of hundreds of small tensors. The per-param tensors are
+    views of the buffer, so they can be serialized without copies.
+
+    Args:
+        buffer: 1-D tensor holding every param.
+        layout: ParamLayout describing the params inside the buffer.
+    """
+
+    def __init__(self, buffer: th.Tensor, layout: ParamLayout):
+        if buffer.numel() != layout.numel:
+            raise ValueError(
+                f"Buffer has {buffer.numel()} elements, layout expects {layout.numel}"
+            )
+        self.buffer = buffer
+        self.layout = layout
+
+    @classmethod
+    def from_tensors(cls, tensors: list, out: "FlatParams" = None) -> "FlatParams":
+        """Flatten a list of tensors.
+
+        Args:
+            tensors: List of tensors (one per model param).
+            out: FlatParams with the same layout to copy the tensors into,
+                reusing its buffer instead of allocating a new one.
+        Returns:
+            params: FlatParams instance.
+        Raises:
+            ValueError: If the tensors don't match the layout of `out`.
+        """
+        if isinstance(tensors, FlatParams):
+            tensors = tensors.tensors()
+
+        layout = ParamLayout.of(tensors)
+        flat = [tensor.reshape(-1) for tensor in tensors]
+
+        if out is None:
+            dtype = th.float32
+            if flat:
+                dtype = flat[0].dtype
+                for tensor in flat[1:]:
+                    dtype = th.promote_types(dtype, tensor.dtype)
+            buffer = th.empty(layout.numel, dtype=dtype)
+            out = cls(buffer, layout)
+        elif layout.shapes != out.layout.shapes:
+            raise ValueError("Params don't match the model layout")
+
+        if flat:
+            th.cat([tensor.to(out.buffer.dtype) for tensor in flat], out=out.buffer)
+        return out
+
+    @classmethod
+    def zeros(cls, layout: ParamLayout) -> "FlatParams":
+        """Allocate float32 params with a given layout, filled with zeros.
+
+        Args:
+            layout: ParamLayout instance.
+        Returns:
+            params: FlatParams instance.
+        """
+        return cls(th.zeros(layout.numel), layout)
+
+    def tensors(self) -> list:
+        """Per-param tensors.
+
+        Returns:
+            tensors: List of tensors, views of the buffer for params that have
+                the buffer dtype.
+        """
+        return [
+            self.buffer.narrow(0, offset, _numel(shape)).view(shape).to(dtype)
+            for shape, offset, dtype in zip(
+                self.layout.shapes, self.layout.offsets, self.layout.dtypes
+            )
+        ]
+
+    def zeros_like(self) -> "FlatParams":
+        """Allocate a FlatParams with the same layout, filled with zeros.
+
+        Returns:
+            params: FlatParams instance.
+        """
+        return FlatParams(th.zeros_like(self.buffer), self.layout)
+
+    def _other_buffer(self, other) -> th.Tensor:
+        if not isinstance(other, FlatParams):
+            other = FlatParams.from_tensors(other)
+        if other.layout.shapes != self.layout.shapes:
+            raise ValueError("Params don't match the model layout")
+        return other.buffer
+
+    def add_(self, other) -> "FlatParams":
+        """In place sum.
+
+        Args:
+            other: FlatParams or list of tensors with the same layout.
+        Returns:
+            self
+        """
+        self.buffer.add_(self._other_buffer(other))
+        return self
+
+    def sub_(self, other) -> "FlatParams":
+        """In place subtraction.
+
+        Args:
+            other: FlatParams or list of tensors with the same layout.
+        Returns:
+            self
+        """
+        self.buffer.sub_(self._other_buffer(other))
+        return self
+
+    def lerp_(self, other, weight: float) -> "FlatParams":
+        """In place linear interpolation: self += (other - self) * weight.
+
+        Args:
+            other: FlatParams or list of tensors with the same layout.
+            weight: Interpolation weight.
+        Returns:
+            self
+        """
+        self.buffer.lerp_(self._other_buffer(other), weight)
+        return self
+
+    def div_(self, value) -> "FlatParams":
+        """In place division by a scalar.
+
+        Args:
+            value: Divisor.
+        Returns:
+            self
+        """
+        self.buffer.div_(value)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.layout.shapes)
+
+
+def _numel(shape: tuple) -> int:
+    numel = 1
+    for size in shape:
+        numel *= size
+    return numel
@@ -1,3 +1,6 @@
+# External imports
+from sqlalchemy import func, select
+
 # PyGrid imports
 # Syft dependencies
 import syft as sy
@@ -10,7 +13,12 @@ from syft.federated.model_serialization import (
 
 from ...exceptions import ModelNotFoundError
 from ...manager.database_manager import DatabaseManager
-from ..models.ai_model import Model, ModelCheckPoint
+from ..blobs import blob_store
+from ..cache import CachedAsset, download_cache
+from ..models.ai_model import CheckPointDelta, Model, ModelCheckPoint
+from . import param_encoding
+from .flat_params import FlatParams, ParamLayout
+from .retention import RetentionPolicy
 
 
 class ModelCheckPointManager(DatabaseManager):
@@ -22,6 +30,15 @@ class ModelCheckPointManager(DatabaseManager):
         self.db = database
 
 
+class CheckPointDeltaManager(DatabaseManager):
+
+    schema = CheckPointDelta
+
+    def __init__(self, database):
+        self._schema = CheckPointDeltaManager.schema
+        self.db = database
+
+
 class _ModelManager(DatabaseManager):
 
     schema = Model
@@ -32,14 +49,24 @@ class _ModelManager(DatabaseManager):
 
 
 class ModelManager(DatabaseManager):
-    def __init__(self, database):
+    # Rows deleted per statement by the compaction
+    COMPACTION_BATCH_SIZE = 500
+    # Default number of checkpoints between two checkpoints sent in full,
+    # when the deltas are quantized
+    LOSSY_DELTAS_FULL_EVERY = 10
+
+    def __init__(self, database, retention: RetentionPolicy = None):
         self.db = database
+        self.retention = retention or RetentionPolicy()
         self._models = _ModelManager(database)
         self._model_checkpoints = ModelCheckPointManager(database)
+        self._deltas = CheckPointDeltaManager(database)
+        # model_id -> ParamLayout
+        self._layouts = {}
 
     def create(self, model, process):
         # Register new model
-        _model_obj = self._models.register(flprocess=process)
+        _model_obj = self._models.register(flprocess=process, checkpoint_count=1)
 
         # Save model initial weights into ModelCheckpoint
         self._model_checkpoints.register(
@@ -48,38 +75,332 @@ class ModelManager(DatabaseManager):
 
         return _model_obj
 
-    def save(self, model_id: int, data: bytes):
+    def save(
+        self,
+        model_id: int,
+        data: bytes,
+        deltas=None,
+        commit: bool = True,
+        diff: FlatParams = None,
+    ):
         """Create a new model checkpoint.
 
         Args:
             model_id: Model ID.
             data: Model data.
+            deltas: "checkpoint_deltas" server config. If set, the delta from
+                the previous checkpoint is stored too (see `save_delta`).
+            commit: If False the checkpoint is only flushed, the caller
+                commits it with its own changes and then calls `release_downloads`.
+            diff: Params of the previous checkpoint minus `data`, if known.
         Returns:
             model_checkpoint: ModelCheckpoint instance.
         """
-
-        checkpoints_count = len(self._model_checkpoints.query(model_id=model_id))
+        session = self.db.session
+        number = self._next_checkpoint_number(model_id)
 
         # Reset "latest" alias
-        self._model_checkpoints.modify(
-            {"model_id": model_id, "alias": "latest"}, {"alias": ""}
-        )
+        session.query(ModelCheckPoint).filter_by(
+            model_id=model_id, alias="latest"
+        ).update({"alias": ""})
 
         # Create new checkpoint
-        new_checkpoint = self._model_checkpoints.register(
-            model_id=model_id, value=data, number=checkpoints_count + 1, alias="latest"
+        new_checkpoint = ModelCheckPoint(
+            model_id=model_id, value=data, number=number, alias="latest"
         )
+        session.add(new_checkpoint)
+
+        if deltas and number > 1 and not self._sent_in_full(number, deltas):
+            previous = self._model_checkpoints.first(
+                defer_binary=True, model_id=model_id, number=number - 1
+            )
+            if previous is not None:
+                self.save_delta(
+                    previous, new_checkpoint, deltas, commit=False, diff=diff
+                )
+
+        if not commit:
+            session.flush()
+            return new_checkpoint
+
+        session.commit()
+        self.release_downloads(new_checkpoint)
         return new_checkpoint
 
+    def layout(self, model_id: int) -> ParamLayout:
+        """Layout of the params of a model, reported diffs have to match it.
+
+        The params keep their shapes across checkpoints, so the layout is
+        only read once per model, from its latest checkpoint.
+
+        Args:
+            model_id: Model ID.
+        Returns:
+            layout: ParamLayout instance.
+        """
+        layout = self._layouts.get(model_id)
+        if layout is None:
+            checkpoint = self.load(model_id=model_id)
+            params = self.unserialize_model_params(checkpoint.value, flat=True)
+            layout = self._layouts[model_id] = params.layout
+        return layout
+
+    def release_downloads(self, checkpoint):
+        """Release the cached downloads of the checkpoints older than a new
+        committed checkpoint.
+
+        Args:
+            checkpoint: ModelCheckPoint instance.
+        """
+        download_cache.invalidate_model(
+            checkpoint.model_id, keep_number=checkpoint.number
+        )
+
+    def _next_checkpoint_number(self, model_id: int) -> int:
+        """Increment the checkpoint counter of a model.
+
+        The counter is incremented by a single UPDATE, which locks the model
+        row until the new checkpoint is committed, so concurrent saves get
+        distinct numbers. Models created before the counter existed start
+        from their highest checkpoint number.
+
+        Args:
+            model_id: Model ID.
+        Returns:
+            number: Number of the new checkpoint.
+        """
+        models = Model.__table__
+        checkpoints = ModelCheckPoint.__table__
+        highest_number = (
+            select([func.coalesce(func.max(checkpoints.c.number), 0)])
+            .where(checkpoints.c.model_id == model_id)
+            .as_scalar()
+        )
+        self.db.session.execute(
+            models.update()
+            .where(models.c.id == model_id)
+            .values(
+                checkpoint_count=func.coalesce(
+                    models.c.checkpoint_count, highest_number
+                )
+                + 1
+            )
+        )
+        return (
+            self.db.session.query(Model.checkpoint_count)
+            .filter(Model.id == model_id)
+            .scalar()
+        )
+
+    def retention_policy(self, server_config: dict) -> RetentionPolicy:
+        """Retention policy of a FL process.
+
+        Args:
+            server_config: FL Process Server Config, "checkpoint_retention"
+                overrides the default policy.
+        Returns:
+            policy: RetentionPolicy instance.
+        """
+        return RetentionPolicy.from_config(
+            server_config.get("checkpoint_retention", None), default=self.retention
+        )
+
+    def compact(self, model_id: int, policy: RetentionPolicy = None) -> int:
+        """Delete the checkpoints expired by a retention policy, and the
+        deltas that can't be served anymore (only deltas to the newest
+        checkpoint are sent to the workers).
+
+        Only the numbers, aliases and blob keys of the checkpoints are read.
+        Blobs are deleted once no remaining row references them, as blobs
+        are shared by identical values.
+
+        Args:
+            model_id: Model ID.
+            policy: RetentionPolicy instance (default: the manager's policy).
+        Returns:
+            deleted: Number of deleted checkpoints.
+        """
+        policy = policy or self.retention
+        session = self.db.session
+
+        checkpoints = (
+            session.query(
+                ModelCheckPoint.id,
+                ModelCheckPoint.number,
+                ModelCheckPoint.alias,
+                ModelCheckPoint.value_key,
+            )
+            .filter(ModelCheckPoint.model_id == model_id)
+            .all()
+        )
+        if not checkpoints:
+            return 0
+
+        latest_number = max(checkpoint.number for checkpoint in checkpoints)
+        expired = policy.expired(checkpoints, latest_number)
+        stale_deltas = (
+            session.query(CheckPointDelta.id, CheckPointDelta.value_key)
+            .filter(
+                CheckPointDelta.model_id == model_id,
+                CheckPointDelta.number < latest_number,
+            )
+            .all()
+        )
+
+        self._delete_rows(ModelCheckPoint, [row.id for row in expired])
+        self._delete_rows(CheckPointDelta, [row.id for row in stale_deltas])
+        session.commit()
+
+        self._delete_orphan_blobs(ModelCheckPoint, {row.value_key for row in expired})
+        self._delete_orphan_blobs(
+            CheckPointDelta, {row.value_key for row in stale_deltas}
+        )
+        return len(expired)
+
+    def _delete_rows(self, schema, ids):
+        for start in range(0, len(ids), self.COMPACTION_BATCH_SIZE):
+            batch = ids[start : start + self.COMPACTION_BATCH_SIZE]
+            self.db.session.query(schema).filter(schema.id.in_(batch)).delete(
+                synchronize_session=False
+            )
+
+    def _delete_orphan_blobs(self, schema, keys):
+        keys = [key for key in keys if key is not None]
+        for start in range(0, len(keys), self.COMPACTION_BATCH_SIZE):
+            batch = keys[start : start + self.COMPACTION_BATCH_SIZE]
+            referenced = {
+                key
+                for (key,) in self.db.session.query(schema.value_key)
+                .filter(schema.value_key.in_(batch))
+                .distinct()
+            }
+            for key in batch:
+                if key not in referenced:
+                    blob_store.delete(key)
+
+    def _sent_in_full(self, number: int, config) -> bool:
+        """Check if a checkpoint is stored without delta.
+
+        Quantized deltas are lossy: a worker applying them one after another
+        drifts away from the server's checkpoints. Every `full_every`-th
+        checkpoint has no delta, so these workers download it in full and
+        the drift is bounded.
+
+        Args:
+            number: Checkpoint number.
+            config: "checkpoint_deltas" server config (see `save_delta`).
+        Returns:
+            result: Boolean flag.
+        """
+        config = config if isinstance(config, dict) else {}
+        lossy = config.get("quantization", "fp32") != "fp32"
+        full_every = config.get(
+            "full_every", self.LOSSY_DELTAS_FULL_EVERY if lossy else 0
+        )
+        return bool(full_every) and number % full_every == 0
+
+    def save_delta(
+        self,
+        base,
+        checkpoint,
+        config=True,
+        commit: bool = True,
+        diff: FlatParams = None,
+    ):
+        """Store the difference between two checkpoints, so workers holding
+        `base` download the (much smaller) delta instead of `checkpoint`.
+
+        Args:
+            base: ModelCheckPoint instance the delta applies to.
+            checkpoint: ModelCheckPoint instance the delta produces.
+            config: True for the defaults (lossless, zlib) or a dictionary with
+                "quantization" ("fp32", "fp16" or "int8"), "compression"
+                ("none", "zlib" or "zstd") and "full_every" (see
+                `_sent_in_full`, 10 by default for quantized deltas).
+                Quantized deltas are lossy.
+            commit: If False the delta is only added to the session.
+            diff: `base` params minus `checkpoint` params, e.g. the averaged
+                diff of the cycle. Both checkpoints are deserialized if None.
+        Returns:
+            delta: CheckPointDelta instance.
+        """
+        config = config if isinstance(config, dict) else {}
+        quantization = config.get("quantization", "fp32")
+        compression = config.get("compression", "zlib")
+
+        if diff is not None:
+            if not isinstance(diff, FlatParams):
+                diff = FlatParams.from_tensors(diff)
+            params = FlatParams(diff.buffer.neg(), diff.layout)
+        else:
+            params = self.unserialize_model_params(checkpoint.value, flat=True)
+            params.sub_(self.unserialize_model_params(base.value, flat=True))
+        value = param_encoding.encode(params, quantization, compression)
+
+        delta = CheckPointDelta(
+            model_id=checkpoint.model_id,
+            base_number=base.number,
+            number=checkpoint.number,
+            encoding=f"{quantization}+{compression}",
+            value=value,
+        )
+        self.db.session.add(delta)
+        if commit:
+            self.db.session.commit()
+        return delta
+
+    def load_delta(self, checkpoint, base_number: int):
+        """Find the delta from a worker's checkpoint to `checkpoint`.
+
+        Args:
+            checkpoint: ModelCheckPoint instance the worker wants.
+            base_number: Checkpoint number the worker holds.
+        Returns:
+            delta: CheckPointDelta instance or None if there's no such delta.
+        """
+        return self._deltas.first(
+            model_id=checkpoint.model_id,
+            number=checkpoint.number,
+            base_number=base_number,
+        )
+
+    def download_delta(self, delta) -> CachedAsset:
+        """Retrieve an encoded delta from the download cache.
+
+        Args:
+            delta: CheckPointDelta instance.
+        Returns:
+            asset: CachedAsset with the encoded delta and its ETag.
+        """
+        return download_cache.delta(
+            delta.model_id, delta.number, lambda: (delta.value, delta.value_checksum)
+        )
+
     def load(self, **kwargs):
-        """Load model's Checkpoint."""
-        _check_point = self._model_checkpoints.last(**kwargs)
+        """Load model's Checkpoint, its value is only read from the blob store
+        when accessed."""
+        _check_point = self._model_checkpoints.latest(**kwargs)
 
         if not _check_point:
             raise ModelNotFoundError
 
         return _check_point
 
+    def download(self, checkpoint) -> CachedAsset:
+        """Retrieve the checkpoint value from the download cache, the blob is
+        only read on cache miss.
+
+        Args:
+            checkpoint: ModelCheckPoint instance.
+        Returns:
+            asset: CachedAsset with the checkpoint value and its ETag.
+        """
+        return download_cache.checkpoint(
+            checkpoint.model_id,
+            checkpoint.number,
+            lambda: (checkpoint.value, checkpoint.value_checksum),
+        )
+
     def get(self, **kwargs):
         """Retrieve the model instance object.
 
@@ -90,7 +411,7 @@ class ModelManager(DatabaseManager):
         Raises:
             ModelNotFoundError (PyGridError) : If model not found.
         """
-        _model = self._models.last(**kwargs)
+        _model = self._models.latest(**kwargs)
 
         if not _model:
             raise ModelNotFoundError
@@ -99,14 +420,23 @@ class ModelManager(DatabaseManager):
 
     @staticmethod
     def serialize_model_params(params):
-        """Serializes list of tensors into State/protobuf."""
+        """Serializes list of tensors (or FlatParams) into State/protobuf."""
+        if isinstance(params, FlatParams):
+            params = params.tensors()
         pb = serialize(wrap_model_params(params))
         serialized_params = pb.SerializeToString()
         return serialized_params
 
     @staticmethod
-    def unserialize_model_params(bin: bytes):
+    def unserialize_model_params(bin: bytes, flat: bool = False):
         """Unserializes model or checkpoint or diff stored in db to list of
-        tensors."""
+        tensors, or to a single FlatParams buffer if `flat` is set.
+
+        Diffs encoded by the workers (see param_encoding) are decoded too."""
+        if param_encoding.is_encoded(bin):
+            params = param_encoding.decode(bin)
+            return params if flat else params.tensors()
         params = deserialize_model_params(bin)
+        if flat:
+            return FlatParams.from_tensors(params)
         return params
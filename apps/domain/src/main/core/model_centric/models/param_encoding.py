@@ -0,0 +1,389 @@
+"""Compact binary encoding of flat model params (checkpoint deltas and
+worker diffs).
+
+Layout of an encoded payload::
+
+    [b"PGP1"][>I header length][JSON header][body]
+
+The header describes the body:
+    - shapes: shape of every param, in order.
+    - quantization: "fp32", "fp16" or "int8" (symmetric, one float scale per
+      param listed in "scales": value = int8 * scale).
+    - compression: "none", "zlib" or "zstd" (applied to the whole body).
+    - nnz: only for sparse (top-k) payloads, number of values sent.
+
+The body holds the little-endian values of every param, concatenated. Sparse
+payloads hold `nnz` uint32 indices into the concatenated params followed by
+their `nnz` values; the other values are zero.
+"""
+# Standard python imports
+import json
+import math
+import struct
+import zlib
+
+# External imports
+import numpy as np
+import torch as th
+
+from .flat_params import FlatParams, ParamLayout
+
+MAGIC = b"PGP1"
+QUANTIZATIONS = ("fp32", "fp16", "int8")
+COMPRESSIONS = ("none", "zlib", "zstd")
+
+_DTYPES = {"fp32": "<f4", "fp16": "<f2", "int8": "i1"}
+_INDEX_DTYPE = "<u4"
+
+# Values converted to float32 at once when decoding
+DECODE_CHUNK_SIZE = 1024 * 1024
+# Largest JSON header accepted
+MAX_HEADER_SIZE = 16 * 1024 * 1024
+
+
+def encode(
+    params: FlatParams,
+    quantization: str = "fp32",
+    compression: str = "zlib",
+    top_k=None,
+) -> bytes:
+    """Encode flat params.
+
+    Args:
+        params: FlatParams instance.
+        quantization: Values precision (see QUANTIZATIONS).
+        compression: Body compression (see COMPRESSIONS).
+        top_k: Only send the k largest values (in magnitude). A float below 1
+            is a fraction of the params, an integer a number of values.
+    Returns:
+        payload: Encoded params.
+    Raises:
+        ValueError: If the quantization or compression isn't supported.
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported quantization: {quantization}")
+
+    layout = params.layout
+    values = params.buffer.detach().to(th.float32).cpu().numpy()
+    header = {
+        "shapes": [list(shape) for shape in layout.shapes],
+        "quantization": quantization,
+        "compression": compression,
+    }
+
+    indices = None
+    if top_k is not None:
+        k = int(round(top_k * layout.numel)) if top_k < 1 else int(top_k)
+        k = min(max(k, 1), layout.numel)
+        top = th.topk(th.from_numpy(values).abs(), k, sorted=False).indices
+        indices = np.sort(top.numpy()).astype(_INDEX_DTYPE)
+        header["nnz"] = k
+
+    if quantization == "int8":
+        # One scale per param, from its largest magnitude
+        scales = np.ones(len(layout.offsets), dtype=np.float32)
+        for i, (start, end) in enumerate(_spans(layout)):
+            if end > start:
+                scales[i] = float(np.abs(values[start:end]).max()) / 127 or 1.0
+        header["scales"] = scales.tolist()
+
+        if indices is None:
+            element_scales = np.repeat(
+                scales, np.diff(layout.offsets + (layout.numel,))
+            )
+        else:
+            values = values[indices]
+            element_scales = scales[_param_index(layout, indices)]
+        body = np.clip(np.rint(values / element_scales), -127, 127).astype(np.int8)
+    else:
+        if indices is not None:
+            values = values[indices]
+        body = values.astype(_DTYPES[quantization], copy=False)
+
+    body = body.tobytes() if indices is None else indices.tobytes() + body.tobytes()
+    header = json.dumps(header).encode()
+    return (
+        MAGIC + struct.pack(">I", len(header)) + header + _compress(body, compression)
+    )
+
+
+def is_encoded(payload) -> bool:
+    """Check if a payload was encoded by `encode` (as opposed to syft
+    serialized params).
+
+    Args:
+        payload: Bytes-like object.
+    Returns:
+        result: Boolean flag.
+    """
+    return bytes(memoryview(payload)[: len(MAGIC)]) == MAGIC
+
+
+def read_header(stream) -> dict:
+    """Read the header of an encoded payload, without reading its body.
+
+    Args:
+        stream: Binary file-like object positioned at the start of the payload.
+    Returns:
+        header: Header dictionary, or None if the payload isn't encoded.
+    Raises:
+        ValueError: If the header is malformed.
+    """
+    prefix = stream.read(len(MAGIC) + 4)
+    if prefix[: len(MAGIC)] != MAGIC:
+        return None
+    if len(prefix) < len(MAGIC) + 4:
+        raise ValueError("Truncated payload header")
+    (header_length,) = struct.unpack(">I", prefix[len(MAGIC) :])
+    return _parse_header(_read_header_bytes(stream.read, header_length))
+
+
+def check_header(header: dict, layout: ParamLayout) -> int:
+    """Check that a payload header describes params with a given layout and
+    that the payload can be decoded here.
+
+    Args:
+        header: Header dictionary (see `read_header`).
+        layout: ParamLayout of the model.
+    Returns:
+        size: Size of the decompressed body.
+    Raises:
+        ValueError: If the header doesn't match the layout, or its compression
+            isn't available.
+    """
+    if [tuple(shape) for shape in header["shapes"]] != list(layout.shapes):
+        raise ValueError("Payload shapes don't match the params")
+    if header["compression"] == "zstd":
+        try:
+            _zstd()
+        except ImportError:
+            raise ValueError("zstd compression isn't available on this server")
+
+    scales = header.get("scales")
+    if header["quantization"] == "int8":
+        if not isinstance(scales, list) or len(scales) != len(layout.shapes):
+            raise ValueError("Payload scales don't match the params")
+        if not all(
+            isinstance(scale, (int, float))
+            and not isinstance(scale, bool)
+            and math.isfinite(scale)
+            for scale in scales
+        ):
+            raise ValueError("Payload scales must be finite numbers")
+
+    itemsize = np.dtype(_DTYPES[header["quantization"]]).itemsize
+    if "nnz" not in header:
+        return layout.numel * itemsize
+    nnz = header["nnz"]
+    if not isinstance(nnz, int) or not 0 <= nnz <= layout.numel:
+        raise ValueError("Invalid number of payload values")
+    return nnz * (np.dtype(_INDEX_DTYPE).itemsize + itemsize)
+
+
+def check(payload, layout: ParamLayout):
+    """Check that a payload can be added to params with a given layout,
+    without converting its values.
+
+    The body is decompressed (bounded by the expected size) and its size
+    and sparse indices are checked.
+
+    Args:
+        payload: Encoded params.
+        layout: ParamLayout of the model.
+    Raises:
+        ValueError: If the payload is malformed or doesn't match the layout.
+    """
+    _body(payload, layout)
+
+
+def zeros(payload) -> FlatParams:
+    """Create zeroed params with the layout of an encoded payload.
+
+    Only for trusted payloads: the allocated size is read from the header.
+
+    Args:
+        payload: Encoded params.
+    Returns:
+        params: FlatParams instance (float32).
+    """
+    header, _ = _parse(payload)
+    tensors = [th.zeros(shape) for shape in header["shapes"]]
+    return FlatParams.from_tensors(tensors)
+
+
+def add_into(payload, out: FlatParams) -> FlatParams:
+    """Add encoded params to `out`, in place.
+
+    Values are converted to float32 a chunk at a time (or only the sent
+    values of sparse payloads), so no dense float32 copy of the payload is
+    made.
+
+    Args:
+        payload: Encoded params.
+        out: FlatParams with the layout of the payload.
+    Returns:
+        out: The updated FlatParams.
+    Raises:
+        ValueError: If the payload is malformed or doesn't match the layout of `out`.
+    """
+    layout = out.layout
+    header, body = _body(payload, layout)
+    dtype = np.dtype(_DTYPES[header["quantization"]])
+    scales = header.get("scales")
+
+    if "nnz" in header:
+        nnz = header["nnz"]
+        index_size = np.dtype(_INDEX_DTYPE).itemsize
+        indices = np.frombuffer(body, dtype=_INDEX_DTYPE, count=nnz)
+        values = np.frombuffer(
+            body, dtype=dtype, count=nnz, offset=nnz * index_size
+        ).astype(np.float32)
+        if scales is not None:
+            values *= np.asarray(scales, dtype=np.float32)[
+                _param_index(layout, indices)
+            ]
+        out.buffer.index_add_(
+            0, th.from_numpy(indices.astype(np.int64)), th.from_numpy(values)
+        )
+        return out
+
+    values = np.frombuffer(body, dtype=dtype)
+    for i, (start, end) in enumerate(_spans(layout)):
+        scale = scales[i] if scales is not None else 1
+        for chunk_start in range(start, end, DECODE_CHUNK_SIZE):
+            chunk_end = min(chunk_start + DECODE_CHUNK_SIZE, end)
+            chunk = values[chunk_start:chunk_end].astype(np.float32)
+            out.buffer[chunk_start:chunk_end].add_(th.from_numpy(chunk), alpha=scale)
+    return out
+
+
+def decode(payload) -> FlatParams:
+    """Decode params encoded by `encode`.
+
+    Args:
+        payload: Encoded params.
+    Returns:
+        params: FlatParams instance (float32).
+    Raises:
+        ValueError: If the payload is malformed.
+    """
+    return add_into(payload, zeros(payload))
+
+
+def _body(payload, layout: ParamLayout):
+    # Checked header and decompressed body
+    header, body = _parse(payload)
+    # The body is never decompressed past the size expected from the layout
+    size = check_header(header, layout)
+    body = _decompress(body, header["compression"], size)
+    if len(body) != size:
+        raise ValueError("Payload size doesn't match its header")
+
+    nnz = header.get("nnz")
+    if nnz:
+        indices = np.frombuffer(body, dtype=_INDEX_DTYPE, count=nnz)
+        if indices.max() >= layout.numel:
+            raise ValueError("Payload index out of range")
+    return header, body
+
+
+def _parse(payload):
+    # Header and compressed body
+    payload = memoryview(payload)
+    prefix_length = len(MAGIC) + 4
+    if bytes(payload[: len(MAGIC)]) != MAGIC or len(payload) < prefix_length:
+        raise ValueError("Not an encoded params payload")
+
+    (header_length,) = struct.unpack(">I", payload[len(MAGIC) : prefix_length])
+    header_end = prefix_length + header_length
+    header = _parse_header(
+        _read_header_bytes(
+            lambda size: bytes(payload[prefix_length : prefix_length + size]),
+            header_length,
+        )
+    )
+    return header, payload[header_end:]
+
+
+def _read_header_bytes(read, header_length: int) -> bytes:
+    if header_length > MAX_HEADER_SIZE:
+        raise ValueError("Payload header is too large")
+    data = read(header_length)
+    if len(data) != header_length:
+        raise ValueError("Truncated payload header")
+    return data
+
+
+def _parse_header(data: bytes) -> dict:
+    try:
+        header = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Malformed payload header")
+    if not isinstance(header, dict):
+        raise ValueError("Malformed payload header")
+
+    if header.get("quantization") not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported quantization: {header.get('quantization')}")
+    if header.get("compression") not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {header.get('compression')}")
+    shapes = header.get("shapes")
+    if not isinstance(shapes, list) or not all(
+        isinstance(shape, list)
+        and all(isinstance(dim, int) and dim >= 0 for dim in shape)
+        for shape in shapes
+    ):
+        raise ValueError("Malformed payload shapes")
+    return header
+
+
+def _spans(layout: ParamLayout):
+    ends = layout.offsets[1:] + (layout.numel,)
+    return zip(layout.offsets, ends)
+
+
+def _param_index(layout: ParamLayout, indices: np.ndarray) -> np.ndarray:
+    # Index of the param holding each flat index
+    return np.searchsorted(np.asarray(layout.offsets), indices, side="right") - 1
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "none":
+        return data
+    if compression == "zlib":
+        return zlib.compress(data)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor().compress(data)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def _decompress(data, compression: str, max_size: int):
+    # Decompressed bodies larger than max_size are truncated to max_size + 1
+    # bytes, so their size check fails without inflating them whole.
+    if compression == "none":
+        return data
+    if compression == "zlib":
+        decompressor = zlib.decompressobj()
+        try:
+            return decompressor.decompress(data, max_size + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid zlib payload: {e}")
+    if compression == "zstd":
+        zstandard = _zstd()
+        try:
+            # Frames announcing their size are decompressed at once, check it
+            # first. The other frames are bounded by max_output_size.
+            if zstandard.frame_content_size(data) > max_size:
+                raise ValueError("Payload size doesn't match its header")
+            return zstandard.ZstdDecompressor().decompress(
+                data, max_output_size=max_size + 1
+            )
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Invalid zstd payload: {e}")
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def _zstd():
+    # zstandard is only required when zstd compression is used
+    import zstandard
+
+    return zstandard
@@ -0,0 +1,61 @@
+# Standard python imports
+from typing import Iterable, List, NamedTuple, Optional
+
+
+class RetentionPolicy(NamedTuple):
+    """Checkpoints kept by the compaction of a model's history.
+
+    A checkpoint is kept if it's one of the `keep_last` newest checkpoints,
+    if its number is a multiple of `keep_every` or if it has an alias
+    ("latest" or a named alias). The newest checkpoint is always kept.
+
+    Args:
+        keep_last: Number of newest checkpoints kept (0: keep everything).
+        keep_every: Keep every Kth checkpoint (0: disabled).
+    """
+
+    keep_last: int = 0
+    keep_every: int = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[dict], default=None):
+        """Read the "checkpoint_retention" server config.
+
+        Args:
+            config: Dictionary with "keep_last" and "keep_every" (both
+                optional), negative values are read as 0.
+            default: RetentionPolicy used for the missing values.
+        Returns:
+            policy: RetentionPolicy instance.
+        """
+        default = default or cls()
+        config = config or {}
+        return cls(
+            keep_last=max(int(config.get("keep_last", default.keep_last) or 0), 0),
+            keep_every=max(int(config.get("keep_every", default.keep_every) or 0), 0),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep_last > 0
+
+    def expired(self, checkpoints: Iterable, latest_number: int) -> List:
+        """Select the checkpoints to delete.
+
+        Args:
+            checkpoints: Rows with `number` and `alias` attributes.
+            latest_number: Number of the newest checkpoint.
+        Returns:
+            expired: Rows not kept by the policy.
+        """
+        if not self.enabled:
+            return []
+
+        oldest_kept = latest_number - self.keep_last + 1
+        return [
+            checkpoint
+            for checkpoint in checkpoints
+            if checkpoint.number < oldest_kept
+            and not checkpoint.alias
+            and not (self.keep_every and checkpoint.number % self.keep_every == 0)
+        ]
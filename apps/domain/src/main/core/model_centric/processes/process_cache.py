@@ -0,0 +1,85 @@
+# Standard python imports
+import threading
+import time
+from typing import NamedTuple
+
+
+class ProcessDescriptor(NamedTuple):
+    """Everything a cycle request needs to know about a FL process.
+
+    Fields:
+        id (Integer): FL Process ID.
+        name (String): FL Process name.
+        version (String): FL Process version.
+        server_config (Dict): Server configs.
+        client_config (Dict): Client configs.
+        plans (Dict): Client plan names mapped to their IDs.
+        protocols (Dict): Protocol names mapped to their IDs.
+        model_id (Integer): ID of the model trained by this process.
+    """
+
+    id: int
+    name: str
+    version: str
+    server_config: dict
+    client_config: dict
+    plans: dict
+    protocols: dict
+    model_id: int
+
+
+class ProcessCache:
+    """FL process descriptors keyed by (name, version), where a None version
+    stands for the newest version of the process.
+
+    Processes are immutable once hosted, so entries are only dropped when a
+    process with the same name is created or deleted. The TTL bounds how
+    long processes created by other server processes can go unnoticed.
+    Processes still being created (no model yet) aren't cached.
+
+    Args:
+        ttl: Seconds an entry stays valid.
+    """
+
+    def __init__(self, ttl: float = 30):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: str, loader) -> ProcessDescriptor:
+        """Retrieve a descriptor, loading it on cache misses.
+
+        Args:
+            name: FL Process name.
+            version: FL Process version or None for the newest one.
+            loader: Function returning the ProcessDescriptor.
+        Returns:
+            descriptor: ProcessDescriptor instance.
+        """
+        key = (name, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+        descriptor = loader()
+        if descriptor.model_id is None:
+            return descriptor
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, descriptor)
+        return descriptor
+
+    def invalidate(self, name: str = None):
+        """Drop cached descriptors.
+
+        Args:
+            name: FL Process name (default: every process).
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
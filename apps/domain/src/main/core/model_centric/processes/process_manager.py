@@ -1,4 +1,6 @@
 # Processes module imports
+import os
+
 from ...exceptions import (
     FLProcessConflict,
     PlanNotFoundError,
@@ -9,9 +11,14 @@ from ...exceptions import (
 # PyGrid imports
 from ...manager.database_manager import DatabaseManager
 
+from ..models.ai_model import Model
+from ..stats import stats_tracker
 from ..syft_assets import plans, protocols
+from ..syft_assets.plan import Plan
+from ..syft_assets.protocol import Protocol
 from .config import Config
 from .fl_process import FLProcess
+from .process_cache import ProcessCache, ProcessDescriptor
 
 
 class ConfigManager(DatabaseManager):
@@ -40,6 +47,9 @@ class ProcessManager(DatabaseManager):
 
         self._configs = ConfigManager(database)
         self._processes = FLProcessManager(database)
+        self._descriptors = ProcessCache(
+            ttl=float(os.environ.get("MODEL_CENTRIC_PROCESS_CACHE_TTL", 30))
+        )
 
     def create(
         self,
@@ -77,7 +87,9 @@ class ProcessManager(DatabaseManager):
         protocols.register(fl_process, client_protocols)
 
         # Register Server avg plan
+        # (drop any cached plan of a deleted process that had the same ID)
         plans.register(fl_process, server_avg_plan, avg_plan=True)
+        plans.invalidate_avg_plan(fl_process.id)
 
         # Register client plans
         plans.register(fl_process, client_plans, avg_plan=False)
@@ -92,8 +104,70 @@ class ProcessManager(DatabaseManager):
             client_flprocess_config=fl_process,
         )
 
+        # The newest version of this process changed
+        self._descriptors.invalidate(name)
+
         return fl_process
 
+    def descriptor(self, name: str, version: str = None) -> ProcessDescriptor:
+        """Retrieve the cached descriptor (configs, plans, protocols and model)
+        of a FL process, so serving cycle requests doesn't hit the database
+        for data that doesn't change once the process is hosted.
+
+        Args:
+            name: FL Process name.
+            version: FL Process version (default: newest version).
+        Returns:
+            descriptor: ProcessDescriptor instance.
+        Raises:
+            ProcessNotFoundError (PyGridError) : If FL Process not found.
+        """
+        return self._descriptors.get(
+            name, version, lambda: self._load_descriptor(name, version)
+        )
+
+    def _load_descriptor(self, name: str, version: str = None) -> ProcessDescriptor:
+        query = {"name": name}
+        if version is not None:
+            query["version"] = version
+
+        _process = self._processes.latest(**query)
+        if not _process:
+            raise ProcessNotFoundError
+
+        session = self.db.session
+        configs = {
+            is_server_config: config
+            for is_server_config, config in session.query(
+                Config.is_server_config, Config.config
+            ).filter_by(fl_process_id=_process.id)
+        }
+        # Only the names and IDs, not the plans/protocols content
+        _plans = session.query(Plan.name, Plan.id).filter_by(
+            fl_process_id=_process.id, is_avg_plan=False
+        )
+        _protocols = session.query(Protocol.name, Protocol.id).filter_by(
+            fl_process_id=_process.id
+        )
+        model_id = (
+            session.query(Model.id)
+            .filter_by(fl_process_id=_process.id)
+            .order_by(Model.id.desc())
+            .limit(1)
+            .scalar()
+        )
+
+        return ProcessDescriptor(
+            id=_process.id,
+            name=_process.name,
+            version=_process.version,
+            server_config=configs.get(True),
+            client_config=configs.get(False),
+            plans=dict(_plans),
+            protocols=dict(_protocols),
+            model_id=model_id,
+        )
+
     def get_configs(self, **kwargs):
         """Return FL Process Configs.
 
@@ -104,7 +178,7 @@ class ProcessManager(DatabaseManager):
         Raises:
             ProcessFoundError (PyGridError) : If FL Process not found.
         """
-        _process = self._processes.last(**kwargs)
+        _process = self._processes.latest(**kwargs)
 
         if not _process:
             raise ProcessNotFoundError
@@ -204,7 +278,7 @@ class ProcessManager(DatabaseManager):
         Raises:
             ProcessNotFound (PyGridError) : If Process not found.
         """
-        _process = self._processes.last(**kwargs)
+        _process = self._processes.latest(**kwargs)
 
         if not _process:
             raise ProcessNotFoundError
@@ -218,3 +292,7 @@ class ProcessManager(DatabaseManager):
             model_id: Model's ID.
         """
         self._processes.delete(**kwargs)
+        self._descriptors.invalidate()
+        plans.invalidate_avg_plan(kwargs.get("id"))
+        if kwargs.get("id") is not None:
+            stats_tracker.forget(kwargs["id"])
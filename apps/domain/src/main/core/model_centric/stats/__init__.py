@@ -0,0 +1,10 @@
+import os
+
+from .tracker import StatsTracker
+from ...database import db
+
+stats_tracker = StatsTracker(
+    db,
+    half_life=float(os.environ.get("MODEL_CENTRIC_STATS_HALF_LIFE", 3600)),
+    flush_interval=float(os.environ.get("MODEL_CENTRIC_STATS_FLUSH_INTERVAL", 30)),
+)
@@ -0,0 +1,27 @@
+from ...database import BaseModel, db
+
+
+class ProcessStats(BaseModel):
+    """Exponentially decayed statistics of a FL process, shared by the server
+    processes.
+
+    Columns:
+        fl_process_id (Integer, Primary Key): FL Process ID.
+        requests (Float): Decayed count of cycle requests.
+        assigned (Float): Decayed count of workers assigned to completed cycles.
+        failed (Float): Decayed count of assigned workers that didn't report a diff.
+        started_at (Float): Unix time of the first recorded event.
+        updated_at (Float): Unix time the counts were decayed to.
+    """
+
+    __tablename__ = "model_centric_process_stats"
+
+    fl_process_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    requests = db.Column(db.Float, default=0)
+    assigned = db.Column(db.Float, default=0)
+    failed = db.Column(db.Float, default=0)
+    started_at = db.Column(db.Float)
+    updated_at = db.Column(db.Float)
+
+    def __str__(self):
+        return f"<ProcessStats fl_process_id: {self.fl_process_id}, requests: {self.requests}, assigned: {self.assigned}, failed: {self.failed}>"
@@ -0,0 +1,373 @@
+# Standard python imports
+import logging
+import math
+import threading
+import time
+
+# External imports
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm.attributes import set_committed_value
+
+# PyGrid imports
+from ...metrics import metrics
+from ..workers.worker import Worker
+from .process_stats import ProcessStats
+
+ARRIVAL_RATE = "model_centric_arrival_rate"
+FAILURE_RATE = "model_centric_failure_rate"
+
+
+class DecayedCounts:
+    """Event counts whose weight halves every `half_life` seconds.
+
+    Args:
+        now: Unix time the counts are decayed to.
+        started_at: Unix time of the first event (default: now).
+    """
+
+    __slots__ = ("requests", "assigned", "failed", "started_at", "updated_at")
+
+    def __init__(
+        self,
+        now: float,
+        requests: float = 0.0,
+        assigned: float = 0.0,
+        failed: float = 0.0,
+        started_at: float = None,
+    ):
+        self.requests = requests
+        self.assigned = assigned
+        self.failed = failed
+        self.started_at = now if started_at is None else started_at
+        self.updated_at = now
+
+    @classmethod
+    def from_row(cls, row) -> "DecayedCounts":
+        return cls(
+            row.updated_at,
+            requests=row.requests or 0.0,
+            assigned=row.assigned or 0.0,
+            failed=row.failed or 0.0,
+            started_at=row.started_at,
+        )
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def decay_to(self, now: float, half_life: float):
+        """Decay the counts to `now` (counts are never moved back in time)."""
+        elapsed = now - self.updated_at
+        if elapsed <= 0:
+            return
+        factor = 0.5 ** (elapsed / half_life)
+        self.requests *= factor
+        self.assigned *= factor
+        self.failed *= factor
+        self.updated_at = now
+
+    def add(self, other: "DecayedCounts", half_life: float):
+        """Add the counts of `other`, decaying both to the newest time."""
+        now = max(self.updated_at, other.updated_at)
+        self.decay_to(now, half_life)
+        factor = 0.5 ** ((now - other.updated_at) / half_life)
+        self.requests += other.requests * factor
+        self.assigned += other.assigned * factor
+        self.failed += other.failed * factor
+        self.started_at = min(self.started_at, other.started_at)
+
+    def copy(self) -> "DecayedCounts":
+        return DecayedCounts(
+            self.updated_at,
+            requests=self.requests,
+            assigned=self.assigned,
+            failed=self.failed,
+            started_at=self.started_at,
+        )
+
+
+class StatsTracker:
+    """Arrival rate, failure rate and worker connection speeds of the FL
+    processes.
+
+    Events are counted in memory and merged into the shared
+    `model_centric_process_stats` table at most every `flush_interval`
+    seconds, so cycle requests don't write to the database. The flush also
+    reads back the counts recorded by the other server processes.
+
+    Rates are exponentially decayed: an event weighs half as much after
+    `half_life` seconds, so the estimates follow changes in the worker
+    population without keeping any history.
+
+    Args:
+        database: SQLAlchemy database instance.
+        half_life: Seconds after which an event counts half.
+        flush_interval: Seconds between database flushes.
+        speed_weight: Weight of a new speed sample in the workers' moving averages.
+        min_age: Seconds of observations needed to estimate an arrival rate.
+    """
+
+    def __init__(
+        self,
+        database,
+        half_life: float = 3600,
+        flush_interval: float = 30,
+        speed_weight: float = 0.3,
+        min_age: float = 60,
+    ):
+        self.db = database
+        self.half_life = half_life
+        self.flush_interval = flush_interval
+        self.speed_weight = speed_weight
+        self.min_age = min_age
+
+        # fl_process_id -> DecayedCounts read back from the database
+        self._shared = {}
+        # fl_process_id -> DecayedCounts recorded since the last flush
+        self._pending = {}
+        # worker_id -> {field: moving average} recorded since the last flush
+        self._speeds = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.time()
+
+    def record_request(self, fl_process_id: int, now: float = None):
+        """Count a request to join a cycle (/req-join).
+
+        Args:
+            fl_process_id: FL Process ID.
+            now: Unix time of the request.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._counts(fl_process_id, now).requests += 1
+        self.maybe_flush(now)
+
+    def record_cycle(
+        self, fl_process_id: int, assigned: int, reported: int, now: float = None
+    ):
+        """Count the workers of a completed cycle.
+
+        Args:
+            fl_process_id: FL Process ID.
+            assigned: Workers assigned to the cycle.
+            reported: Workers that reported a diff.
+            now: Unix time the cycle completed.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            counts = self._counts(fl_process_id, now)
+            counts.assigned += assigned
+            counts.failed += max(assigned - reported, 0)
+        self.maybe_flush(now)
+
+    def record_worker_speed(self, worker, now: float = None, **samples):
+        """Fold connection speed samples into the worker's moving averages.
+
+        The averages are set on `worker` without marking it as modified, they
+        are written by the next flush.
+
+        Args:
+            worker: Worker instance.
+            now: Unix time of the samples.
+            samples: New values of the speed columns (ping, avg_download, avg_upload).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            averages = self._speeds.setdefault(worker.id, {})
+            for field, value in samples.items():
+                previous = averages.get(field, getattr(worker, field))
+                if previous is not None:
+                    value = previous + self.speed_weight * (value - previous)
+                averages[field] = value
+                set_committed_value(worker, field, value)
+        self.maybe_flush(now)
+
+    def arrival_rate(self, fl_process_id: int, now: float = None):
+        """Join requests per second.
+
+        Args:
+            fl_process_id: FL Process ID.
+            now: Unix time.
+        Returns:
+            rate: Requests per second or None if there isn't enough data yet.
+        """
+        now = time.time() if now is None else now
+        counts = self._combined(fl_process_id, now)
+        if counts is None or counts.requests == 0:
+            return None
+
+        age = now - counts.started_at
+        if age < self.min_age:
+            return None
+
+        # Counts started from zero: correct the bias of young counters
+        warmup = 1 - 0.5 ** (age / self.half_life)
+        return counts.requests * math.log(2) / self.half_life / warmup
+
+    def failure_rate(self, fl_process_id: int, now: float = None):
+        """Fraction of the workers assigned to cycles that didn't report.
+
+        Args:
+            fl_process_id: FL Process ID.
+            now: Unix time.
+        Returns:
+            rate: Failure rate or None if no cycle was completed yet.
+        """
+        now = time.time() if now is None else now
+        counts = self._combined(fl_process_id, now)
+        if counts is None or counts.assigned == 0:
+            return None
+        return counts.failed / counts.assigned
+
+    def maybe_flush(self, now: float = None):
+        """Flush if the last flush is older than `flush_interval`.
+
+        Args:
+            now: Unix time.
+        """
+        now = time.time() if now is None else now
+        if now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now: float = None):
+        """Merge the recorded events into the database and read back the
+        counts of the other server processes.
+
+        Failed flushes are logged and retried by the next one.
+
+        Args:
+            now: Unix time.
+        """
+        now = time.time() if now is None else now
+        # A single flush at a time, other threads keep recording
+        if not self._flush_lock.acquire(blocking=False):
+            return
+
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                speeds, self._speeds = self._speeds, {}
+                process_ids = set(pending) | set(self._shared)
+                self._last_flush = now
+
+            try:
+                with self.db.engine.begin() as connection:
+                    shared = self._write_counts(connection, process_ids, pending, now)
+                    self._write_speeds(connection, speeds)
+            except Exception as e:
+                logging.error("Failed to flush the model-centric stats", exc_info=e)
+                self._restore(pending, speeds)
+                return
+
+            with self._lock:
+                self._shared.update(shared)
+            self._export(shared.keys(), now)
+        finally:
+            self._flush_lock.release()
+
+    def forget(self, fl_process_id: int):
+        """Drop the in-memory counts of a deleted process.
+
+        Args:
+            fl_process_id: FL Process ID.
+        """
+        with self._lock:
+            self._shared.pop(fl_process_id, None)
+            self._pending.pop(fl_process_id, None)
+
+    def _counts(self, fl_process_id, now):
+        counts = self._pending.get(fl_process_id)
+        if counts is None:
+            counts = self._pending[fl_process_id] = DecayedCounts(now)
+        else:
+            counts.decay_to(now, self.half_life)
+        return counts
+
+    def _combined(self, fl_process_id, now):
+        with self._lock:
+            shared = self._shared.get(fl_process_id)
+            pending = self._pending.get(fl_process_id)
+            if shared is None and pending is None:
+                return None
+
+            counts = DecayedCounts(now)
+            for part in (shared, pending):
+                if part is not None:
+                    counts.add(part, self.half_life)
+        counts.decay_to(now, self.half_life)
+        return counts
+
+    def _write_counts(self, connection, process_ids, pending, now):
+        table = ProcessStats.__table__
+        shared = {}
+        for fl_process_id in process_ids:
+            row = connection.execute(
+                select([table])
+                .where(table.c.fl_process_id == fl_process_id)
+                .with_for_update()
+            ).first()
+            delta = pending.get(fl_process_id)
+
+            if row is None:
+                if delta is None:
+                    continue
+                counts = delta.copy()
+                counts.decay_to(now, self.half_life)
+                connection.execute(
+                    table.insert().values(
+                        fl_process_id=fl_process_id, **counts.to_dict()
+                    )
+                )
+            else:
+                counts = DecayedCounts.from_row(row)
+                if delta is not None:
+                    counts.add(delta, self.half_life)
+                    counts.decay_to(now, self.half_life)
+                    connection.execute(
+                        table.update()
+                        .where(table.c.fl_process_id == fl_process_id)
+                        .values(**counts.to_dict())
+                    )
+            shared[fl_process_id] = counts
+        return shared
+
+    def _write_speeds(self, connection, speeds):
+        # Rows of an executemany must set the same columns
+        batches = {}
+        for worker_id, averages in speeds.items():
+            batches.setdefault(tuple(sorted(averages)), []).append(
+                {"_worker_id": worker_id, **averages}
+            )
+
+        table = Worker.__table__
+        for fields, rows in batches.items():
+            statement = (
+                table.update()
+                .where(table.c.id == bindparam("_worker_id"))
+                .values({field: bindparam(field) for field in fields})
+            )
+            connection.execute(statement, rows)
+
+    def _restore(self, pending, speeds):
+        with self._lock:
+            for fl_process_id, counts in pending.items():
+                current = self._pending.get(fl_process_id)
+                if current is None:
+                    self._pending[fl_process_id] = counts
+                else:
+                    current.add(counts, self.half_life)
+            for worker_id, averages in speeds.items():
+                # Samples recorded meanwhile are newer
+                self._speeds[worker_id] = {
+                    **averages,
+                    **self._speeds.get(worker_id, {}),
+                }
+
+    def _export(self, fl_process_ids, now):
+        for fl_process_id in fl_process_ids:
+            arrival_rate = self.arrival_rate(fl_process_id, now)
+            if arrival_rate is not None:
+                metrics.set(ARRIVAL_RATE, arrival_rate, fl_process_id=fl_process_id)
+            failure_rate = self.failure_rate(fl_process_id, now)
+            if failure_rate is not None:
+                metrics.set(FAILURE_RATE, failure_rate, fl_process_id=fl_process_id)
@@ -1,4 +1,6 @@
 # Syft assets module imports
+import threading
+
 # Syft dependencies
 import syft as sy
 from syft import deserialize, serialize
@@ -9,6 +11,7 @@ from ...exceptions import PlanInvalidError, PlanNotFoundError, PlanTranslationEr
 
 # PyGrid imports
 from ...manager.database_manager import DatabaseManager
+from ..cache import CachedAsset, download_cache
 from .plan import Plan
 
 
@@ -19,6 +22,10 @@ class PlanManager(DatabaseManager):
         self._schema = PlanManager.schema
         self.db = database
 
+        # Deserialized avg plans (fl_process_id -> (plan_id, sy.Plan or None))
+        self._avg_plans = {}
+        self._avg_plans_lock = threading.Lock()
+
     def register(self, process, plans: dict, avg_plan: bool):
         if not avg_plan:
             # Store specific plan types in proper fields in DB
@@ -79,6 +86,67 @@ class PlanManager(DatabaseManager):
 
         return _plan
 
+    def download(self, plan, receive_operations_as: str = None) -> CachedAsset:
+        """Retrieve the plan value from the download cache.
+
+        Args:
+            plan: Plan instance.
+            receive_operations_as: Plan format ("torchscript", "tfjs" or None for syft ops).
+        Returns:
+            asset: CachedAsset with the plan value and its ETag.
+        """
+        if receive_operations_as == "torchscript":
+            loader = lambda: (plan.value_ts or b"", None)
+        elif receive_operations_as == "tfjs":
+            loader = lambda: (plan.value_tfjs or b"", None)
+        else:
+            receive_operations_as = "list"
+            loader = lambda: (plan.value or b"", None)
+
+        return download_cache.plan(plan.id, receive_operations_as, loader)
+
+    def avg_plan(self, fl_process_id: int):
+        """Retrieve the deserialized avg plan hosted with a FL process.
+
+        Deserializing a plan is costly, so plans are cached per FL process.
+        Only the plan ID is queried on cache hits, a different ID means the
+        process was replaced and the plan is loaded again.
+
+        Args:
+            fl_process_id: Federated Learning Process ID.
+        Returns:
+            plan: sy.Plan or None if the process has no hosted avg plan.
+        """
+        _plan = super().first(
+            defer_binary=True, fl_process_id=fl_process_id, is_avg_plan=True
+        )
+        if _plan is None:
+            self.invalidate_avg_plan(fl_process_id)
+            return None
+
+        with self._avg_plans_lock:
+            cached = self._avg_plans.get(fl_process_id)
+            if cached is not None and cached[0] == _plan.id:
+                return cached[1]
+
+        avg_plan = self.deserialize_plan(_plan.value) if _plan.value else None
+
+        with self._avg_plans_lock:
+            self._avg_plans[fl_process_id] = (_plan.id, avg_plan)
+        return avg_plan
+
+    def invalidate_avg_plan(self, fl_process_id: int = None):
+        """Drop cached avg plans.
+
+        Args:
+            fl_process_id: Federated Learning Process ID (default: every process).
+        """
+        with self._avg_plans_lock:
+            if fl_process_id is None:
+                self._avg_plans.clear()
+            else:
+                self._avg_plans.pop(fl_process_id, None)
+
     def delete(self, **kwargs):
         """Delete a registered Plan.
 
@@ -0,0 +1,13 @@
+import os
+
+from ..blobs import default_data_dir
+from .job_queue import Job, SQLiteJobQueue
+from .job_worker import JobWorker
+
+# SQLite file of the background jobs, shared by the server processes and the
+# external job workers (MODEL_CENTRIC_JOB_QUEUE, default: "jobs.db" next to
+# the database). Pending jobs survive restarts as long as this file does.
+job_queue = SQLiteJobQueue(
+    os.environ.get("MODEL_CENTRIC_JOB_QUEUE")
+    or os.path.join(default_data_dir(), "jobs.db")
+)
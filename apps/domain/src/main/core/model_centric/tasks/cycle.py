@@ -1,36 +1,89 @@
 # Standard python imports
 import logging
-import traceback
-
-# Threads
-from ....utils.executor import executor
-
-
-def run_task_once(name, func, *args):
-    future = executor.futures._futures.get(name)
-    logging.info("future: %s" % str(future))
-    logging.info("futures count: %d" % len(executor.futures._futures))
-    # prevent running multiple threads
-    if future is None or future.done() is True:
-        executor.futures.pop(name)
-        try:
-            executor.submit_stored(name, func, *args)
-        except Exception as e:
-            logging.error(
-                "Failed to start new thread: %s %s" % (str(e), traceback.format_exc())
-            )
-    else:
-        logging.warning(
-            "Skipping %s execution because previous one is not finished" % name
-        )
-
-
-def complete_cycle(cycle_manager, cycle_id):
+
+from . import JobWorker, job_queue
+
+COMPLETE_CYCLE = "complete_cycle"
+COMPACT_CHECKPOINTS = "compact_checkpoints"
+PURGE_CYCLE_DIFFS = "purge_cycle_diffs"
+
+
+def enqueue_complete_cycle(cycle_id: int, delay: float = 0):
+    """Queue a cycle completion check.
+
+    Reports arriving while the cycle is being checked queue a new check,
+    so no diff is left unaccounted.
+
+    Args:
+        cycle_id: Cycle's ID.
+        delay: Seconds to wait before running the check.
+    """
+    job_queue.enqueue(
+        COMPLETE_CYCLE, key=cycle_id, args={"cycle_id": cycle_id}, delay=delay
+    )
+
+
+def complete_cycle(cycle_id: int):
     logging.info("running complete_cycle")
-    try:
-        cycle_manager.complete_cycle(cycle_id)
-    except Exception as e:
-        logging.error(
-            "Error in complete_cycle task: %s %s" % (str(e), traceback.format_exc())
-        )
-        return e
+    # Imported here to avoid a circular import with the cycle manager
+    from ..cycles import cycle_manager
+
+    cycle_manager.complete_cycle(cycle_id)
+
+
+def enqueue_compact_checkpoints(model_id: int, keep_last: int, keep_every: int = 0):
+    """Queue the compaction of a model's checkpoints.
+
+    Args:
+        model_id: Model's ID.
+        keep_last: Number of newest checkpoints kept.
+        keep_every: Keep every Kth checkpoint (0: disabled).
+    """
+    job_queue.enqueue(
+        COMPACT_CHECKPOINTS,
+        key=model_id,
+        args={"model_id": model_id, "keep_last": keep_last, "keep_every": keep_every},
+    )
+
+
+def compact_checkpoints(model_id: int, keep_last: int, keep_every: int = 0):
+    from ..models import model_manager
+    from ..models.retention import RetentionPolicy
+
+    deleted = model_manager.compact(model_id, RetentionPolicy(keep_last, keep_every))
+    logging.info(f"compacted {deleted} checkpoints of model {model_id}")
+
+
+def enqueue_purge_cycle_diffs(cycle_id: int):
+    """Queue the deletion of the diffs reported to a completed cycle.
+
+    Args:
+        cycle_id: Cycle's ID.
+    """
+    job_queue.enqueue(PURGE_CYCLE_DIFFS, key=cycle_id, args={"cycle_id": cycle_id})
+
+
+def purge_cycle_diffs(cycle_id: int):
+    from ..cycles import cycle_manager
+
+    deleted = cycle_manager.purge_diffs(cycle_id)
+    logging.info(f"deleted {deleted} diffs of cycle {cycle_id}")
+
+
+handlers = {
+    COMPLETE_CYCLE: complete_cycle,
+    COMPACT_CHECKPOINTS: compact_checkpoints,
+    PURGE_CYCLE_DIFFS: purge_cycle_diffs,
+}
+
+
+def create_job_worker(app=None, poll_interval: float = 0.5) -> JobWorker:
+    """Create a consumer of the model-centric jobs.
+
+    Args:
+        app: Flask app, jobs run inside its application context.
+        poll_interval: Seconds to wait when the queue is empty.
+    Returns:
+        worker: JobWorker instance.
+    """
+    return JobWorker(job_queue, handlers, app=app, poll_interval=poll_interval)
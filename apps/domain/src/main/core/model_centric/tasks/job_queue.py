@@ -0,0 +1,204 @@
+# Standard python imports
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+
+class Job(NamedTuple):
+    """Job claimed from the queue.
+
+    Fields:
+        id (Integer): Job ID.
+        name (String): Job type, used to select its handler.
+        key (String): Coalescing key, only one pending job exists per (name, key).
+        args (Dict): Handler arguments.
+        attempts (Integer): Number of failed executions.
+    """
+
+    id: int
+    name: str
+    key: str
+    args: dict
+    attempts: int
+
+
+class SQLiteJobQueue:
+    """Durable job queue stored in a SQLite database, it can be shared by
+    every process running on the same host.
+
+    - Coalescing: enqueuing a job while an identical one is pending is a no-op.
+      If the identical job is already running, a new one is queued so the
+      work is re-checked once the running one finishes.
+    - Jobs sharing the same (name, key) never run concurrently.
+    - Claimed jobs are leased, if the consumer dies the job is picked up again
+      once the lease expires.
+    - Failed jobs are retried with exponential backoff up to `max_attempts`.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+
+    def __init__(self, path: str, max_attempts: int = 5, lease: float = 600):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._create_tables()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _create_tables(self):
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                key TEXT NOT NULL,
+                args TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_at REAL NOT NULL,
+                locked_until REAL,
+                last_error TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_key
+                ON jobs (name, key) WHERE state = 'pending';
+            CREATE INDEX IF NOT EXISTS jobs_state_run_at ON jobs (state, run_at);
+            """
+        )
+
+    def enqueue(self, name: str, key, args: dict = None, delay: float = 0) -> bool:
+        """Add a job to the queue.
+
+        Args:
+            name: Job type.
+            key: Coalescing key (e.g. the cycle ID).
+            args: Handler arguments (JSON serializable).
+            delay: Seconds to wait before running the job.
+        Returns:
+            result: False if an identical job was already pending.
+        """
+        cursor = self._connection.execute(
+            "INSERT OR IGNORE INTO jobs (name, key, args, state, run_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (name, str(key), json.dumps(args or {}), self.PENDING, time.time() + delay),
+        )
+        return cursor.rowcount == 1
+
+    def claim(self) -> Optional[Job]:
+        """Lease the next job ready to run.
+
+        Returns:
+            job: Job instance or None if there's nothing to run.
+        """
+        now = time.time()
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._recover_expired(now)
+            row = connection.execute(
+                """
+                SELECT id, name, key, args, attempts FROM jobs AS pending
+                WHERE state = ? AND run_at <= ? AND NOT EXISTS (
+                    SELECT 1 FROM jobs AS running
+                    WHERE running.state = ?
+                    AND running.name = pending.name AND running.key = pending.key
+                )
+                ORDER BY run_at LIMIT 1
+                """,
+                (self.PENDING, now, self.RUNNING),
+            ).fetchone()
+
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET state = ?, locked_until = ? WHERE id = ?",
+                    (self.RUNNING, now + self.lease, row[0]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        if row is None:
+            return None
+
+        _id, name, key, args, attempts = row
+        return Job(id=_id, name=name, key=key, args=json.loads(args), attempts=attempts)
+
+    def complete(self, job: Job):
+        """Remove a successfully executed job.
+
+        Args:
+            job: Job instance.
+        """
+        self._connection.execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+
+    def fail(self, job: Job, error: str):
+        """Schedule a retry of a failed job, or keep it as failed once it ran
+        out of attempts.
+
+        Args:
+            job: Job instance.
+            error: Error description.
+        """
+        attempts = job.attempts + 1
+        if attempts >= self.max_attempts:
+            self._connection.execute(
+                "UPDATE jobs SET state = ?, attempts = ?, last_error = ? WHERE id = ?",
+                (self.FAILED, attempts, error, job.id),
+            )
+            return
+
+        try:
+            self._connection.execute(
+                "UPDATE jobs SET state = ?, attempts = ?, last_error = ?, run_at = ? "
+                "WHERE id = ?",
+                (self.PENDING, attempts, error, time.time() + 2**attempts, job.id),
+            )
+        except sqlite3.IntegrityError:
+            # An identical job was queued meanwhile, it will do the work.
+            self.complete(job)
+
+    def __len__(self) -> int:
+        """Number of jobs waiting or running.
+
+        Returns:
+            length: Number of pending and running jobs.
+        """
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)",
+            (self.PENDING, self.RUNNING),
+        ).fetchone()[0]
+
+    def _recover_expired(self, now: float):
+        # Drop expired jobs that are already covered by a pending one
+        self._connection.execute(
+            """
+            DELETE FROM jobs WHERE state = ? AND locked_until < ? AND EXISTS (
+                SELECT 1 FROM jobs AS pending
+                WHERE pending.state = ?
+                AND pending.name = jobs.name AND pending.key = jobs.key
+            )
+            """,
+            (self.RUNNING, now, self.PENDING),
+        )
+        self._connection.execute(
+            "UPDATE jobs SET state = ?, locked_until = NULL "
+            "WHERE state = ? AND locked_until < ?",
+            (self.PENDING, self.RUNNING, now),
+        )
@@ -0,0 +1,70 @@
+# Standard python imports
+import logging
+import threading
+import traceback
+
+
+class JobWorker:
+    """Consume jobs from a queue and dispatch them to their handlers.
+
+    Args:
+        queue: Job queue instance.
+        handlers: Dictionary mapping job names to functions receiving the job args.
+        app: Flask app, handlers run inside its application context.
+        poll_interval: Seconds to wait when the queue is empty.
+    """
+
+    def __init__(self, queue, handlers: dict, app=None, poll_interval: float = 0.5):
+        self.queue = queue
+        self.handlers = handlers
+        self.app = app
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def run_once(self) -> bool:
+        """Execute the next job ready to run.
+
+        Returns:
+            result: False if the queue had nothing to run.
+        """
+        job = self.queue.claim()
+        if job is None:
+            return False
+
+        logging.info(f"Running job {job.name} ({job.key}), attempt {job.attempts + 1}")
+        try:
+            handler = self.handlers[job.name]
+            if self.app is not None:
+                with self.app.app_context():
+                    handler(**job.args)
+            else:
+                handler(**job.args)
+        except Exception as e:
+            logging.error(
+                f"Job {job.name} ({job.key}) failed: {traceback.format_exc()}"
+            )
+            self.queue.fail(job, str(e))
+        else:
+            self.queue.complete(job)
+
+        return True
+
+    def run_forever(self):
+        """Consume jobs until `stop` is called."""
+        while not self._stop.is_set():
+            if not self.run_once():
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> threading.Thread:
+        """Consume jobs in a daemon thread.
+
+        Returns:
+            thread: Consumer thread.
+        """
+        thread = threading.Thread(target=self.run_forever, name="job-worker")
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
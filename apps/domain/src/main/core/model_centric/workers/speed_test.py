@@ -0,0 +1,105 @@
+# Standard python imports
+import os
+import time
+import uuid
+
+from ...metrics import metrics
+
+# Largest speed test download (64MB by default)
+SAMPLE_SIZE = int(os.environ.get("MODEL_CENTRIC_SPEED_TEST_SIZE", 64 * 1024 * 1024))
+CHUNK_SIZE = 64 * 1024
+
+# Downloads are timed by how fast the WSGI server takes the chunks: smaller
+# samples fit in the socket and proxy buffers, only memory copies are timed.
+MIN_TIMED_DOWNLOAD = int(
+    os.environ.get("MODEL_CENTRIC_SPEED_TEST_MIN_TIMED", 16 * 1024 * 1024)
+)
+
+SPEED_TEST_KBPS = "model_centric_speed_test_kbps"
+metrics.declare(
+    SPEED_TEST_KBPS,
+    "Throughput of the worker speed tests (Kbps).",
+    buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000),
+)
+
+# Preallocated once and sent repeatedly by every speed test. Random bytes,
+# so compressing proxies can't shrink the sample.
+_CHUNK = os.urandom(CHUNK_SIZE)
+
+
+def kbps(num_bytes: int, seconds: float) -> float:
+    """Throughput in kilobits per second (the unit of the
+    minimum_upload/download_speed server configs).
+
+    Args:
+        num_bytes: Bytes transferred.
+        seconds: Transfer time.
+    Returns:
+        throughput: Kbps or None if the transfer was too fast to be timed.
+    """
+    if seconds <= 0:
+        return None
+    return num_bytes * 8 / 1000 / seconds
+
+
+class SpeedTestSample:
+    """Speed test download, streamed as a multipart form with a single
+    "sample" field of `size` bytes.
+
+    The body is built from a preallocated chunk, so serving a sample costs
+    the same memory regardless of its size or the number of concurrent
+    downloads.
+
+    Args:
+        size: Bytes of the sample field.
+        on_complete: Called with (bytes sent, seconds) once the sample was sent.
+    """
+
+    def __init__(self, size: int = SAMPLE_SIZE, on_complete=None):
+        self.size = size
+        self.on_complete = on_complete
+
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._header = (
+            f"--{boundary}\r\n" 'Content-Disposition: form-data; name="sample"\r\n\r\n'
+        ).encode()
+        self._footer = f"\r\n--{boundary}--\r\n".encode()
+
+    @property
+    def content_length(self) -> int:
+        return len(self._header) + self.size + len(self._footer)
+
+    def __iter__(self):
+        yield self._header
+        start = time.perf_counter()
+
+        remaining = self.size
+        while remaining > 0:
+            yield _CHUNK if remaining >= CHUNK_SIZE else _CHUNK[:remaining]
+            remaining -= CHUNK_SIZE
+
+        elapsed = time.perf_counter() - start
+        yield self._footer
+
+        if self.on_complete is not None:
+            self.on_complete(self.size, elapsed)
+
+
+def drain(stream, chunk_size: int = CHUNK_SIZE):
+    """Read and discard an upload.
+
+    Args:
+        stream: Binary file-like object (e.g. the request stream).
+        chunk_size: Bytes read at a time.
+    Returns:
+        num_bytes, seconds: Bytes read and time spent reading them.
+    """
+    num_bytes = 0
+    start = time.perf_counter()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        num_bytes += len(chunk)
+    return num_bytes, time.perf_counter() - start
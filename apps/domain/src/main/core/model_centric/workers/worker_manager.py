@@ -48,17 +48,17 @@ class WorkerManager(DatabaseManager):
 
         return self.first(**kwargs)
 
-    def is_eligible(self, worker_id: str, server_config: dict):
+    def is_eligible(self, worker, server_config: dict):
         """Check if Worker is eligible to join in an new cycle by using its
         bandwidth statistics.
 
         Args:
-            worker_id : Worker's ID.
+            worker : Worker instance or Worker's ID.
             server_config : FL Process Server Config.
         Returns:
             result: Boolean flag.
         """
-        _worker = self.first(id=worker_id)
+        _worker = worker if isinstance(worker, Worker) else self.first(id=worker)
         logging.info(
             f"Checking worker [{_worker}] against server_config [{server_config}]"
         )
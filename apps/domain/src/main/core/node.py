@@ -1,3 +1,5 @@
+import os
+
 from .nodes.domain import GridDomain
 from .nodes.network import GridNetwork
 from .nodes.worker import GridWorker
@@ -127,6 +129,7 @@ def create_domain_app(app, args, testing=False):
     sockets.register_blueprint(ws, url_prefix=r"/")
 
     from .database import db, set_database_config, seed_db, User, Role
+    from .database.migrations import add_missing_columns, add_missing_indexes
 
     global node
     node = GridDomain(name=args.name)
@@ -137,6 +140,14 @@ def create_domain_app(app, args, testing=False):
 
     db.create_all()
 
+    # Model-centric tables created by previous versions need the new columns
+    # and indexes
+    model_centric_tables = [
+        table for table in db.metadata.tables if table.startswith("model_centric_")
+    ]
+    add_missing_columns(db, model_centric_tables)
+    add_missing_indexes(db, model_centric_tables)
+
     if not testing:
         if len(db.session.query(Role).all()) == 0:
             seed_db()
@@ -155,4 +166,25 @@ def create_domain_app(app, args, testing=False):
     app.config["EXECUTOR_PROPAGATE_EXCEPTIONS"] = True
     app.config["EXECUTOR_TYPE"] = "thread"
     executor.init_app(app)
+
+    # Pushes the cycles created by the other processes to the subscribed workers
+    if not testing:
+        from ..events.model_centric.fl_events import cycle_notifier, poll_new_cycles
+
+        cycle_notifier.watch(
+            poll_new_cycles,
+            app,
+            interval=float(os.environ.get("MODEL_CENTRIC_CYCLE_WATCH_INTERVAL", 2)),
+        )
+
+    # Model-centric jobs (e.g. cycle completion) are consumed in this process
+    # unless a separate job worker is used (MODEL_CENTRIC_JOB_WORKER=external).
+    if not testing and os.environ.get("MODEL_CENTRIC_JOB_WORKER") != "external":
+        from .model_centric.cycles import cycle_manager
+        from .model_centric.tasks.cycle import create_job_worker
+
+        create_job_worker(app).start()
+        # Queues the completion of the cycles reaching their end time
+        cycle_manager.scheduler.start(app)
+
     return app
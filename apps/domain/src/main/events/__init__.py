@@ -1,6 +1,7 @@
 """This file exists to provide a route to websocket events."""
 # Standard Python imports
 import json
+import struct
 
 
 class REQUEST_MSG(object):  # noqa: N801
@@ -28,6 +29,12 @@ routes = {
     MODEL_CENTRIC_FL_EVENTS.AUTHENTICATE: authenticate,
     MODEL_CENTRIC_FL_EVENTS.CYCLE_REQUEST: cycle_request,
     MODEL_CENTRIC_FL_EVENTS.REPORT: report,
+    MODEL_CENTRIC_FL_EVENTS.SUBSCRIBE: subscribe,
+}
+
+# Events accepting a binary payload and the data field receiving it
+binary_fields = {
+    MODEL_CENTRIC_FL_EVENTS.REPORT: CYCLE.DIFF,
 }
 
 handler = SocketHandler()
@@ -44,14 +51,15 @@ def route_requests(message, socket):
     """
     global routes
 
-    if isinstance(message, bytearray):
-        return forward_binary_message(message)
-
     request_id = None
+    handler.touch(socket)
     try:
-        message = json.loads(message)
+        if isinstance(message, (bytes, bytearray)):
+            message = parse_binary_message(message)
+        else:
+            message = json.loads(message)
         request_id = message.get(MSG_FIELD.REQUEST_ID)
-        response = routes[message[REQUEST_MSG.TYPE_FIELD]](message)
+        response = routes[message[REQUEST_MSG.TYPE_FIELD]](message, socket)
     except Exception as e:
         response = {"error": str(e)}
 
@@ -61,6 +69,39 @@ def route_requests(message, socket):
     return json.dumps(response)
 
 
+def parse_binary_message(message: bytearray) -> dict:
+    """Parse a binary websocket frame.
+
+    Binary frames carry a JSON header followed by the raw payload, so large
+    payloads (e.g. model diffs) don't need to be base64 encoded:
+        [header length: uint32 big-endian][JSON header][payload]
+    The payload is set in the header's data under the event's binary field
+    (e.g. "diff" for reports) as a memoryview of the frame, avoiding a copy.
+
+    Args:
+        message : binary frame received.
+    Returns:
+        message : message with its payload.
+    Raises:
+        ValueError: If the frame is malformed or the event doesn't accept a payload.
+    """
+    message = memoryview(message)
+    if message.nbytes < 4:
+        raise ValueError("Invalid binary message!")
+
+    (header_size,) = struct.unpack_from(">I", message)
+    if message.nbytes < 4 + header_size:
+        raise ValueError("Invalid binary message header size!")
+
+    header = json.loads(message[4 : 4 + header_size].tobytes())
+    field = binary_fields.get(header.get(REQUEST_MSG.TYPE_FIELD))
+    if field is None:
+        raise ValueError("This event doesn't accept binary messages!")
+
+    header.setdefault(MSG_FIELD.DATA, {})[field] = message[4 + header_size :]
+    return header
+
+
 @ws.route("/")
 def socket_api(socket):
     """Handle websocket connections and receive their messages.
@@ -80,4 +121,19 @@ def socket_api(socket):
             else:
                 socket.send(response)
 
+    disconnect(socket)
+
+
+def disconnect(socket):
+    """Unlink a closed connection from its worker and drop the worker's
+    subscriptions.
+
+    Args:
+        socket : websocket instance.
+    Returns:
+        worker_id : Worker linked to the connection or None.
+    """
     worker_id = handler.remove(socket)
+    if worker_id is not None:
+        cycle_notifier.unsubscribe(worker_id)
+    return worker_id
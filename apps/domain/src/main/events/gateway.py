@@ -0,0 +1,169 @@
+"""ASGI WebSocket gateway for the model-centric events.
+
+Connections are served by an event loop, so idle devices only cost a
+coroutine instead of a (green) thread each. Messages are dispatched to the
+event handlers (see `routes`) in a bounded thread pool, where the handlers'
+blocking database and blob store I/O can't stall the other connections.
+"""
+# Standard Python imports
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from ..core.metrics import metrics
+from . import disconnect, route_requests
+
+WS_CONNECTIONS = "model_centric_websocket_connections"
+WS_DISPATCH_SECONDS = "model_centric_websocket_dispatch_seconds"
+
+
+class GatewaySocket:
+    """Connection handed to the event handlers, exposing the `send` and
+    `closed` members of the gevent-websocket sockets.
+
+    `send` may be called from any thread.
+
+    Args:
+        send: ASGI send callable of the connection.
+        loop: Event loop serving the connection.
+    """
+
+    def __init__(self, send, loop):
+        self._send = send
+        self._loop = loop
+        self._lock = asyncio.Lock()
+        self.closed = False
+
+    async def send_async(self, message):
+        """Send a message from the event loop.
+
+        Args:
+            message: Text (str) or binary (bytes) message.
+        """
+        if self.closed:
+            return
+        if isinstance(message, (bytes, bytearray)):
+            event = {"type": "websocket.send", "bytes": bytes(message)}
+        else:
+            event = {"type": "websocket.send", "text": message}
+        async with self._lock:
+            await self._send(event)
+
+    def send(self, message, binary: bool = False):
+        """Send a message from a worker thread, without waiting for it to
+        be written.
+
+        Args:
+            message: Text (str) or binary (bytes) message.
+            binary: Ignored, the frame type follows the message type.
+        Returns:
+            future: concurrent.futures.Future of the send.
+        """
+        return asyncio.run_coroutine_threadsafe(self.send_async(message), self._loop)
+
+    async def close_async(self, code: int = 1000):
+        if self.closed:
+            return
+        async with self._lock:
+            await self._send({"type": "websocket.close", "code": code})
+        self.closed = True
+
+    def close(self, code: int = 1000):
+        """Close the connection from a worker thread.
+
+        Args:
+            code: WebSocket close code.
+        Returns:
+            future: concurrent.futures.Future of the close.
+        """
+        return asyncio.run_coroutine_threadsafe(self.close_async(code), self._loop)
+
+
+class WebSocketGateway:
+    """ASGI application serving the model-centric WebSocket events.
+
+    HTTP routes aren't served, they stay on the WSGI server.
+
+    Args:
+        app: Flask app, the handlers run inside its application context.
+        max_workers: Threads running the handlers.
+        max_pending: Messages waiting for a thread before the gateway stops
+            reading from the connections (default: 4 * max_workers).
+    """
+
+    def __init__(self, app, max_workers: int = 32, max_pending: int = None):
+        self.app = app
+        self.max_workers = max_workers
+        self.max_pending = max_pending or 4 * max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ws-gateway"
+        )
+        self._pending = None
+        self._connections = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            await self._serve(receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        else:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 404,
+                    "headers": [(b"content-type", b"text/plain")],
+                }
+            )
+            await send({"type": "http.response.body", "body": b"Not Found"})
+
+    async def _serve(self, receive, send):
+        event = await receive()
+        if event["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+
+        loop = asyncio.get_event_loop()
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self.max_pending)
+        socket = GatewaySocket(send, loop)
+
+        self._connections += 1
+        metrics.set(WS_CONNECTIONS, self._connections)
+        try:
+            while True:
+                event = await receive()
+                if event["type"] == "websocket.disconnect":
+                    break
+
+                message = event.get("bytes")
+                if message is None:
+                    message = event.get("text")
+                if not message:
+                    continue
+
+                # Messages of a connection are handled in order, as before
+                async with self._pending:
+                    response = await loop.run_in_executor(
+                        self._executor, self._dispatch, message, socket
+                    )
+                await socket.send_async(response)
+        finally:
+            socket.closed = True
+            self._connections -= 1
+            metrics.set(WS_CONNECTIONS, self._connections)
+            await loop.run_in_executor(self._executor, disconnect, socket)
+
+    def _dispatch(self, message, socket):
+        with metrics.timer(WS_DISPATCH_SECONDS):
+            with self.app.app_context():
+                return route_requests(message, socket)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            event = await receive()
+            if event["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif event["type"] == "lifespan.shutdown":
+                self._executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -0,0 +1,236 @@
+# Standard python imports
+import json
+import logging
+import math
+import random
+import threading
+import time
+import traceback
+from collections import deque
+
+from ...core.codes import CYCLE, MODEL_CENTRIC_FL_EVENTS, MSG_FIELD
+
+
+class CycleNotifier:
+    """Push a notification to the workers subscribed to a model when one of
+    its cycles opens, instead of having them poll cycle requests.
+
+    Only a random subset of the subscribers is notified: `oversample` times
+    the cycle slots, at most `max_notifications`. Notifications are spread
+    over `jitter` seconds, so the notified workers don't send their cycle
+    requests at once.
+
+    Each server process notifies the workers connected to it, so the limits
+    are split evenly between the `processes` server processes.
+
+    Args:
+        handler: SocketHandler of the worker connections.
+        max_notifications: Most workers notified per cycle.
+        oversample: Workers notified per cycle slot.
+        jitter: Seconds over which the notifications are spread.
+        processes: Server processes holding worker connections.
+        seed: Random seed.
+    """
+
+    # Cycles remembered to notify each cycle once
+    NOTIFIED_CYCLES = 1024
+
+    def __init__(
+        self,
+        handler,
+        max_notifications: int = 1000,
+        oversample: float = 2.0,
+        jitter: float = 5.0,
+        processes: int = 1,
+        seed=None,
+    ):
+        self.handler = handler
+        self.max_notifications = max_notifications
+        self.oversample = oversample
+        self.jitter = jitter
+        self.processes = max(processes, 1)
+
+        # (model name, version or None) -> worker IDs
+        self._subscriptions = {}
+        # worker ID -> (model name, version or None) keys
+        self._workers = {}
+        self._notified = deque(maxlen=self.NOTIFIED_CYCLES)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Newest cycle seen by the watcher
+        self.last_cycle_id = None
+
+    def subscribe(self, worker_id: str, name: str, version: str = None):
+        """Notify a worker of the new cycles of a model.
+
+        Args:
+            worker_id: Worker's ID.
+            name: Model name.
+            version: Model version (default: any version).
+        """
+        with self._lock:
+            self._subscriptions.setdefault((name, version), set()).add(worker_id)
+            self._workers.setdefault(worker_id, set()).add((name, version))
+
+    def unsubscribe(self, worker_id: str):
+        """Drop every subscription of a worker.
+
+        Args:
+            worker_id: Worker's ID.
+        """
+        with self._lock:
+            for key in self._workers.pop(worker_id, ()):
+                self._unsubscribe(worker_id, key)
+
+    def is_subscribed(self, worker_id: str) -> bool:
+        """Check if a worker waits for new cycles.
+
+        Doesn't take the lock, so the socket handler can call it while
+        holding its own lock.
+
+        Args:
+            worker_id: Worker's ID.
+        Returns:
+            result: Boolean flag.
+        """
+        return worker_id in self._workers
+
+    def _unsubscribe(self, worker_id: str, key: tuple):
+        workers = self._subscriptions.get(key)
+        if workers is not None:
+            workers.discard(worker_id)
+            if not workers:
+                del self._subscriptions[key]
+
+    def subscribers(self, name: str, version: str) -> list:
+        """Connected workers subscribed to a model version, the disconnected
+        ones are unsubscribed.
+
+        Args:
+            name: Model name.
+            version: Model version.
+        Returns:
+            worker_ids: List of worker IDs.
+        """
+        connected = set()
+        with self._lock:
+            for key in ((name, version), (name, None)):
+                workers = self._subscriptions.get(key)
+                if not workers:
+                    continue
+                gone = {w for w in workers if not self.handler.is_connected(w)}
+                for worker_id in gone:
+                    for subscription in self._workers.pop(worker_id, ()):
+                        self._unsubscribe(worker_id, subscription)
+                connected |= self._subscriptions.get(key, set())
+        return sorted(connected)
+
+    def __len__(self) -> int:
+        """Number of subscriptions.
+
+        Returns:
+            length: Number of (worker, model) subscriptions.
+        """
+        with self._lock:
+            return sum(len(workers) for workers in self._subscriptions.values())
+
+    def select(self, name: str, version: str, slots: int = None) -> list:
+        """Pick the subscribers of this process notified of a new cycle.
+
+        Args:
+            name: Model name.
+            version: Model version.
+            slots: Workers admitted into the cycle (default: unlimited).
+        Returns:
+            worker_ids: List of worker IDs.
+        """
+        subscribers = self.subscribers(name, version)
+        limit = self.max_notifications
+        if slots is not None:
+            limit = min(limit, slots * self.oversample)
+        limit = int(math.ceil(limit / self.processes))
+        if len(subscribers) <= limit:
+            return subscribers
+        return self._random.sample(subscribers, limit)
+
+    def notify(self, cycle_id: int, name: str, version: str, slots: int = None):
+        """Notify subscribers that a cycle opened, each cycle is notified once.
+
+        Args:
+            cycle_id: Cycle's ID.
+            name: Model name.
+            version: Model version.
+            slots: Workers admitted into the cycle (default: unlimited).
+        Returns:
+            thread: Thread sending the notifications or None if nobody is notified.
+        """
+        with self._lock:
+            if cycle_id in self._notified:
+                return None
+            self._notified.append(cycle_id)
+
+        worker_ids = self.select(name, version, slots)
+        if not worker_ids:
+            return None
+
+        message = json.dumps(
+            {
+                MSG_FIELD.TYPE: MODEL_CENTRIC_FL_EVENTS.CYCLE_OPEN,
+                MSG_FIELD.DATA: {MSG_FIELD.MODEL: name, CYCLE.VERSION: version},
+            }
+        )
+        delays = sorted(
+            (self._random.uniform(0, self.jitter), worker_id)
+            for worker_id in worker_ids
+        )
+        thread = threading.Thread(
+            target=self._send, args=(message, delays), name="cycle-notifier"
+        )
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _send(self, message: str, delays: list):
+        start = time.monotonic()
+        sent = 0
+        for delay, worker_id in delays:
+            wait = start + delay - time.monotonic()
+            if wait > 0 and self._stop.wait(wait):
+                return
+            sent += self.handler.send_msg(worker_id, message)
+        logging.info(f"Notified {sent} of {len(delays)} workers of a new cycle")
+
+    def watch(self, poll, app=None, interval: float = 2.0) -> threading.Thread:
+        """Call `poll` every `interval` seconds while there are subscribers,
+        to notify the cycles created by other processes.
+
+        Args:
+            poll: Function notifying the cycles created since `last_cycle_id`.
+            app: Flask app, `poll` runs inside its application context.
+            interval: Seconds between polls.
+        Returns:
+            thread: Watcher thread.
+        """
+
+        def run():
+            while not self._stop.wait(interval):
+                if not len(self):
+                    continue
+                try:
+                    if app is None:
+                        poll()
+                    else:
+                        with app.app_context():
+                            poll()
+                except Exception:
+                    logging.error(f"Cycle watcher failed: {traceback.format_exc()}")
+
+        thread = threading.Thread(target=run, name="cycle-watcher")
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
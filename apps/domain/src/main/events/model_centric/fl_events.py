@@ -1,27 +1,53 @@
 # Standard python imports
 import base64
 import json
+import os
 import traceback
 import uuid
 from binascii import unhexlify
 
 from ...core.codes import CYCLE, MODEL_CENTRIC_FL_EVENTS, MSG_FIELD, RESPONSE_MSG
 from ...core.exceptions import (
+    AuthorizationError,
     CycleNotFoundError,
+    InvalidDiffError,
     MaxCycleLimitExceededError,
     PyGridError,
 )
+from ...core.metrics import metrics
 from ...core.model_centric.auth.federated import verify_token
 from ...core.model_centric.controller import processes
+from ...core.model_centric.cycles import cycle_manager
 from ...core.model_centric.processes import process_manager
+from ...core.model_centric.stats import stats_tracker
 from ...core.model_centric.workers import worker_manager
 
 # Local imports
+from .cycle_notifier import CycleNotifier
 from .socket_handler import SocketHandler
 
 # Singleton socket handler
 handler = SocketHandler()
 
+# Pushes the new cycles to the subscribed workers
+cycle_notifier = CycleNotifier(
+    handler,
+    max_notifications=int(os.environ.get("MODEL_CENTRIC_CYCLE_PUSH_LIMIT", 1000)),
+    oversample=float(os.environ.get("MODEL_CENTRIC_CYCLE_PUSH_OVERSAMPLE", 2.0)),
+    jitter=float(os.environ.get("MODEL_CENTRIC_CYCLE_PUSH_JITTER", 5.0)),
+    # Gunicorn workers (see entrypoint.sh)
+    processes=int(
+        os.environ.get(
+            "MODEL_CENTRIC_CYCLE_PUSH_PROCESSES", os.environ.get("WEB_CONCURRENCY", 1)
+        )
+    ),
+)
+# Subscribed workers keep their connection while they wait for a cycle
+handler.keep_idle = cycle_notifier.is_subscribed
+
+# Seconds spent decoding and storing reported diffs
+REPORT_PARSE_TIME = "model_centric_report_parse_seconds"
+
 
 def host_federated_training(message: dict, socket=None) -> dict:
     """This will allow for training cycles to begin on end-user devices.
@@ -108,11 +134,7 @@ def assign_worker_id(message: dict, socket=None) -> dict:
 
 def requires_speed_test(model_name, model_version):
 
-    kwargs = {"name": model_name}
-    if model_version is not None:
-        kwargs["version"] = model_version
-
-    server_config, _ = process_manager.get_configs(**kwargs)
+    server_config = process_manager.descriptor(model_name, model_version).server_config
 
     return (
         True
@@ -192,7 +214,8 @@ def cycle_request(message: dict, socket=None) -> dict:
         }
         requires_speed_fields = requires_speed_test(name, version)
 
-        # Check and save connection speed to DB
+        # Check and record connection speed
+        samples = {}
         for request_field, db_field in fields_map.items():
             if request_field in data:
                 value = data.get(request_field)
@@ -200,13 +223,13 @@ def cycle_request(message: dict, socket=None) -> dict:
                     raise PyGridError(
                         f"'{request_field}' needs to be a positive number"
                     )
-                setattr(worker, db_field, float(value))
+                samples[db_field] = float(value)
             elif requires_speed_fields:
                 # Require fields to present when FL model has speed req's
                 raise PyGridError(f"'{request_field}' is required")
 
-        # worker_manager.modify(worker)  # Update database worker attributes
-        worker_manager.db.session.commit()  # Update database worker attributes
+        # Averaged in memory, written to the DB by the periodic stats flush
+        stats_tracker.record_worker_speed(worker, **samples)
 
         # The last time this worker was assigned for this model/version.
         last_participation = processes.last_cycle(worker_id, name, version)
@@ -248,14 +271,22 @@ def report(message: dict, socket=None) -> dict:
         worker_id = data.get(MSG_FIELD.WORKER_ID, None)
         request_key = data.get(CYCLE.KEY, None)
 
-        # It's simpler for client (and more efficient for bandwidth) to use base64
-        diff = base64.b64decode(data.get(CYCLE.DIFF, None).encode())
+        diff = data.get(CYCLE.DIFF, None)
+
+        # JSON clients send the diff as base64, binary uploads (HTTP octet-stream,
+        # multipart or binary websocket frames) send raw bytes or a stream.
+        encoding = "base64" if isinstance(diff, str) else "binary"
+        with metrics.timer(REPORT_PARSE_TIME, encoding=encoding):
+            if encoding == "base64":
+                diff = base64.b64decode(diff)
 
-        # Submit model diff and run cycle and task async to avoid block report request
-        # (for prod we probably should be replace this with Redis queue + separate worker)
-        processes.submit_diff(worker_id, request_key, diff)
+            # Stores the diff and queues the cycle completion check
+            processes.submit_diff(worker_id, request_key, diff)
 
         response[CYCLE.STATUS] = RESPONSE_MSG.SUCCESS
+    except InvalidDiffError:
+        # Answered with a 400 by the HTTP routes
+        raise
     except Exception as e:  # Retrieve exception messages such as missing JSON fields.
         response[RESPONSE_MSG.ERROR] = str(e) + traceback.format_exc()
 
@@ -264,3 +295,110 @@ def report(message: dict, socket=None) -> dict:
         MSG_FIELD.DATA: response,
     }
     return response
+
+
+def subscribe(message: dict, socket=None) -> dict:
+    """Subscribe a worker to the new cycles of a model, a "cycle-open"
+    event is pushed to (some of) the subscribers when a cycle opens, so they
+    don't need to poll cycle requests.
+
+    Binding the worker to another connection requires one of its request
+    keys, or else a valid auth token while the worker isn't connected, so a
+    client can't take over the connection of another worker.
+
+    Args:
+        message : Message body sent by some client.
+        socket: Socket descriptor.
+    Returns:
+        response : String response to the client
+    """
+    data = message[MSG_FIELD.DATA]
+    response = {}
+
+    try:
+        worker_id = data.get(MSG_FIELD.WORKER_ID, None)
+        name = data.get(MSG_FIELD.MODEL, None)
+        version = data.get(CYCLE.VERSION, None)
+        request_key = data.get(CYCLE.KEY, None)
+        auth_token = data.get("auth_token", None)
+
+        # Check the worker and the model exist
+        worker_manager.get(id=worker_id)
+        process_manager.descriptor(name, version)
+
+        # Only the worker can move its subscription to another connection
+        if not handler.is_bound(worker_id, socket):
+            if request_key is not None:
+                authorized = cycle_manager.has_request_key(worker_id, request_key)
+            else:
+                authorized = (
+                    not handler.is_connected(worker_id)
+                    and verify_token(auth_token, name, version)["status"]
+                    == RESPONSE_MSG.SUCCESS
+                )
+            if not authorized:
+                raise AuthorizationError(
+                    "Pass the worker's 'request_key' or a valid 'auth_token' to subscribe."
+                )
+
+        # Workers authenticated over HTTP are bound to this connection
+        handler.new_connection(worker_id, socket)
+        cycle_notifier.subscribe(worker_id, name, version)
+
+        response[CYCLE.STATUS] = RESPONSE_MSG.SUCCESS
+    except Exception as e:
+        response[CYCLE.STATUS] = RESPONSE_MSG.ERROR
+        response[RESPONSE_MSG.ERROR] = str(e)
+
+    response = {
+        MSG_FIELD.TYPE: MODEL_CENTRIC_FL_EVENTS.SUBSCRIBE,
+        MSG_FIELD.DATA: response,
+    }
+    return response
+
+
+def notify_cycle(cycle_id: int, fl_process_id: int):
+    """Push a new cycle to the workers subscribed to its model.
+
+    Args:
+        cycle_id: Cycle's ID.
+        fl_process_id: FL Process's ID.
+    """
+    if not len(cycle_notifier):
+        return
+
+    process = process_manager.first(id=fl_process_id)
+    server_config = process_manager.descriptor(
+        process.name, process.version
+    ).server_config
+    # Same slots as the admission (see CycleManager.slots), padded by the
+    # observed failure rate
+    cycle = cycle_manager.first(id=cycle_id)
+    if cycle is None:
+        return
+    cycle_notifier.notify(
+        cycle_id,
+        process.name,
+        process.version,
+        slots=cycle_manager.slots(cycle, server_config),
+    )
+
+
+def poll_new_cycles():
+    """Notify the cycles created by the other server processes (e.g. by a
+    separate job worker) since the last poll."""
+    new_cycles = cycle_manager.cycles_after(cycle_notifier.last_cycle_id)
+    if cycle_notifier.last_cycle_id is None:
+        # First poll: only remember the newest cycle
+        cycle_notifier.last_cycle_id = new_cycles[0][0] if new_cycles else 0
+        return
+
+    for cycle_id, fl_process_id in new_cycles:
+        # Cycles created by this process were already notified (see notify)
+        notify_cycle(cycle_id, fl_process_id)
+        cycle_notifier.last_cycle_id = cycle_id
+
+
+cycle_manager.on_cycle_created(
+    lambda cycle: notify_cycle(cycle.id, cycle.fl_process_id)
+)
@@ -1,4 +1,11 @@
-import queue
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds without messages before a connection is closed (0: never)
+IDLE_TIMEOUT = float(os.environ.get("MODEL_CENTRIC_SOCKET_IDLE_TIMEOUT", 3600))
 
 
 class Singleton(type):
@@ -12,33 +19,151 @@ class Singleton(type):
 
 class SocketHandler(metaclass=Singleton):
     """Socket Handler is a singleton class used to handle/manage websocket
-    connections."""
+    connections.
+
+    Workers and sockets are mapped both ways, so connections are found and
+    removed in O(1). Connections are kept ordered by last activity, idle
+    connections are closed from the oldest one without scanning the others.
+
+    Idle connections of the workers for which `keep_idle` returns True (e.g.
+    workers subscribed to new cycles, which may wait longer than the idle
+    timeout) are kept, they are checked again an idle timeout later.
+
+    Args:
+        idle_timeout: Seconds without messages before a connection is closed (0: never).
+        clock: Returns the current time in seconds.
+    """
 
-    def __init__(self):
-        self.connections = {}
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT, clock=None):
+        self.idle_timeout = idle_timeout
+        self.clock = clock or time.monotonic
+
+        # worker_id -> socket, ordered from the least recently seen
+        self.connections = OrderedDict()
+        # socket -> worker_id
+        self._workers = {}
+        # worker_id -> last time a message was received
+        self._last_seen = {}
+        # worker_id -> checked for eviction again at this time, for the idle
+        # connections that were kept
+        self._kept = {}
+        self._lock = threading.RLock()
+
+        # Called with a worker ID, holding the handler lock
+        self.keep_idle = None
 
     def new_connection(self, workerId: str, socket):
         """Create a mapping structure to establish a bond between a workerId
         and a socket descriptor.
 
+        A worker reconnecting replaces its previous socket.
+
         Args:
             workerId: Uuid string used to identify workers.
             socket: Socket descriptor that will be used to send/receive messages from this client.
         """
-        if workerId not in self.connections:
+        if socket is None:
+            return
+
+        with self._lock:
+            previous = self.connections.get(workerId)
+            if previous is not None and previous is not socket:
+                self._workers.pop(previous, None)
+            previous_worker = self._workers.get(socket)
+            if previous_worker is not None and previous_worker != workerId:
+                self._unregister(previous_worker)
+
             self.connections[workerId] = socket
+            self._workers[socket] = workerId
+            self._seen(workerId)
+
+        self.evict_idle()
 
-    def send_msg(self, workerId: str, message: str):
+    def touch(self, socket):
+        """Record activity on a connection.
+
+        Args:
+            socket: Socket descriptor that received a message.
+        """
+        with self._lock:
+            worker_id = self._workers.get(socket)
+            if worker_id is not None:
+                self._seen(worker_id)
+
+        self.evict_idle()
+
+    def last_seen(self, workerId: str):
+        """Last time a worker's connection received a message.
+
+        Args:
+            workerId: Worker's ID.
+        Returns:
+            last_seen: Time (see `clock`) or None if the worker isn't connected.
+        """
+        with self._lock:
+            return self._last_seen.get(workerId)
+
+    def is_connected(self, workerId: str) -> bool:
+        with self._lock:
+            return workerId in self.connections
+
+    def is_bound(self, workerId: str, socket) -> bool:
+        """Check if a socket is the connection of a worker.
+
+        Args:
+            workerId: Worker's ID.
+            socket: Socket descriptor.
+        Returns:
+            result: Boolean flag.
+        """
+        with self._lock:
+            return socket is not None and self.connections.get(workerId) is socket
+
+    def send_msg(self, workerId: str, message: str) -> bool:
         """Find the socket descriptor mapped by workerId and send them a
         message.
 
         Args:
             workerId: Uiid used to identify and map workers.
             message: Message that will be send.
+        Returns:
+            result: False if the worker isn't connected or the message couldn't be sent.
         """
-        socket = self.connections.get(workerId, None)
-        if socket:
+        with self._lock:
+            socket = self.connections.get(workerId, None)
+        if socket is None:
+            return False
+
+        try:
             socket.send(message)
+        except Exception as e:
+            logging.info(f"Dropping connection of worker {workerId}: {e}")
+            self.remove(socket)
+            return False
+        return True
+
+    def send_many(self, workerIds, message: str) -> int:
+        """Send the same message to several workers.
+
+        Args:
+            workerIds: Iterable of worker IDs, workers not connected are skipped.
+            message: Message that will be send.
+        Returns:
+            sent: Number of workers the message was sent to.
+        """
+        return sum(self.send_msg(worker_id, message) for worker_id in workerIds)
+
+    def broadcast(self, message: str) -> int:
+        """Send a message to every connected worker.
+
+        Args:
+            message: Message that will be send.
+        Returns:
+            sent: Number of workers the message was sent to.
+        """
+        with self._lock:
+            worker_ids = list(self.connections)
+        return self.send_many(worker_ids, message)
 
     def remove(self, socket) -> str:
         """Remove a socket descriptor from mapping structure. It will be used
@@ -47,17 +172,68 @@ class SocketHandler(metaclass=Singleton):
         Args:
             socket: socket descriptor used to send/receive messages.
         Returns:
-            workerId: Worker id linked to that connection.
+            workerId: Worker id linked to that connection (None if the
+                socket wasn't linked to a worker).
         """
-        for worker_id, skt in self.connections.items():
-            if skt == socket:
+        with self._lock:
+            worker_id = self._workers.pop(socket, None)
+            if worker_id is not None and self.connections.get(worker_id) is socket:
                 del self.connections[worker_id]
+                del self._last_seen[worker_id]
+                self._kept.pop(worker_id, None)
             return worker_id
 
+    def evict_idle(self, now: float = None) -> list:
+        """Close the connections idle for longer than the idle timeout.
+
+        Args:
+            now: Time (see `clock`).
+        Returns:
+            worker_ids: IDs of the evicted workers.
+        """
+        if not self.idle_timeout:
+            return []
+
+        now = self.clock() if now is None else now
+        evicted = []
+        with self._lock:
+            while self.connections:
+                worker_id, socket = next(iter(self.connections.items()))
+                checked = self._kept.get(worker_id, self._last_seen[worker_id])
+                if now - checked <= self.idle_timeout:
+                    break
+                if self.keep_idle is not None and self.keep_idle(worker_id):
+                    self._kept[worker_id] = now
+                    self.connections.move_to_end(worker_id)
+                    continue
+                self._unregister(worker_id)
+                evicted.append((worker_id, socket))
+
+        for worker_id, socket in evicted:
+            logging.info(f"Closing idle connection of worker {worker_id}")
+            try:
+                socket.close()
+            except Exception:
+                pass
+        return [worker_id for worker_id, _ in evicted]
+
+    def _seen(self, worker_id: str):
+        self._last_seen[worker_id] = self.clock()
+        self._kept.pop(worker_id, None)
+        self.connections.move_to_end(worker_id)
+
+    def _unregister(self, worker_id: str):
+        socket = self.connections.pop(worker_id)
+        self._last_seen.pop(worker_id, None)
+        self._kept.pop(worker_id, None)
+        if self._workers.get(socket) == worker_id:
+            del self._workers[socket]
+
     def __len__(self) -> int:
         """Number of connections handled by this server.
 
         Returns:
             length : number of connections handled by this server.
         """
-        return len(self.connections)
+        with self._lock:
+            return len(self.connections)
@@ -1,29 +1,30 @@
 # Standard Python Imports
-import io
 import json
 import logging
-from math import floor
-from random import random
-
-import numpy as np
-from flask import Response, current_app, render_template, request, send_file
-
-# External modules imports
-from requests_toolbelt import MultipartEncoder
-
-# Dependencies used by req_join endpoint
-# It's a mockup endpoint and should be removed soon.
-from scipy.stats import poisson
+from datetime import datetime
+
+from flask import (
+    Response,
+    current_app,
+    render_template,
+    request,
+    stream_with_context,
+)
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import parse_content_range_header
 
 from ...core.codes import CYCLE, MSG_FIELD, RESPONSE_MSG
 from ...core.exceptions import InvalidRequestKeyError, ModelNotFoundError, PyGridError
+from ...core.metrics import metrics
 from ...core.model_centric.auth.federated import verify_token
+from ...core.model_centric.blobs import report_uploads
 from ...core.model_centric.controller import processes
-from ...core.model_centric.cycles import cycle_manager
+from ...core.model_centric.cycles import cycle_manager, pool_selector
 from ...core.model_centric.models import model_manager
 from ...core.model_centric.processes import process_manager
+from ...core.model_centric.stats import stats_tracker
 from ...core.model_centric.syft_assets import plans, protocols
-from ...core.model_centric.workers import worker_manager
+from ...core.model_centric.workers import speed_test, worker_manager
 from ...events.model_centric.fl_events import (
     assign_worker_id,
     cycle_request,
@@ -34,6 +35,35 @@ from ...events.model_centric.fl_events import (
 # Local imports
 from .blueprint import mcfl_blueprint
 
+# Content type of the encoded checkpoint deltas
+PARAMS_DELTA_MIMETYPE = "application/vnd.pygrid.params-delta"
+
+
+def _send_asset(asset, mimetype: str = "application/octet-stream"):
+    """Send cached bytes without copying them, answering 304 Not Modified if
+    the worker already has this version (If-None-Match).
+
+    Range requests are answered with 206 Partial Content, so interrupted
+    downloads are resumed. If-Range makes the worker fall back to the whole
+    asset if it changed since the partial download.
+
+    Args:
+        asset: CachedAsset instance.
+        mimetype: Content type of the asset.
+    Returns:
+        response: Flask Response.
+    """
+    response = Response(asset.data, mimetype=mimetype)
+    response.set_etag(asset.etag)
+    # Workers may keep a copy but have to revalidate it
+    response.cache_control.no_cache = True
+    try:
+        return response.make_conditional(
+            request, accept_ranges=True, complete_length=len(asset.data)
+        )
+    except RequestedRangeNotSatisfiable as e:
+        return e.get_response()
+
 
 @mcfl_blueprint.route("/cycle-request", methods=["POST"])
 def worker_cycle_request():
@@ -59,7 +89,19 @@ def worker_cycle_request():
 
 @mcfl_blueprint.route("/speed-test", methods=["GET", "POST"])
 def connection_speed_test():
-    """Connection speed test."""
+    """Connection speed test.
+
+    - GET: download a multipart "sample" of `size` bytes (up to
+      MODEL_CENTRIC_SPEED_TEST_SIZE, 64MB by default), streamed from a
+      preallocated chunk.
+    - GET with is_ping: empty response.
+    - POST: upload, the body is read and discarded.
+
+    The upload throughput measured by the server is folded into the
+    worker's avg_upload. The server can't time downloads reliably (it only
+    sees its buffers being filled), so avg_download keeps the speed reported
+    by the worker and large downloads are only timed for the metrics.
+    """
     response_body = {}
     status_code = None
 
@@ -74,17 +116,37 @@ def connection_speed_test():
         # If GET method
         if request.method == "GET":
             if _is_ping is None:
-                # Download data sample (64MB)
-                data_sample = b"x" * 67108864  # 64 Megabyte
-                response = {"sample": data_sample}
-                form = MultipartEncoder(response)
-                return Response(form.to_string(), mimetype=form.content_type)
+                max_size = speed_test.SAMPLE_SIZE
+                size = min(max(int(request.args.get("size", max_size)), 0), max_size)
+
+                def on_complete(num_bytes, seconds):
+                    throughput = speed_test.kbps(num_bytes, seconds)
+                    if throughput is not None:
+                        metrics.observe(
+                            speed_test.SPEED_TEST_KBPS,
+                            throughput,
+                            direction="avg_download",
+                        )
+
+                sample = speed_test.SpeedTestSample(
+                    size,
+                    on_complete=(
+                        on_complete if size >= speed_test.MIN_TIMED_DOWNLOAD else None
+                    ),
+                )
+                response = Response(
+                    stream_with_context(iter(sample)), mimetype=sample.content_type
+                )
+                response.content_length = sample.content_length
+                return response
             else:
                 status_code = 200  # Success
         elif request.method == "POST":  # Otherwise, it's POST method
+            num_bytes, seconds = speed_test.drain(request.stream)
+            _record_speed(_worker_id, "avg_upload", num_bytes, seconds)
             status_code = 200  # Success
 
-    except PyGridError as e:
+    except (PyGridError, ValueError) as e:
         status_code = 400  # Bad Request
         response_body[RESPONSE_MSG.ERROR] = str(e)
     except Exception as e:
@@ -96,18 +158,157 @@ def connection_speed_test():
     )
 
 
+def _record_speed(worker_id: str, field: str, num_bytes: int, seconds: float):
+    """Fold an upload speed test measured by the server into the worker's averages.
+
+    Args:
+        worker_id: Worker's ID.
+        field: Worker column (avg_download or avg_upload).
+        num_bytes: Bytes transferred.
+        seconds: Transfer time.
+    """
+    throughput = speed_test.kbps(num_bytes, seconds)
+    if throughput is None:
+        return
+
+    metrics.observe(speed_test.SPEED_TEST_KBPS, throughput, direction=field)
+    worker = worker_manager.first(id=worker_id)
+    if worker is not None:
+        stats_tracker.record_worker_speed(worker, **{field: throughput})
+
+
 @mcfl_blueprint.route("/report", methods=["POST"])
 def report_diff():
     """Allows reporting of (agg/non-agg) model diff after worker completes a
-    cycle."""
+    cycle.
+
+    The diff can be sent as:
+        - application/json: {"worker_id", "request_key", "diff": <base64>}.
+        - application/octet-stream: raw diff as body,
+          worker_id and request_key as query parameters.
+        - multipart/form-data: worker_id and request_key fields, raw diff as "diff" file.
+    Binary uploads are streamed into the blob store without being decoded in memory.
+    Bodies larger than MODEL_CENTRIC_MAX_DIFF_SIZE bytes are refused, as well
+    as the workers that already reported in this cycle.
+    """
     response_body = {}
     status_code = None
 
     try:
-        body = json.loads(request.data)
+        report_uploads.check_size(request.content_length)
+        if request.mimetype == "application/octet-stream":
+            body = {
+                MSG_FIELD.WORKER_ID: request.args.get(MSG_FIELD.WORKER_ID),
+                CYCLE.KEY: request.args.get(CYCLE.KEY),
+                CYCLE.DIFF: request.stream,
+            }
+        elif request.mimetype == "multipart/form-data":
+            diff = request.files.get(CYCLE.DIFF)
+            if diff is None:
+                raise PyGridError("Missing diff file!")
+            body = {
+                MSG_FIELD.WORKER_ID: request.form.get(MSG_FIELD.WORKER_ID),
+                CYCLE.KEY: request.form.get(CYCLE.KEY),
+                CYCLE.DIFF: diff.stream,
+            }
+        else:
+            body = json.loads(request.data)
+
+        if not cycle_manager.can_report(
+            body.get(MSG_FIELD.WORKER_ID), body.get(CYCLE.KEY)
+        ):
+            raise InvalidRequestKeyError
+
         result = report({MSG_FIELD.DATA: body}, None)
         response_body = result.get(MSG_FIELD.DATA)
-    except (PyGridError, json.decoder.JSONDecodeError) as e:
+    except InvalidRequestKeyError as e:
+        status_code = 401  # Unauthorized
+        response_body[RESPONSE_MSG.ERROR] = str(e)
+    except (PyGridError, ValueError) as e:
+        # Including JSON decoding errors and oversized bodies
+        status_code = 400  # Bad Request
+        response_body[RESPONSE_MSG.ERROR] = str(e)
+    except Exception as e:
+        status_code = 500  # Internal Server Error
+        response_body[RESPONSE_MSG.ERROR] = str(e)
+
+    response_body = json.dumps(response_body)
+    return Response(response_body, status=status_code, mimetype="application/json")
+
+
+@mcfl_blueprint.route("/report", methods=["PUT"])
+def report_diff_chunk():
+    """Resumable report: the diff is uploaded in chunks, each sent as
+    application/octet-stream with worker_id and request_key as query
+    parameters and a `Content-Range: bytes <first>-<last>/<total>` header.
+
+    Until the diff is complete, the server answers 308 with a
+    `Range: bytes=0-<last received byte>` header (absent if nothing was
+    received), so a worker resumes an interrupted upload from there.
+    `Content-Range: bytes */<total>` with an empty body only queries the
+    received range. The last chunk is answered as a regular report, or
+    with a 404 if a concurrent request (e.g. a replayed last chunk) already
+    reported the upload.
+
+    Every chunk has to announce the same total, at most
+    MODEL_CENTRIC_MAX_DIFF_SIZE bytes (1GB by default), a chunk starting
+    at 0 with another total restarts the upload.
+    """
+    response_body = {}
+    status_code = None
+
+    try:
+        worker_id = request.args.get(MSG_FIELD.WORKER_ID)
+        request_key = request.args.get(CYCLE.KEY)
+        content_range = parse_content_range_header(request.headers.get("Content-Range"))
+        if (
+            content_range is None
+            or content_range.units != "bytes"
+            or content_range.length is None
+        ):
+            raise PyGridError("Missing or invalid Content-Range header!")
+
+        if not cycle_manager.can_report(worker_id, request_key):
+            raise InvalidRequestKeyError
+
+        upload_key = f"{worker_id}:{request_key}"
+        if content_range.start is None:
+            report_uploads.check_size(content_range.length)
+            offset = report_uploads.offset(upload_key)
+        else:
+            offset = report_uploads.append(
+                upload_key,
+                content_range.start,
+                request.stream,
+                content_range.stop - content_range.start,
+                total=content_range.length,
+            )
+
+        if offset < content_range.length:
+            response = Response(status=308)
+            if offset:
+                response.headers["Range"] = f"bytes=0-{offset - 1}"
+            return response
+
+        try:
+            diff = report_uploads.claim(upload_key)
+        except FileNotFoundError:
+            # Reported meanwhile by a concurrent request
+            status_code = 404  # Not Found
+            response_body[RESPONSE_MSG.ERROR] = "Upload not found!"
+        else:
+            with diff:
+                body = {
+                    MSG_FIELD.WORKER_ID: worker_id,
+                    CYCLE.KEY: request_key,
+                    CYCLE.DIFF: diff,
+                }
+                result = report({MSG_FIELD.DATA: body}, None)
+            response_body = result.get(MSG_FIELD.DATA)
+    except InvalidRequestKeyError as e:
+        status_code = 401  # Unauthorized
+        response_body[RESPONSE_MSG.ERROR] = str(e)
+    except (PyGridError, ValueError) as e:
         status_code = 400  # Bad Request
         response_body[RESPONSE_MSG.ERROR] = str(e)
     except Exception as e:
@@ -157,7 +358,16 @@ def download_protocol():
 
 @mcfl_blueprint.route("/get-model", methods=["GET"])
 def download_model():
-    """Request a download of a model."""
+    """Request a download of a model.
+
+    Workers holding a previous checkpoint can send its number as
+    `checkpoint`. If a delta from that checkpoint was stored
+    ("checkpoint_deltas" server config), the encoded delta is sent instead
+    of the whole checkpoint (see models.param_encoding), with the
+    X-Checkpoint-Base header set. X-Checkpoint-Number is the number of the
+    checkpoint sent. With quantized deltas, every `full_every`-th checkpoint
+    is sent in full, so the workers' copies don't drift.
+    """
 
     response_body = {}
     status_code = None
@@ -165,6 +375,7 @@ def download_model():
         worker_id = request.args.get("worker_id", None)
         request_key = request.args.get("request_key", None)
         model_id = request.args.get("model_id", None)
+        base_number = request.args.get("checkpoint", None, type=int)
 
         # Retrieve Process Entities
         _model = model_manager.get(id=model_id)
@@ -177,9 +388,19 @@ def download_model():
 
         _last_checkpoint = model_manager.load(model_id=model_id)
 
-        return send_file(
-            io.BytesIO(_last_checkpoint.value), mimetype="application/octet-stream"
-        )
+        _delta = None
+        if base_number is not None and base_number != _last_checkpoint.number:
+            _delta = model_manager.load_delta(_last_checkpoint, base_number)
+
+        if _delta is not None:
+            response = _send_asset(
+                model_manager.download_delta(_delta), mimetype=PARAMS_DELTA_MIMETYPE
+            )
+            response.headers["X-Checkpoint-Base"] = str(_delta.base_number)
+        else:
+            response = _send_asset(model_manager.download(_last_checkpoint))
+        response.headers["X-Checkpoint-Number"] = str(_last_checkpoint.number)
+        return response
 
     except InvalidRequestKeyError as e:
         status_code = 401  # Unauthorized
@@ -210,7 +431,9 @@ def download_plan():
         receive_operations_as = request.args.get("receive_operations_as", None)
 
         # Retrieve Process Entities
-        _plan = process_manager.get_plan(id=plan_id, is_avg_plan=False)
+        _plan = process_manager.get_plan(
+            id=plan_id, is_avg_plan=False, defer_binary=True
+        )
         _cycle = cycle_manager.last(fl_process_id=_plan.fl_process_id)
         _worker = worker_manager.get(id=worker_id)
         _accepted = cycle_manager.validate(_worker.id, _cycle.id, request_key)
@@ -218,16 +441,7 @@ def download_plan():
         if not _accepted:
             raise InvalidRequestKeyError
 
-        status_code = 200  # Success
-
-        if receive_operations_as == "torchscript":
-            response_body = _plan.value_ts
-        elif receive_operations_as == "tfjs":
-            response_body = _plan.value_tfjs
-        else:
-            response_body = _plan.value
-
-        return send_file(io.BytesIO(response_body), mimetype="application/octet-stream")
+        return _send_asset(plans.download(_plan, receive_operations_as))
 
     except InvalidRequestKeyError as e:
         status_code = 401  # Unauthorized
@@ -280,184 +494,97 @@ def auth():
 
 @mcfl_blueprint.route("/req-join", methods=["GET"])
 def fl_cycle_application_decision():
-    """use the temporary req_join endpoint to mockup:
-
-    - reject if worker does not satisfy 'minimum_upload_speed' and/or 'minimum_download_speed'
-    - is a part of current or recent cycle according to 'do_not_reuse_workers_until_cycle'
-    - selects according to pool_selection
-    - is under max worker (with some padding to account for expected percent of workers so do not report successfully)
+    """Decide whether a worker should request to join the current cycle.
+
+    The worker is rejected if:
+        - it doesn't satisfy 'minimum_upload_speed' and/or 'minimum_download_speed'.
+        - it's already assigned to the current cycle, or took part in a recent
+          cycle according to 'do_not_reuse_workers_until_cycle'.
+        - the process already ran 'num_cycles' cycles, or less than
+          'minimum_cycle_time_left' seconds are left in the current cycle.
+        - the cycle has no free slots ('max_workers', padded by the failure rate).
+    Otherwise it's selected according to 'pool_selection': "iterate" accepts
+    every worker while there are free slots, "random" rejects workers with the
+    probability computed by the pool selector (see PoolSelector).
     """
+    accepted = False
 
-    # parse query strings (for now), eventually this will be parsed from the request body
-    model_id = request.args.get("model_id")
-    up_speed = request.args.get("up_speed")
-    down_speed = request.args.get("down_speed")
-    worker_id = request.args.get("worker_id")
-    worker_ping = request.args.get("ping")
-    _cycle = cycle_manager.last(model_id)
-    _accept = False
-    """
-    MVP variable stubs:
-        we will stub these with hard coded numbers first, then make functions to dynaically query/update in subsquent PRs
-    """
-    # this will be replaced with a function that check for the same (model_id, version_#) tuple when the worker last participated
-    last_participation = 1
-    # how late is too late into the cycle time to give a worker "new work", if only 5 seconds left probably don't bother, set this intelligently later
-    MINIMUM_CYCLE_TIME_LEFT = 500
-    # the historical amount of workers that fail to report (out of time, offline, too slow etc...),
-    # could be modified to be worker/model specific later, track across overall pygrid instance for now
-    EXPECTED_FAILURE_RATE = 0.2
-
-    dummy_server_config = {
-        "max_workers": 100,
-        "pool_selection": "random",  # or "iterate"
-        "num_cycles": 5,
-        "do_not_reuse_workers_until_cycle": 4,
-        "cycle_length": 8 * 60 * 60,  # 8 hours
-        "minimum_upload_speed": 2000,  # 2 mbps
-        "minimum_download_speed": 4000,  # 4 mbps
-    }
-    """  end of variable stubs """
-
-    _server_config = dummy_server_config
-
-    up_speed_check = up_speed > _server_config["minimum_upload_speed"]
-    down_speed_check = down_speed > _server_config["minimum_download_speed"]
-    cycle_valid_check = (
-        (
-            last_participation + _server_config["do_not_reuse_workers_until_cycle"]
-            >= _cycle.get(
-                "cycle_sequence", 99999
-            )  # this should reuturn current cycle sequence number
+    try:
+        worker_id = request.args.get(MSG_FIELD.WORKER_ID, None)
+        name = request.args.get(MSG_FIELD.MODEL, None)
+        version = request.args.get(CYCLE.VERSION, None)
+        up_speed = float(request.args.get("up_speed", 0))
+        down_speed = float(request.args.get("down_speed", 0))
+
+        if not worker_id or not name:
+            raise PyGridError
+
+        fl_process = process_manager.descriptor(name, version)
+        server_config = fl_process.server_config
+        stats_tracker.record_request(fl_process.id)
+
+        _cycle, assigned, completed_cycles = cycle_manager.assignment_state(
+            fl_process.id, worker_id
         )
-        * (_cycle.get("cycle_sequence", 99999) <= _server_config["num_cycles"])
-        * (_cycle.cycle_time > MINIMUM_CYCLE_TIME_LEFT)
-        * (worker_id not in _cycle._workers)
-    )
 
-    if up_speed_check * down_speed_check * cycle_valid_check:
-        if _server_config["pool_selection"] == "iterate" and len(
-            _cycle._workers
-        ) < _server_config["max_workers"] * (1 + EXPECTED_FAILURE_RATE):
-            """first come first serve selection mode."""
-            _accept = True
-        elif _server_config["pool_selection"] == "random":
-            """probabilistic model for rejection rate:
-
-                - model the rate of worker's request to join as lambda in a poisson process
-                - set probabilistic reject rate such that we can expect enough workers will request to join and be accepted
-                    - between now and ETA till end of _server_config['cycle_length']
-                    - such that we can expect (,say with 95% confidence) successful completion of the cycle
-                    - while accounting for EXPECTED_FAILURE_RATE (% of workers that join cycle but never successfully report diff)
-
-            EXPECTED_FAILURE_RATE = moving average with exponential decay based on historical data (maybe: noised up weights for security)
-
-            k' = max_workers * (1+EXPECTED_FAILURE_RATE) # expected failure adjusted max_workers = var: k_prime
-
-            T_left = T_cycle_end - T_now # how much time is left (in the same unit as below)
-
-            normalized_lambda_actual = (recent) historical rate of request / unit time
-
-            lambda' = number of requests / unit of time that would satisfy the below equation
-
-            probability of receiving at least k' requests per unit time:
-                P(K>=k') = 0.95 = e ^ ( - lambda' * T_left) * ( lambda' * T_left) ^ k' / k'! = 1 - P(K<k')
-
-            var: lambda_approx = lambda' * T_left
-
-            solve for lambda':
-                use numerical approximation (newton's method) or just repeatedly call prob = poisson.sf(x, lambda') via scipy
-
-            reject_probability = 1 - lambda_approx / (normalized_lambda_actual * T_left)
-            """
-
-            # time base units = 1 hr, assumes lambda_actual and lambda_approx have the same unit as T_left
-            k_prime = _server_config["max_workers"] * (1 + EXPECTED_FAILURE_RATE)
-            T_left = _cycle.get("cycle_time", 0)
-
-            # TODO: remove magic number = 5 below... see block comment above re: how
-            normalized_lambda_actual = 5
-            lambda_actual = (
-                normalized_lambda_actual * T_left
-            )  # makes lambda_actual have same unit as lambda_approx
-            # @hyperparam: valid_range => (0, 1) | (+) => more certainty to have completed cycle, (-) => more efficient use of worker as computational resource
-            confidence = 0.95  # P(K>=k')
-            pois = lambda l: poisson.sf(k_prime, l) - confidence
-            """
-            _bisect_approximator because:
-                - solving for lambda given P(K>=k') has no algebraic solution (that I know of) => need approxmiation
-                - scipy's optimizers are not stable for this problem (I tested a few) => need custom approxmiation
-                - at this MVP stage we are not likely to experince performance problems, binary search is log(N)
-            refactor notes:
-                - implmenting a smarter approximiator using lambert's W or newton's methods will take more time
-                - if we do need to scale then we can refactor to the above ^
-            """
-            # @hyperparam: valid_range => (0, 1) | (+) => get a faster but lower quality approximation
-            _search_tolerance = 0.01
-
-            def _bisect_approximator(arr, search_tolerance=_search_tolerance):
-                """uses binary search to find lambda_actual within
-                search_tolerance."""
-                n = len(arr)
-                L = 0
-                R = n - 1
-
-                while L <= R:
-                    mid = floor((L + R) / 2)
-                    if pois(arr[mid]) > 0 and pois(arr[mid]) < search_tolerance:
-                        return mid
-                    elif pois(arr[mid]) > 0 and pois(arr[mid]) > search_tolerance:
-                        R = mid - 1
-                    else:
-                        L = mid + 1
-                return None
-
-            """
-            if the number of workers is relatively small:
-                - approximiation methods is not neccessary / we can find exact solution fast
-                - and search_tolerance is not guaranteed because lambda has to be int()
-            """
-            if k_prime < 50:
-                lambda_approx = np.argmin(
-                    [abs(pois(x)) for x in range(floor(k_prime * 3))]
-                )
-            else:
-                lambda_approx = _bisect_approximator(range(floor(k_prime * 3)))
+        now = datetime.now()
+        time_left = (_cycle.end - now).total_seconds() if _cycle.end else None
+        last_participation = cycle_manager.last_participation(fl_process, worker_id)
+        reuse_after = server_config.get("do_not_reuse_workers_until_cycle", 0)
+
+        eligible = (
+            up_speed >= server_config.get("minimum_upload_speed", 0)
+            and down_speed >= server_config.get("minimum_download_speed", 0)
+            and not assigned
+            and completed_cycles < server_config.get("num_cycles", completed_cycles + 1)
+            and (
+                time_left is None
+                or time_left > server_config.get("minimum_cycle_time_left", 0)
+            )
+            and (
+                not last_participation
+                or last_participation + reuse_after < _cycle.sequence
+            )
+        )
 
-            rej_prob = (
-                (1 - lambda_approx / lambda_actual)
-                if lambda_actual > lambda_approx
-                else 0  # don't reject if we expect to be short on worker requests
+        # Same slot count as the cycle requests
+        slots = cycle_manager.slots(_cycle, server_config)
+        assigned_workers = _cycle.assigned_workers or 0
+
+        if not eligible:
+            pass
+        elif slots is None:
+            # Unlimited cycle
+            accepted = True
+        elif server_config.get("pool_selection", "random") == "iterate":
+            # First come, first served
+            accepted = assigned_workers < slots
+        elif time_left is None:
+            # Nothing to pace the requests against
+            accepted = assigned_workers < slots
+        else:
+            accepted = pool_selector.admit(
+                _cycle.id,
+                slots - assigned_workers,
+                time_left,
+                slots,
+                server_config["cycle_length"],
+                stats_tracker.arrival_rate(fl_process.id),
             )
+    except (PyGridError, ValueError):
+        # Unknown process, no open cycle or invalid speeds
+        accepted = False
 
-            # additional security:
-            if (
-                k_prime > 50
-                and abs(poisson.sf(k_prime, lambda_approx) - confidence)
-                > _search_tolerance
-            ):
-                """something went wrong, fall back to safe default."""
-                rej_prob = 0.1
-                WARN = "_bisect_approximator failed unexpectedly, reset rej_prob to default"
-                logging.exception(WARN)  # log error
-
-            if random.random_sample() < rej_prob:
-                _accept = True
-
-    if _accept:
+    if accepted:
         return Response(
-            json.dumps(
-                {"status": "accepted"}
-            ),  # leave out other accpet keys/values for now
+            json.dumps({CYCLE.STATUS: CYCLE.ACCEPTED}),
             status=200,
             mimetype="application/json",
         )
 
     # reject by default
     return Response(
-        json.dumps(
-            {"status": "rejected"}
-        ),  # leave out other accpet keys/values for now
+        json.dumps({CYCLE.STATUS: CYCLE.REJECTED}),
         status=400,
         mimetype="application/json",
     )
@@ -492,9 +619,7 @@ def get_model():
         logging.info(f"Looking for checkpoint: {checkpoint_query}")
         _model_checkpoint = model_manager.load(**checkpoint_query)
 
-        return send_file(
-            io.BytesIO(_model_checkpoint.value), mimetype="application/octet-stream"
-        )
+        return _send_asset(model_manager.download(_model_checkpoint))
 
     except ModelNotFoundError as e:
         status_code = 404
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import sqlalchemy as sa
+
+from src.main.core.database.migrations import add_missing_indexes
+
+TABLE = "model_centric_worker_cycle"
+
+
+def _database(rows):
+    engine = sa.create_engine("sqlite://")
+
+    # Table created by a previous version, without indexes
+    previous = sa.MetaData()
+    sa.Table(
+        TABLE,
+        previous,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("worker_id", sa.String(255)),
+        sa.Column("cycle_id", sa.Integer),
+        sa.Column("is_completed", sa.Boolean),
+    )
+    previous.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(previous.tables[TABLE].insert(), rows)
+
+    current = sa.MetaData()
+    sa.Table(
+        TABLE,
+        current,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("worker_id", sa.String(255)),
+        sa.Column("cycle_id", sa.Integer),
+        sa.Column("is_completed", sa.Boolean),
+        sa.Index("ix_worker_cycle", "worker_id", "cycle_id", unique=True),
+        sa.Index("ix_cycle_completed", "cycle_id", "is_completed"),
+    )
+    return SimpleNamespace(engine=engine, metadata=current)
+
+
+def _indexes(db):
+    return {index["name"] for index in sa.inspect(db.engine).get_indexes(TABLE)}
+
+
+def test_add_missing_indexes():
+    db = _database([{"worker_id": "a", "cycle_id": 1, "is_completed": False}])
+
+    add_missing_indexes(db, [TABLE])
+    assert _indexes(db) == {"ix_worker_cycle", "ix_cycle_completed"}
+
+    # Running it again is a no-op
+    add_missing_indexes(db, [TABLE])
+
+
+def test_unique_index_with_duplicated_rows_is_skipped():
+    row = {"worker_id": "a", "cycle_id": 1, "is_completed": False}
+    db = _database([row, row])
+
+    add_missing_indexes(db, [TABLE])
+    assert _indexes(db) == {"ix_cycle_completed"}
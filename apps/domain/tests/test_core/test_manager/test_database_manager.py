@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from src.main.core.manager.database_manager import DatabaseManager
+
+Base = declarative_base()
+
+
+class Entry(Base):
+    __tablename__ = "entry"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    name = sa.Column(sa.String(64))
+    rank = sa.Column(sa.Integer)
+    value = sa.Column(sa.LargeBinary)
+
+
+class EntryManager(DatabaseManager):
+    schema = Entry
+
+    def __init__(self, database):
+        self._schema = EntryManager.schema
+        self.db = database
+
+
+@pytest.fixture
+def entries():
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return EntryManager(SimpleNamespace(session=sessionmaker(bind=engine)()))
+
+
+def _register(entries, *rows):
+    for name, rank in rows:
+        entries.register(name=name, rank=rank, value=name.encode())
+    entries.db.session.expunge_all()
+
+
+def test_latest_of_empty_table(entries):
+    assert entries.latest() is None
+    assert entries.latest(order_by="rank") is None
+    assert entries.last() is None
+
+
+def test_latest(entries):
+    _register(entries, ("a", 3), ("b", 1), ("a", 2))
+
+    assert entries.latest().id == 3
+    assert entries.latest(name="a").rank == 2
+    assert entries.latest(order_by="rank").name == "a"
+    assert entries.latest(order_by="rank", name="b").id == 2
+    assert entries.latest(name="c") is None
+
+
+def test_last(entries):
+    _register(entries, ("a", 1), ("a", 2))
+
+    assert entries.last(name="a").id == 2
+    assert entries.last(name="b") is None
+
+
+def test_latest_defers_binary_columns(entries):
+    _register(entries, ("a", 1))
+
+    entry = entries.latest()
+    assert "value" not in entry.__dict__
+    # Loaded when accessed
+    assert entry.value == b"a"
+
+    entries.db.session.expunge_all()
+    assert "value" in entries.latest(defer_binary=False).__dict__
@@ -0,0 +1,89 @@
+import pytest
+import torch as th
+
+from src.main.core.model_centric.cycles.aggregator import DiffAccumulator
+from src.main.core.model_centric.models import param_encoding
+from src.main.core.model_centric.models.flat_params import FlatParams
+
+
+def _diff(value):
+    return [th.full((2, 3), float(value)), th.full((3,), float(value))]
+
+
+def test_average_running_sum():
+    accumulator = DiffAccumulator()
+
+    for worker_cycle_id, value in enumerate([1, 2, 3, 6]):
+        assert accumulator.add(worker_cycle_id, _diff(value))
+
+    assert accumulator.count == 4
+
+    diff_avg = accumulator.average().tensors()
+    assert len(diff_avg) == 2
+    assert th.equal(diff_avg[0], th.full((2, 3), 3.0))
+    assert th.equal(diff_avg[1], th.full((3,), 3.0))
+
+
+def test_duplicated_worker_cycle_is_ignored():
+    accumulator = DiffAccumulator()
+
+    assert accumulator.add(1, _diff(2))
+    assert not accumulator.add(1, _diff(10))
+    assert 1 in accumulator
+    assert accumulator.count == 1
+    assert th.equal(accumulator.average().tensors()[0], th.full((2, 3), 2.0))
+
+
+def test_empty_accumulator():
+    assert DiffAccumulator().average() is None
+
+
+def test_stale_report():
+    accumulator = DiffAccumulator()
+    accumulator.add(1, _diff(1), checksum="first")
+
+    assert not accumulator.is_stale(1, "first")
+    assert not accumulator.is_stale(2, "other")
+    assert accumulator.is_stale(1, "second")
+
+
+def test_encoded_diffs():
+    accumulator = DiffAccumulator(FlatParams.from_tensors(_diff(0)).layout)
+    encoded = param_encoding.encode(FlatParams.from_tensors(_diff(4)), "fp16", "zlib")
+
+    # Encoded and raw diffs can be mixed
+    assert accumulator.add(1, encoded)
+    assert accumulator.add(2, _diff(2))
+    assert th.equal(accumulator.average().tensors()[1], th.full((3,), 3.0))
+
+
+def test_average_keeps_running_sum():
+    accumulator = DiffAccumulator()
+    accumulator.add(1, _diff(2))
+    accumulator.add(2, _diff(4))
+
+    # A retried cycle completion averages the same accumulator again
+    first = accumulator.average().tensors()
+    second = accumulator.average().tensors()
+    assert th.equal(first[0], th.full((2, 3), 3.0))
+    assert th.equal(second[0], th.full((2, 3), 3.0))
+
+    # More diffs can still be folded afterwards
+    accumulator.add(3, _diff(6))
+    assert th.equal(accumulator.average().tensors()[1], th.full((3,), 4.0))
+
+
+def test_diffs_have_the_model_layout():
+    accumulator = DiffAccumulator(FlatParams.from_tensors(_diff(0)).layout)
+    other = FlatParams.from_tensors([th.full((3, 2), 1.0), th.full((3,), 1.0)])
+
+    with pytest.raises(ValueError):
+        accumulator.add(1, param_encoding.encode(other, "fp32", "none"))
+    with pytest.raises(ValueError):
+        accumulator.add(2, other.tensors())
+    with pytest.raises(ValueError):
+        DiffAccumulator().add(3, param_encoding.encode(other, "fp32", "none"))
+
+    assert accumulator.count == 0
+    assert accumulator.add(4, _diff(2))
+    assert th.equal(accumulator.average().tensors()[0], th.full((2, 3), 2.0))
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from src.main.core.model_centric.blobs import (
+    APP_ROOT,
+    FileSystemBlobStore,
+    create_blob_store,
+    default_blob_url,
+    default_data_dir,
+)
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    return FileSystemBlobStore(str(tmp_path))
+
+
+def test_put_and_get(blob_store):
+    data = b"model diff" * 1024
+    blob = blob_store.put(data, namespace="diffs")
+
+    assert blob.size == len(data)
+    assert blob.checksum == hashlib.sha256(data).hexdigest()
+    assert blob.key == f"diffs/{blob.checksum[:2]}/{blob.checksum}"
+    assert blob_store.get(blob.key) == data
+    assert bytes(blob_store.view(blob.key)) == data
+
+    with blob_store.open(blob.key) as blob_file:
+        assert blob_file.read() == data
+
+
+def test_content_addressing(blob_store):
+    first = blob_store.put(b"same content", namespace="checkpoints")
+    second = blob_store.put(bytearray(b"same content"), namespace="checkpoints")
+
+    assert first == second
+
+
+def test_put_stream(blob_store):
+    data = b"streamed diff" * 100000
+    blob = blob_store.put_stream(io.BytesIO(data), namespace="diffs")
+
+    assert blob == blob_store.put(data, namespace="diffs")
+    assert blob_store.get(blob.key) == data
+
+    # Storing it again keeps a single copy
+    assert blob_store.put_stream(io.BytesIO(data), namespace="diffs") == blob
+
+
+def test_empty_blob(blob_store):
+    blob = blob_store.put(b"", namespace="diffs")
+
+    assert blob.size == 0
+    assert blob_store.get(blob.key) == b""
+
+
+def test_missing_and_deleted_blob(blob_store):
+    blob = blob_store.put(b"to be removed", namespace="diffs")
+    blob_store.delete(blob.key)
+    blob_store.delete(blob.key)
+
+    with pytest.raises(KeyError):
+        blob_store.get(blob.key)
+
+
+def test_create_blob_store(tmp_path):
+    store = create_blob_store(f"file://{tmp_path}")
+    assert isinstance(store, FileSystemBlobStore)
+
+    with pytest.raises(ValueError):
+        create_blob_store("ftp://somewhere")
+
+
+def test_default_blob_url_is_next_to_the_database():
+    assert default_blob_url("sqlite:////var/lib/pygrid/grid.db") == (
+        "file:///var/lib/pygrid/blobs"
+    )
+    # Relative SQLite paths are resolved from the app directory
+    assert default_blob_url("sqlite:///nodedatabase.db") == (
+        "file://" + os.path.join(APP_ROOT, "blobs")
+    )
+    assert default_blob_url("postgresql://user@host/grid") == (
+        "file://" + os.path.join(APP_ROOT, "blobs")
+    )
+
+
+def test_default_data_dir():
+    assert default_data_dir("sqlite:////var/lib/pygrid/grid.db") == "/var/lib/pygrid"
+    assert default_data_dir("sqlite://") == APP_ROOT
@@ -0,0 +1,85 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+import torch as th
+from sqlalchemy.orm import sessionmaker
+
+from src.main.core.model_centric.blobs import FileSystemBlobStore
+from src.main.core.model_centric.models import param_encoding
+from src.main.core.model_centric.models.ai_model import Model, ModelCheckPoint
+from src.main.core.model_centric.models.flat_params import FlatParams
+from src.main.core.model_centric.models.model_manager import ModelManager
+
+ai_model_module = importlib.import_module("src.main.core.model_centric.models.ai_model")
+
+
+def _params(value):
+    return FlatParams.from_tensors([th.full((2, 3), float(value)), th.full((3,), 1.0)])
+
+
+def _encoded(value):
+    return param_encoding.encode(_params(value), "fp32", "none")
+
+
+@pytest.fixture
+def models(monkeypatch, tmp_path):
+    engine = sa.create_engine("sqlite://")
+    tables = [
+        table
+        for name, table in Model.metadata.tables.items()
+        if name.startswith("model_centric_")
+    ]
+    Model.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    monkeypatch.setattr(
+        ai_model_module, "blob_store", FileSystemBlobStore(str(tmp_path))
+    )
+
+    model = Model(checkpoint_count=1)
+    session.add(model)
+    session.flush()
+    session.add(
+        ModelCheckPoint(model_id=model.id, value=_encoded(10), number=1, alias="latest")
+    )
+    session.commit()
+    return ModelManager(SimpleNamespace(session=session)), model.id
+
+
+def test_delta_of_the_averaged_diff(models, monkeypatch):
+    models, model_id = models
+
+    def unserialize_model_params(value, flat=False):
+        raise AssertionError("The checkpoints were deserialized")
+
+    monkeypatch.setattr(models, "unserialize_model_params", unserialize_model_params)
+    checkpoint = models.save(model_id, _encoded(7), deltas=True, diff=_params(3))
+
+    delta = param_encoding.decode(models.load_delta(checkpoint, 1).value)
+    assert th.equal(delta.tensors()[0], th.full((2, 3), -3.0))
+    assert th.equal(delta.tensors()[1], th.zeros(3))
+
+
+def test_quantized_deltas_are_chained_up_to_a_full_checkpoint(models):
+    models, model_id = models
+
+    checkpoints = [
+        models.save(model_id, _encoded(10 - number), deltas={"quantization": "int8"})
+        for number in range(2, 12)
+    ]
+
+    sent_in_full = [
+        checkpoint.number
+        for checkpoint in checkpoints
+        if models.load_delta(checkpoint, checkpoint.number - 1) is None
+    ]
+    assert sent_in_full == [ModelManager.LOSSY_DELTAS_FULL_EVERY]
+
+
+def test_lossless_deltas_are_always_chained(models):
+    models, model_id = models
+
+    for number in range(2, 12):
+        checkpoint = models.save(model_id, _encoded(10 - number), deltas=True)
+        assert models.load_delta(checkpoint, number - 1) is not None
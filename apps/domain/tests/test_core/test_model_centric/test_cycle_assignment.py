@@ -0,0 +1,162 @@
+import importlib
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from src.main.core.model_centric.cycles.cycle import Cycle
+from src.main.core.model_centric.cycles.worker_cycle import WorkerCycle
+from src.main.core.model_centric.workers.worker import Worker
+
+cycle_manager_module = importlib.import_module(
+    "src.main.core.model_centric.cycles.cycle_manager"
+)
+
+PROCESS = SimpleNamespace(id=1)
+
+
+@pytest.fixture
+def manager():
+    engine = sa.create_engine("sqlite://")
+    tables = [
+        table
+        for name, table in Cycle.metadata.tables.items()
+        if name.startswith("model_centric_")
+    ]
+    Cycle.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+
+    manager = cycle_manager_module.CycleManager(SimpleNamespace(session=session))
+    session.add_all([Worker(id="a"), Worker(id="b")])
+    session.commit()
+    return manager
+
+
+def _cycle(manager, sequence):
+    cycle = Cycle(
+        start=datetime.now(), sequence=sequence, version="1.0", fl_process_id=1
+    )
+    manager.db.session.add(cycle)
+    manager.db.session.commit()
+    return cycle
+
+
+def _join_elsewhere(manager, cycle, worker_id):
+    """Worker cycle inserted by another server process."""
+    manager.db.session.add(
+        WorkerCycle(worker_id=worker_id, cycle_id=cycle.id, request_key=worker_id)
+    )
+    manager.db.session.commit()
+
+
+def test_last_participation(manager):
+    assert manager.last_participation(PROCESS, "a") == 0
+
+    manager.assign(Worker(id="a"), _cycle(manager, 1), "key")
+    _join_elsewhere(manager, _cycle(manager, 2), "b")
+
+    assert manager.last_participation(PROCESS, "a") == 1
+    assert manager.last_participation(PROCESS, "b") == 2
+    assert manager.last_participation(SimpleNamespace(id=2), "a") == 0
+
+
+def test_participation_cache_expires(manager, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cycle_manager_module.time, "monotonic", lambda: now[0])
+
+    _join_elsewhere(manager, _cycle(manager, 1), "a")
+    assert manager.last_participation(PROCESS, "a") == 1
+
+    # Cached until the entry expires
+    _join_elsewhere(manager, _cycle(manager, 2), "a")
+    assert manager.last_participation(PROCESS, "a") == 1
+
+    now[0] += manager._participations_ttl
+    assert manager.last_participation(PROCESS, "a") == 2
+
+
+def test_participation_cache_is_cleared_with_the_cycles(manager):
+    _join_elsewhere(manager, _cycle(manager, 1), "a")
+    assert manager.last_participation(PROCESS, "a") == 1
+
+    manager.db.session.query(WorkerCycle).delete()
+    manager.delete(fl_process_id=1)
+    assert manager.last_participation(PROCESS, "a") == 0
+
+
+def test_participation_cache_size(manager):
+    manager._participations_max_size = 1
+    manager.last_participation(PROCESS, "a")
+    manager.last_participation(PROCESS, "b")
+    assert list(manager._participations) == [(1, "b")]
+
+
+def _assigned_workers(manager, cycle_id):
+    return (
+        manager.db.session.query(Cycle.assigned_workers).filter_by(id=cycle_id).scalar()
+    )
+
+
+def _worker_cycles(manager, cycle_id):
+    return manager.db.session.query(WorkerCycle).filter_by(cycle_id=cycle_id).count()
+
+
+def test_full_cycle_is_refused(manager):
+    cycle = _cycle(manager, 1)
+    cycle_id = cycle.id
+
+    assert manager.assign(Worker(id="a"), cycle, "a", max_slots=1) is not None
+    assert manager.assign(Worker(id="b"), cycle, "b", max_slots=1) is None
+
+    assert _assigned_workers(manager, cycle_id) == 1
+    assert _worker_cycles(manager, cycle_id) == 1
+    assert manager.last_participation(PROCESS, "b") == 0
+
+
+def test_completed_cycle_is_refused(manager):
+    cycle = _cycle(manager, 1)
+    cycle_id = cycle.id
+    cycle.is_completed = True
+    manager.db.session.commit()
+
+    assert manager.assign(Worker(id="a"), cycle, "a") is None
+    assert not _assigned_workers(manager, cycle_id)
+
+
+def test_worker_assigned_twice_is_rolled_back(manager):
+    cycle = _cycle(manager, 1)
+    cycle_id = cycle.id
+
+    assert manager.assign(Worker(id="a"), cycle, "a", max_slots=2) is not None
+    assert manager.assign(Worker(id="a"), cycle, "a", max_slots=2) is None
+
+    # The slot claimed by the rejected assignment is released
+    assert _assigned_workers(manager, cycle_id) == 1
+    assert _worker_cycles(manager, cycle_id) == 1
+    assert manager.assign(Worker(id="b"), cycle, "b", max_slots=2) is not None
+    assert _assigned_workers(manager, cycle_id) == 2
+
+
+def test_has_request_key(manager):
+    cycle = _cycle(manager, 1)
+    manager.assign(Worker(id="a"), cycle, "key")
+
+    assert manager.has_request_key("a", "key")
+    assert not manager.has_request_key("b", "key")
+    assert not manager.has_request_key("a", "other")
+    assert not manager.has_request_key("a", None)
+    assert manager.first(id=cycle.id).sequence == 1
+
+
+def test_count(manager):
+    assert manager.count(fl_process_id=1) == 0
+
+    _cycle(manager, 1).is_completed = True
+    _cycle(manager, 2)
+    manager.db.session.commit()
+
+    assert manager.count(fl_process_id=1) == 2
+    assert manager.count(fl_process_id=1, is_completed=True) == 1
+    assert manager.count(fl_process_id=2) == 0
@@ -0,0 +1,393 @@
+import importlib
+import io
+import json
+import struct
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+import torch as th
+from sqlalchemy.orm import sessionmaker
+
+from src.main.core.exceptions import InvalidDiffError
+from src.main.core.model_centric.blobs import FileSystemBlobStore
+from src.main.core.model_centric.cycles.cycle import Cycle
+from src.main.core.model_centric.cycles.worker_cycle import WorkerCycle
+from src.main.core.model_centric.models import param_encoding
+from src.main.core.model_centric.models.flat_params import FlatParams
+from src.main.core.model_centric.models.retention import RetentionPolicy
+from src.main.core.model_centric.workers.worker import Worker
+
+cycle_manager_module = importlib.import_module(
+    "src.main.core.model_centric.cycles.cycle_manager"
+)
+worker_cycle_module = importlib.import_module(
+    "src.main.core.model_centric.cycles.worker_cycle"
+)
+
+SERVER_CONFIG = {"min_diffs": 2, "max_diffs": 2, "num_cycles": 1}
+
+
+def _params(value):
+    return FlatParams.from_tensors([th.full((2, 3), float(value)), th.full((3,), 1.0)])
+
+
+def _with_header(payload, **changes):
+    header = param_encoding.read_header(io.BytesIO(payload))
+    (header_length,) = struct.unpack(">I", payload[4:8])
+    header.update(changes)
+    header = json.dumps(header).encode()
+    return (
+        param_encoding.MAGIC
+        + struct.pack(">I", len(header))
+        + header
+        + payload[8 + header_length :]
+    )
+
+
+class FakeModelManager:
+    """Checkpoints kept in memory, committed and rolled back with the
+    session. `save` fails `failures` times."""
+
+    def __init__(self, session, params, failures=0):
+        self.checkpoints = [params]
+        self.pending = []
+        self.failures = failures
+        sa.event.listen(session, "after_commit", self._commit)
+        sa.event.listen(session, "after_rollback", self._rollback)
+
+    def _commit(self, session):
+        self.checkpoints += self.pending
+        self.pending = []
+
+    def _rollback(self, session):
+        self.pending = []
+
+    def get(self, **kwargs):
+        return SimpleNamespace(id=1)
+
+    def load(self, **kwargs):
+        return SimpleNamespace(value=self.checkpoints[-1])
+
+    def layout(self, model_id):
+        return self.checkpoints[0].layout
+
+    def unserialize_model_params(self, value, flat=False):
+        if isinstance(value, FlatParams):
+            params = FlatParams(value.buffer.clone(), value.layout)
+        else:
+            params = param_encoding.decode(value)
+        return params if flat else params.tensors()
+
+    def serialize_model_params(self, params):
+        return params
+
+    def save(self, model_id, data, commit=True, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("blob store unavailable")
+        self.pending.append(data)
+        return SimpleNamespace(number=len(self.checkpoints) + len(self.pending))
+
+    def release_downloads(self, checkpoint):
+        pass
+
+    def retention_policy(self, server_config):
+        return RetentionPolicy()
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    engine = sa.create_engine("sqlite://")
+    tables = [
+        table
+        for name, table in Cycle.metadata.tables.items()
+        if name.startswith("model_centric_")
+    ]
+    Cycle.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+
+    blob_store = FileSystemBlobStore(str(tmp_path))
+    monkeypatch.setattr(worker_cycle_module, "blob_store", blob_store)
+    monkeypatch.setattr(cycle_manager_module, "blob_store", blob_store)
+    monkeypatch.setattr(
+        cycle_manager_module, "enqueue_purge_cycle_diffs", lambda cycle_id: None
+    )
+    monkeypatch.setattr(
+        cycle_manager_module,
+        "process_manager",
+        SimpleNamespace(get_configs=lambda **kwargs: (SERVER_CONFIG, {})),
+    )
+    monkeypatch.setattr(
+        cycle_manager_module,
+        "stats_tracker",
+        SimpleNamespace(
+            record_cycle=lambda *args: None, failure_rate=lambda fl_process_id: None
+        ),
+    )
+
+    manager = cycle_manager_module.CycleManager(SimpleNamespace(session=session))
+    monkeypatch.setattr(manager, "_hosted_avg_plan", lambda fl_process_id: None)
+
+    cycle = Cycle(
+        start=datetime.now(),
+        sequence=1,
+        version="1.0",
+        fl_process_id=1,
+        assigned_workers=2,
+    )
+    session.add(cycle)
+    session.commit()
+    for worker_id, value in (("a", 2), ("b", 4)):
+        session.add(Worker(id=worker_id))
+        worker_cycle = WorkerCycle(
+            worker_id=worker_id,
+            cycle_id=cycle.id,
+            request_key=worker_id,
+            is_completed=True,
+        )
+        worker_cycle.diff = param_encoding.encode(_params(value), "fp32", "none")
+        session.add(worker_cycle)
+    session.commit()
+
+    return manager, cycle
+
+
+def _model_manager(monkeypatch, manager, failures=0):
+    models = FakeModelManager(manager.db.session, _params(10), failures=failures)
+    monkeypatch.setattr(cycle_manager_module, "model_manager", models)
+    return models
+
+
+def _assign(manager, cycle, worker_id, diff=None):
+    manager.db.session.add(Worker(id=worker_id))
+    worker_cycle = WorkerCycle(
+        worker_id=worker_id,
+        cycle_id=cycle.id,
+        request_key=worker_id,
+        is_completed=diff is not None,
+    )
+    if diff is not None:
+        worker_cycle.diff = diff
+    manager.db.session.add(worker_cycle)
+    manager.db.session.commit()
+    return worker_cycle
+
+
+def _assert_averaged_once(manager, cycle, models):
+    assert manager._cycles.first(id=cycle.id).is_completed
+    assert len(models.checkpoints) == 2
+    # 10 - mean(2, 4)
+    assert th.equal(models.checkpoints[-1].tensors()[0], th.full((2, 3), 7.0))
+
+
+def test_retried_completion_averages_once(manager, monkeypatch):
+    manager, cycle = manager
+    models = _model_manager(monkeypatch, manager, failures=1)
+
+    with pytest.raises(IOError):
+        manager.complete_cycle(cycle.id)
+    assert not manager._cycles.first(id=cycle.id).is_completed
+
+    # The job queue retries the completion, the diffs aren't divided by n²
+    manager.complete_cycle(cycle.id)
+    _assert_averaged_once(manager, cycle, models)
+
+
+def test_checkpoint_is_committed_with_the_cycle(manager, monkeypatch):
+    manager, cycle = manager
+    models = _model_manager(monkeypatch, manager)
+    failures = [IOError("database unavailable")]
+
+    @sa.event.listens_for(manager.db.session, "before_commit")
+    def fail_once(session):
+        if models.pending and failures:
+            raise failures.pop()
+
+    with pytest.raises(IOError):
+        manager.complete_cycle(cycle.id)
+    assert len(models.checkpoints) == 1
+    assert not manager._cycles.first(id=cycle.id).is_completed
+
+    manager.complete_cycle(cycle.id)
+    _assert_averaged_once(manager, cycle, models)
+
+
+def test_failure_after_completion_isnt_averaged_again(manager, monkeypatch):
+    manager, cycle = manager
+    models = _model_manager(monkeypatch, manager)
+    failures = [IOError("job queue unavailable")]
+
+    def enqueue_purge_cycle_diffs(cycle_id):
+        if failures:
+            raise failures.pop()
+
+    monkeypatch.setattr(
+        cycle_manager_module, "enqueue_purge_cycle_diffs", enqueue_purge_cycle_diffs
+    )
+
+    with pytest.raises(IOError):
+        manager.complete_cycle(cycle.id)
+
+    # The retry sees the completed cycle
+    manager.complete_cycle(cycle.id)
+    _assert_averaged_once(manager, cycle, models)
+
+
+def test_purge_diffs_of_completed_cycle(manager, monkeypatch, tmp_path):
+    manager, cycle = manager
+    _model_manager(monkeypatch, manager)
+    keys = [
+        report.diff_key for report in manager._worker_cycles.query(cycle_id=cycle.id)
+    ]
+
+    # Diffs of open cycles are kept
+    assert manager.purge_diffs(cycle.id) == 0
+
+    manager.complete_cycle(cycle.id)
+    assert manager.purge_diffs(cycle.id) == 2
+
+    reports = manager._worker_cycles.query(cycle_id=cycle.id)
+    assert all(report.diff is None for report in reports)
+    assert all(report.diff_size for report in reports)
+    assert not any((tmp_path / key).exists() for key in keys)
+
+
+def test_slots_use_the_observed_failure_rate(manager, monkeypatch):
+    manager, cycle = manager
+    server_config = {"max_workers": 10, "expected_failure_rate": 0.1}
+
+    # No completed cycle yet: the expected failure rate is used
+    assert manager.slots(cycle, server_config) == 11
+
+    monkeypatch.setattr(
+        cycle_manager_module.stats_tracker, "failure_rate", lambda fl_process_id: 0.5
+    )
+    assert manager.slots(cycle, server_config) == 15
+
+
+@pytest.mark.parametrize(
+    "diff",
+    [
+        # Another layout
+        param_encoding.encode(
+            FlatParams.from_tensors([th.full((3, 2), 1.0), th.full((3,), 1.0)]),
+            "fp32",
+            "none",
+        ),
+        # Unknown compression
+        _with_header(
+            param_encoding.encode(_params(1), "fp32", "none"), compression="lzma"
+        ),
+        # Scales that aren't numbers
+        _with_header(
+            param_encoding.encode(_params(1), "int8", "none"), scales=["x", "x"]
+        ),
+        # Truncated body
+        param_encoding.encode(_params(1), "fp32", "none")[:-4],
+        # Corrupt body
+        param_encoding.encode(_params(1), "fp32", "zlib")[:-8] + bytes(8),
+    ],
+)
+def test_invalid_diff_is_refused(manager, monkeypatch, tmp_path, diff):
+    manager, cycle = manager
+    _model_manager(monkeypatch, manager)
+    completions = []
+    monkeypatch.setattr(
+        cycle_manager_module, "enqueue_complete_cycle", completions.append
+    )
+    _assign(manager, cycle, "c")
+    blobs = {path for path in tmp_path.rglob("*") if path.is_file()}
+
+    with pytest.raises(InvalidDiffError):
+        manager.submit_worker_diff("c", "c", diff)
+
+    assert not manager._worker_cycles.first(request_key="c").is_completed
+    assert {path for path in tmp_path.rglob("*") if path.is_file()} == blobs
+    assert completions == []
+
+    manager.submit_worker_diff(
+        "c", "c", param_encoding.encode(_params(1), "int8", "zlib")
+    )
+    assert manager._worker_cycles.first(request_key="c").is_completed
+    assert completions == [cycle.id]
+
+
+def test_reported_diff_isnt_replaced(manager, monkeypatch):
+    manager, cycle = manager
+    _model_manager(monkeypatch, manager)
+    monkeypatch.setattr(
+        cycle_manager_module, "enqueue_complete_cycle", lambda cycle_id: None
+    )
+    diff = param_encoding.encode(_params(1), "fp32", "none")
+    _assign(manager, cycle, "c")
+
+    manager.submit_worker_diff("c", "c", diff)
+    assert not manager.can_report("c", "c")
+    with pytest.raises(ProcessLookupError):
+        manager.submit_worker_diff(
+            "c", "c", param_encoding.encode(_params(2), "fp32", "none")
+        )
+    assert manager._worker_cycles.first(request_key="c").diff == diff
+
+
+def test_syft_diff_with_another_layout_is_refused(manager, monkeypatch):
+    manager, cycle = manager
+    models = _model_manager(monkeypatch, manager)
+    monkeypatch.setattr(
+        cycle_manager_module, "enqueue_complete_cycle", lambda cycle_id: None
+    )
+    monkeypatch.setattr(
+        models,
+        "unserialize_model_params",
+        lambda value, flat=False: [th.zeros(3, 2), th.zeros(3)],
+    )
+    _assign(manager, cycle, "c")
+
+    with pytest.raises(InvalidDiffError):
+        manager.submit_worker_diff("c", "c", b"syft params")
+    assert not manager._worker_cycles.first(request_key="c").is_completed
+
+
+def test_bad_stored_diff_is_excluded(manager, monkeypatch):
+    manager, cycle = manager
+    models = _model_manager(monkeypatch, manager)
+    # Stored without the report checks, e.g. reported by an older server
+    other = FlatParams.from_tensors([th.full((3, 2), 1.0), th.full((3,), 1.0)])
+    _assign(manager, cycle, "c", param_encoding.encode(other, "fp32", "none"))
+
+    manager.complete_cycle(cycle.id)
+
+    _assert_averaged_once(manager, cycle, models)
+    assert not manager._worker_cycles.first(request_key="c").is_completed
+
+
+def test_batched_hosted_avg_plan(manager, monkeypatch):
+    manager, cycle = manager
+    models = _model_manager(monkeypatch, manager)
+    _assign(manager, cycle, "c", param_encoding.encode(_params(6), "fp32", "none"))
+    monkeypatch.setattr(
+        cycle_manager_module,
+        "process_manager",
+        SimpleNamespace(
+            get_configs=lambda **kwargs: (
+                dict(SERVER_CONFIG, avg_plan_batch_size=2),
+                {},
+            )
+        ),
+    )
+    batches = []
+
+    def avg_plan(diffs):
+        batches.append(len(diffs))
+        return [th.stack(params).mean(0) for params in zip(*diffs)]
+
+    monkeypatch.setattr(manager, "_hosted_avg_plan", lambda fl_process_id: avg_plan)
+
+    manager.complete_cycle(cycle.id)
+
+    assert batches == [2, 1]
+    assert manager._cycles.first(id=cycle.id).is_completed
+    # 10 - mean(2, 4, 6), the chunk averages are weighted by their size
+    assert th.allclose(models.checkpoints[-1].tensors()[0], th.full((2, 3), 6.0))
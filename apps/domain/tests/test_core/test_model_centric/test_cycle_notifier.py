@@ -0,0 +1,86 @@
+import json
+
+from src.main.events.model_centric.cycle_notifier import CycleNotifier
+
+
+class FakeHandler:
+    def __init__(self, connected):
+        self.connected = set(connected)
+        self.sent = []
+
+    def is_connected(self, worker_id):
+        return worker_id in self.connected
+
+    def send_msg(self, worker_id, message):
+        self.sent.append((worker_id, json.loads(message)))
+        return True
+
+
+def test_subscriptions():
+    handler = FakeHandler(["a", "b", "c"])
+    notifier = CycleNotifier(handler)
+    notifier.subscribe("a", "mnist", "1.0")
+    notifier.subscribe("b", "mnist")
+    notifier.subscribe("c", "mnist", "2.0")
+    notifier.subscribe("gone", "mnist", "1.0")
+
+    # Subscriptions without version match every version
+    assert notifier.subscribers("mnist", "1.0") == ["a", "b"]
+    # Disconnected workers are unsubscribed
+    assert len(notifier) == 3
+
+    notifier.unsubscribe("b")
+    assert notifier.subscribers("mnist", "1.0") == ["a"]
+
+
+def test_notifies_a_limited_subset_once():
+    workers = [f"worker-{i}" for i in range(100)]
+    handler = FakeHandler(workers)
+    notifier = CycleNotifier(
+        handler, max_notifications=50, oversample=2, jitter=0.01, seed=0
+    )
+    for worker_id in workers:
+        notifier.subscribe(worker_id, "mnist", "1.0")
+
+    notifier.notify(1, "mnist", "1.0", slots=10).join()
+    assert notifier.notify(1, "mnist", "1.0", slots=10) is None
+
+    notified = [worker_id for worker_id, _ in handler.sent]
+    assert len(set(notified)) == len(notified) == 20
+    assert handler.sent[0][1]["type"] == "model-centric/cycle-open"
+    assert handler.sent[0][1]["data"] == {"model": "mnist", "version": "1.0"}
+
+    # Without slots limit, the notifications are capped
+    assert len(notifier.select("mnist", "1.0")) == 50
+
+
+def test_limit_is_split_between_processes():
+    workers = [f"worker-{i}" for i in range(100)]
+    notifier = CycleNotifier(
+        FakeHandler(workers), max_notifications=50, oversample=2, processes=4
+    )
+    for worker_id in workers:
+        notifier.subscribe(worker_id, "mnist", "1.0")
+
+    assert len(notifier.select("mnist", "1.0", slots=10)) == 5
+    assert len(notifier.select("mnist", "1.0")) == 13
+
+
+def test_is_subscribed():
+    handler = FakeHandler(["a", "b"])
+    notifier = CycleNotifier(handler)
+    notifier.subscribe("a", "mnist", "1.0")
+    notifier.subscribe("a", "cifar")
+    notifier.subscribe("b", "mnist", "1.0")
+
+    notifier.unsubscribe("a")
+    assert not notifier.is_subscribed("a")
+    assert notifier.is_subscribed("b")
+    assert len(notifier) == 1
+
+    # Disconnected workers are unsubscribed from every model
+    handler.connected.discard("b")
+    notifier.subscribe("b", "cifar")
+    assert notifier.subscribers("mnist", "1.0") == []
+    assert not notifier.is_subscribed("b")
+    assert len(notifier) == 0
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from src.main.core.model_centric.cycles.cycle_scheduler import CycleScheduler
+
+
+def test_fires_expired_cycles_once():
+    fired = []
+    scheduler = CycleScheduler(on_expire=fired.append)
+    scheduler.schedule(1, 100)
+    scheduler.schedule(2, 50)
+    scheduler.schedule(3, None)
+
+    assert scheduler.next_deadline() == 50
+    assert scheduler.run_pending(now=60) == [2]
+    assert scheduler.run_pending(now=60) == []
+    assert scheduler.run_pending(now=100) == [1]
+    assert fired == [2, 1]
+    assert len(scheduler) == 0
+
+
+def test_reschedule_and_cancel():
+    scheduler = CycleScheduler(on_expire=lambda cycle_id: None)
+    scheduler.schedule(1, 100)
+    scheduler.schedule(1, 200)
+    scheduler.schedule(2, datetime.fromtimestamp(150))
+    scheduler.cancel(2)
+
+    # Stale heap entries are skipped
+    assert scheduler.run_pending(now=160) == []
+    assert scheduler.next_deadline() == 200
+
+
+def test_refresh_tracks_open_cycles():
+    open_cycles = [(1, 100), (2, 200)]
+    scheduler = CycleScheduler(
+        on_expire=lambda cycle_id: None, loader=lambda: open_cycles
+    )
+    scheduler.refresh()
+    assert len(scheduler) == 2
+
+    # Cycle 1 was completed by another process
+    open_cycles = [(2, 200), (3, None)]
+    scheduler.refresh()
+    assert scheduler.run_pending(now=300) == [2]
+
+
+def test_failing_callback_doesnt_stop_the_scheduler():
+    def on_expire(cycle_id):
+        raise RuntimeError
+
+    scheduler = CycleScheduler(on_expire=on_expire)
+    scheduler.schedule(1, 10)
+    scheduler.schedule(2, 20)
+    assert scheduler.run_pending(now=30) == [1, 2]
@@ -0,0 +1,58 @@
+import hashlib
+
+from src.main.core.model_centric.cache import DownloadCache
+
+
+def test_checkpoint_is_loaded_once():
+    cache = DownloadCache(max_bytes=1024)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return b"checkpoint", "etag-1"
+
+    first = cache.checkpoint(1, 1, loader)
+    second = cache.checkpoint(1, 1, loader)
+
+    assert len(calls) == 1
+    assert first is second
+    assert first.data == b"checkpoint"
+    assert first.etag == "etag-1"
+
+
+def test_plan_default_etag():
+    cache = DownloadCache(max_bytes=1024)
+    asset = cache.plan(1, "torchscript", lambda: (b"plan", None))
+
+    assert asset.etag == hashlib.sha256(b"plan").hexdigest()
+    assert cache.plan(1, "tfjs", lambda: (b"other", None)).data == b"other"
+
+
+def test_invalidate_model_keeps_latest():
+    cache = DownloadCache(max_bytes=1024)
+    cache.checkpoint(1, 1, lambda: (b"v1", None))
+    cache.checkpoint(1, 2, lambda: (b"v2", None))
+    cache.checkpoint(2, 1, lambda: (b"other model", None))
+    cache.plan(1, "list", lambda: (b"plan", None))
+
+    cache.invalidate_model(1, keep_number=2)
+
+    assert len(cache) == 3
+    assert cache.checkpoint(1, 2, lambda: (b"reloaded", None)).data == b"v2"
+    assert cache.checkpoint(1, 1, lambda: (b"reloaded", None)).data == b"reloaded"
+
+
+def test_lru_eviction():
+    cache = DownloadCache(max_bytes=10)
+    cache.checkpoint(1, 1, lambda: (b"a" * 4, None))
+    cache.checkpoint(1, 2, lambda: (b"b" * 4, None))
+    cache.checkpoint(1, 1, lambda: (b"unused", None))
+    cache.checkpoint(1, 3, lambda: (b"c" * 4, None))
+
+    assert cache.size == 8
+    assert cache.checkpoint(1, 1, lambda: (b"reloaded", None)).data == b"a" * 4
+    assert cache.checkpoint(1, 2, lambda: (b"reloaded", None)).data == b"reloaded"
+
+    # Assets bigger than the cache are served but not kept
+    assert cache.checkpoint(1, 4, lambda: (b"x" * 11, None)).data == b"x" * 11
+    assert cache.size <= 10
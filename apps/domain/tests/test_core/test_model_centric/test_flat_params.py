@@ -0,0 +1,53 @@
+import pytest
+import torch as th
+
+from src.main.core.model_centric.models.flat_params import FlatParams, ParamLayout
+
+
+def _params():
+    return [th.arange(6.0).view(2, 3), th.tensor([10.0, 20.0]), th.tensor(7.0)]
+
+
+def test_layout():
+    layout = ParamLayout.of(_params())
+
+    assert layout.shapes == ((2, 3), (2,), ())
+    assert layout.offsets == (0, 6, 8)
+    assert layout.numel == 9
+
+
+def test_round_trip():
+    params = _params()
+    flat = FlatParams.from_tensors(params)
+
+    assert len(flat) == 3
+    assert flat.buffer.shape == (9,)
+    for tensor, original in zip(flat.tensors(), params):
+        assert th.equal(tensor, original)
+
+
+def test_tensors_are_views():
+    flat = FlatParams.from_tensors(_params())
+    flat.sub_(_params())
+
+    assert th.equal(flat.tensors()[0], th.zeros(2, 3))
+    assert flat.tensors()[0].data_ptr() == flat.buffer.data_ptr()
+
+
+def test_reuse_buffer():
+    flat = FlatParams.from_tensors(_params())
+    scratch = flat.zeros_like()
+
+    assert FlatParams.from_tensors(_params(), out=scratch) is scratch
+    assert th.equal(scratch.buffer, flat.buffer)
+
+    with pytest.raises(ValueError):
+        FlatParams.from_tensors([th.zeros(9)], out=scratch)
+
+
+def test_weighted_running_mean():
+    # Combining chunk averages weighted by their size gives the overall mean
+    mean = FlatParams.from_tensors([th.tensor([1.0, 2.0])])
+    mean.lerp_([th.tensor([4.0, 8.0])], 1 / 4)
+
+    assert th.allclose(mean.buffer, th.tensor([1.75, 3.5]))
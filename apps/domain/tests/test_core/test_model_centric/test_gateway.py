@@ -0,0 +1,61 @@
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+
+from src.main.events import gateway
+from src.main.events.gateway import WebSocketGateway
+
+
+class FakeApp:
+    @contextmanager
+    def app_context(self):
+        yield
+
+
+def run_connection(app, messages):
+    events = [{"type": "websocket.connect"}]
+    events += [{"type": "websocket.receive", "text": message} for message in messages]
+    events.append({"type": "websocket.disconnect"})
+    sent = []
+
+    async def receive():
+        return events.pop(0)
+
+    async def send(event):
+        sent.append(event)
+
+    asyncio.get_event_loop().run_until_complete(
+        app({"type": "websocket"}, receive, send)
+    )
+    return sent
+
+
+def test_dispatches_messages_in_order(monkeypatch):
+    threads = set()
+
+    def route_requests(message, socket):
+        threads.add(threading.current_thread().name)
+        return json.dumps({"echo": json.loads(message)["n"]})
+
+    monkeypatch.setattr(gateway, "route_requests", route_requests)
+    monkeypatch.setattr(gateway, "disconnect", lambda socket: None)
+
+    app = WebSocketGateway(FakeApp(), max_workers=2)
+    sent = run_connection(app, [json.dumps({"n": n}) for n in range(5)])
+
+    assert sent[0] == {"type": "websocket.accept"}
+    assert [json.loads(event["text"])["echo"] for event in sent[1:]] == list(range(5))
+    assert all(name.startswith("ws-gateway") for name in threads)
+
+
+def test_handlers_can_push_to_the_socket(monkeypatch):
+    def route_requests(message, socket):
+        socket.send("pushed").result(timeout=1)
+        return "response"
+
+    monkeypatch.setattr(gateway, "route_requests", route_requests)
+    monkeypatch.setattr(gateway, "disconnect", lambda socket: None)
+
+    sent = run_connection(WebSocketGateway(FakeApp()), ["message"])
+    assert [event.get("text") for event in sent[1:]] == ["pushed", "response"]
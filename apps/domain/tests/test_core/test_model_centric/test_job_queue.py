@@ -0,0 +1,70 @@
+import pytest
+
+from src.main.core.model_centric.tasks import JobWorker, SQLiteJobQueue
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+
+
+def test_pending_jobs_are_coalesced(job_queue):
+    assert job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+    assert not job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+    assert job_queue.enqueue("complete_cycle", 2, {"cycle_id": 2})
+    assert len(job_queue) == 2
+
+
+def test_running_job_is_rescheduled_once(job_queue):
+    job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+    job = job_queue.claim()
+    assert job.args == {"cycle_id": 1}
+
+    # Reports arriving while the job runs queue a single re-check...
+    assert job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+    assert not job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+
+    # ...that doesn't run concurrently with the current one
+    assert job_queue.claim() is None
+
+    job_queue.complete(job)
+    assert job_queue.claim().key == "1"
+
+
+def test_failed_job_is_retried(job_queue):
+    job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+    job = job_queue.claim()
+    job_queue.fail(job, "error")
+
+    # Retried with backoff
+    assert job_queue.claim() is None
+    assert len(job_queue) == 1
+
+
+def test_expired_lease_is_recovered(tmp_path):
+    job_queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), lease=-1)
+    job_queue.enqueue("complete_cycle", 1, {"cycle_id": 1})
+
+    first = job_queue.claim()
+    second = job_queue.claim()
+    assert first.id == second.id
+
+
+def test_job_worker(job_queue):
+    executed = []
+    worker = JobWorker(
+        job_queue,
+        {
+            "ok": lambda cycle_id: executed.append(cycle_id),
+            "error": lambda cycle_id: 1 / 0,
+        },
+    )
+
+    job_queue.enqueue("ok", 1, {"cycle_id": 1})
+    job_queue.enqueue("error", 2, {"cycle_id": 2})
+
+    assert worker.run_once()
+    assert worker.run_once()
+    assert not worker.run_once()
+    assert executed == [1]
+    assert len(job_queue) == 1
@@ -0,0 +1,45 @@
+from src.main.core.metrics import Metrics
+
+
+def test_render_histogram():
+    metrics = Metrics()
+    metrics.declare("latency_seconds", "Request latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        metrics.observe("latency_seconds", value, route="/a")
+
+    lines = metrics.render().splitlines()
+
+    assert lines == [
+        "# HELP latency_seconds Request latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_render_gauge_escapes_labels():
+    metrics = Metrics()
+    metrics.set("connections", 3, worker='a"b\\c\nd')
+
+    lines = metrics.render().splitlines()
+
+    assert lines == [
+        "# TYPE connections gauge",
+        'connections{worker="a\\"b\\\\c\\nd"} 3',
+    ]
+
+
+def test_timer_observes_on_error():
+    metrics = Metrics()
+    try:
+        with metrics.timer("work_seconds", phase="total"):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    (entry,) = metrics.snapshot()["work_seconds"]
+    assert entry["labels"] == {"phase": "total"}
+    assert entry["count"] == 1
@@ -0,0 +1,149 @@
+import io
+import json
+import struct
+import zlib
+
+import pytest
+import torch as th
+
+from src.main.core.model_centric.models import param_encoding
+from src.main.core.model_centric.models.flat_params import FlatParams
+
+
+def _payload(header, body):
+    header = json.dumps(header).encode()
+    return param_encoding.MAGIC + struct.pack(">I", len(header)) + header + body
+
+
+@pytest.fixture
+def params():
+    th.manual_seed(0)
+    return FlatParams.from_tensors([th.randn(20, 10), th.randn(10) * 1e-3, th.randn(3)])
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_lossless_round_trip(params, compression):
+    payload = param_encoding.encode(params, "fp32", compression)
+    decoded = param_encoding.decode(payload)
+
+    assert decoded.layout.shapes == params.layout.shapes
+    assert th.equal(decoded.buffer, params.buffer)
+
+
+@pytest.mark.parametrize("quantization,tolerance", [("fp16", 1e-3), ("int8", 1e-2)])
+def test_quantized_round_trip(params, quantization, tolerance):
+    payload = param_encoding.encode(params, quantization, "zlib")
+    decoded = param_encoding.decode(payload)
+
+    # Scales are per param, so small params keep their precision
+    for original, restored in zip(params.tensors(), decoded.tensors()):
+        error = (original - restored).abs().max()
+        assert error <= tolerance * original.abs().max()
+
+    assert len(payload) < len(param_encoding.encode(params, "fp32", "none"))
+
+
+@pytest.mark.parametrize("quantization", ["fp32", "int8"])
+def test_top_k(params, quantization):
+    payload = param_encoding.encode(params, quantization, "zlib", top_k=0.1)
+    decoded = param_encoding.decode(payload)
+
+    kept = decoded.buffer != 0
+    assert kept.sum() == 21
+    # The largest values are the ones sent
+    assert params.buffer[~kept].abs().max() <= params.buffer[kept].abs().min()
+    assert th.allclose(decoded.buffer[kept], params.buffer[kept], rtol=1e-2)
+
+
+def test_add_into(params):
+    payload = param_encoding.encode(params, "fp32", "none")
+    out = param_encoding.zeros(payload)
+    param_encoding.add_into(payload, out)
+    param_encoding.add_into(payload, out)
+    assert th.allclose(out.buffer, params.buffer * 2)
+
+    other = FlatParams.from_tensors([th.zeros(3)])
+    with pytest.raises(ValueError):
+        param_encoding.add_into(payload, other)
+
+
+def test_invalid_payload(params):
+    with pytest.raises(ValueError):
+        param_encoding.encode(params, "int4", "zlib")
+    with pytest.raises(ValueError):
+        param_encoding.decode(b"not params")
+
+
+def test_check_header(params):
+    payload = param_encoding.encode(params, "int8", "zlib", top_k=0.1)
+    header = param_encoding.read_header(io.BytesIO(payload))
+
+    assert param_encoding.check_header(header, params.layout) == 21 * 5
+    with pytest.raises(ValueError):
+        param_encoding.check_header(
+            header, FlatParams.from_tensors([th.zeros(3)]).layout
+        )
+    assert param_encoding.read_header(io.BytesIO(b"syft params")) is None
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        {"shapes": [[4]], "quantization": "fp32", "compression": "lz4"},
+        {"shapes": [[4]], "quantization": "int4", "compression": "none"},
+        {"shapes": [[-4]], "quantization": "fp32", "compression": "none"},
+        {"shapes": 4, "quantization": "fp32", "compression": "none"},
+    ],
+)
+def test_invalid_header(header):
+    payload = _payload(header, bytes(16))
+
+    with pytest.raises(ValueError):
+        param_encoding.read_header(io.BytesIO(payload))
+    with pytest.raises(ValueError):
+        param_encoding.decode(payload)
+
+
+def test_decompression_is_bounded():
+    header = {"shapes": [[4]], "quantization": "fp32", "compression": "zlib"}
+    out = FlatParams.from_tensors([th.zeros(4)])
+
+    # 16 bytes expected, the body would inflate to 100MB
+    with pytest.raises(ValueError):
+        param_encoding.add_into(_payload(header, zlib.compress(bytes(10**8))), out)
+    with pytest.raises(ValueError):
+        param_encoding.add_into(_payload(header, zlib.compress(bytes(12))), out)
+
+
+def test_zstd_frame_without_content_size(params):
+    zstandard = pytest.importorskip("zstandard")
+    header = {
+        "shapes": [list(shape) for shape in params.layout.shapes],
+        "quantization": "fp32",
+        "compression": "zstd",
+    }
+    compressor = zstandard.ZstdCompressor(write_content_size=False)
+    body = compressor.compress(params.buffer.numpy().astype("<f4").tobytes())
+
+    assert th.equal(param_encoding.decode(_payload(header, body)).buffer, params.buffer)
+
+    # Larger than the params
+    body = compressor.compress(bytes(params.layout.numel * 4 + 1))
+    with pytest.raises(ValueError):
+        param_encoding.decode(_payload(header, body))
+
+
+def test_check(params):
+    payload = param_encoding.encode(params, "int8", "zlib")
+    param_encoding.check(payload, params.layout)
+
+    with pytest.raises(ValueError):
+        param_encoding.check(payload[:-1], params.layout)
+
+    header = param_encoding.read_header(io.BytesIO(payload))
+    header["scales"][0] = float("nan")
+    (header_length,) = struct.unpack(">I", payload[4:8])
+    with pytest.raises(ValueError):
+        param_encoding.check(
+            _payload(header, payload[8 + header_length :]), params.layout
+        )
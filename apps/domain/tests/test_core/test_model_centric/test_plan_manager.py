@@ -0,0 +1,99 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from src.main.core.model_centric.processes.fl_process import FLProcess
+from src.main.core.model_centric.syft_assets.plan import Plan
+from src.main.core.model_centric.syft_assets.plan_manager import PlanManager
+from src.main.core.model_centric.syft_assets.protocol_manager import ProtocolManager
+
+process_manager_module = importlib.import_module(
+    "src.main.core.model_centric.processes.process_manager"
+)
+
+
+@pytest.fixture
+def database():
+    engine = sa.create_engine("sqlite://")
+    tables = [
+        table
+        for name, table in Plan.metadata.tables.items()
+        if name.startswith("model_centric_")
+    ]
+    Plan.metadata.create_all(engine, tables=tables)
+    return SimpleNamespace(session=sessionmaker(bind=engine)())
+
+
+@pytest.fixture
+def plans(database, monkeypatch):
+    plans = PlanManager(database)
+    loads = []
+
+    def deserialize_plan(value):
+        loads.append(value)
+        return value.decode()
+
+    monkeypatch.setattr(plans, "deserialize_plan", deserialize_plan)
+    plans.loads = loads
+    return plans
+
+
+def _process(database, avg_plan=None):
+    process = FLProcess(name="mnist", version="1.0")
+    database.session.add(process)
+    if avg_plan is not None:
+        database.session.add(
+            Plan(value=avg_plan, is_avg_plan=True, avg_flprocess=process)
+        )
+    database.session.commit()
+    return process
+
+
+def test_process_without_avg_plan(database, plans):
+    process = _process(database)
+
+    assert plans.avg_plan(process.id) is None
+    assert plans.avg_plan(process.id + 1) is None
+
+
+def test_avg_plan_is_cached(database, plans):
+    process = _process(database, avg_plan=b"avg")
+
+    assert plans.avg_plan(process.id) == "avg"
+    assert plans.avg_plan(process.id) == "avg"
+    assert plans.loads == [b"avg"]
+
+    # The process was replaced by one with the same ID
+    plan = plans.first(fl_process_id=process.id, is_avg_plan=True)
+    database.session.add(Plan(value=b"new", is_avg_plan=True, fl_process_id=process.id))
+    database.session.commit()
+    database.session.delete(plan)
+    database.session.commit()
+    assert plans.avg_plan(process.id) == "new"
+
+    plans.invalidate_avg_plan(process.id)
+    assert plans.avg_plan(process.id) == "new"
+    assert plans.loads == [b"avg", b"new", b"new"]
+
+
+def test_process_manager_invalidates_avg_plans(database, plans, monkeypatch):
+    monkeypatch.setattr(process_manager_module, "plans", plans)
+    monkeypatch.setattr(process_manager_module, "protocols", ProtocolManager(database))
+    monkeypatch.setattr(
+        process_manager_module,
+        "stats_tracker",
+        SimpleNamespace(forget=lambda fl_process_id: None),
+    )
+    processes = process_manager_module.ProcessManager(database)
+    # Cached plan of a deleted process whose ID is reused
+    plans._avg_plans[1] = (1, "stale")
+
+    process = processes.create({"name": "mnist", "version": "1.0"}, {}, {}, {}, b"avg")
+    assert process.id == 1
+    assert plans.avg_plan(process.id) == "avg"
+
+    processes.delete(id=process.id)
+    assert process.id not in plans._avg_plans
@@ -0,0 +1,43 @@
+import numpy as np
+from scipy.stats import poisson
+
+from src.main.core.model_centric.cycles.pool_selection import PoolSelector
+
+
+def test_table_matches_poisson_confidence():
+    selector = PoolSelector(confidence=0.95, time_buckets=16)
+    table = selector.build_table(slots=10, cycle_length=1600, arrival_rate=1)
+
+    assert table.shape == (11, 16)
+    assert np.all(table[0] == 1)
+    assert np.all(table[:, 0] == 0)
+
+    # Accepting 1 - p of the requests leaves P(K >= k) = confidence
+    time_left = 10 * 100
+    expected = time_left * (1 - table[10, 10])
+    assert abs(poisson.sf(10 - 1, expected) - 0.95) < 1e-6
+
+
+def test_table_is_monotonic():
+    selector = PoolSelector(time_buckets=32)
+    table = selector.build_table(slots=50, cycle_length=3600, arrival_rate=0.5)
+
+    # More workers needed or less time left => fewer rejections
+    assert np.all(np.diff(table[1:], axis=0) <= 0)
+    assert np.all(np.diff(table[1:, 1:], axis=1) >= 0)
+
+
+def test_admission():
+    selector = PoolSelector(refresh_interval=10, seed=0)
+
+    # No arrival rate estimate yet: accept while slots are free
+    assert selector.rejection_probability(1, 5, 100, 10, 1000, None) == 0
+    assert selector.rejection_probability(1, 0, 100, 10, 1000, None) == 1
+
+    # Plenty of requests for the free slots: most of them are rejected
+    assert selector.rejection_probability(1, 5, 100, 10, 1000, 100, now=0) > 0.99
+    # Few requests: none of them are rejected
+    assert selector.rejection_probability(1, 5, 100, 10, 1000, 0.01, now=20) == 0
+
+    selector.forget(1)
+    assert 1 not in selector._tables
@@ -0,0 +1,56 @@
+from src.main.core.model_centric.processes.process_cache import (
+    ProcessCache,
+    ProcessDescriptor,
+)
+
+
+def _descriptor(name, model_id=1):
+    return ProcessDescriptor(
+        id=1,
+        name=name,
+        version="1.0",
+        server_config={},
+        client_config={},
+        plans={},
+        protocols={},
+        model_id=model_id,
+    )
+
+
+def test_descriptors_are_cached():
+    cache = ProcessCache(ttl=60)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return _descriptor(str(len(loads)))
+
+    assert cache.get("mnist", "1.0", loader).name == "1"
+    assert cache.get("mnist", "1.0", loader).name == "1"
+    assert cache.get("mnist", None, loader).name == "2"
+
+
+def test_invalidate_by_name():
+    cache = ProcessCache(ttl=60)
+    cache.get("mnist", None, lambda: _descriptor("old"))
+    cache.get("cifar", None, lambda: _descriptor("cifar"))
+
+    cache.invalidate("mnist")
+
+    assert cache.get("mnist", None, lambda: _descriptor("new")).name == "new"
+    assert cache.get("cifar", None, lambda: _descriptor("reloaded")).name == "cifar"
+
+
+def test_expired_entries_are_reloaded():
+    cache = ProcessCache(ttl=-1)
+    cache.get("mnist", "1.0", lambda: _descriptor("old"))
+
+    assert cache.get("mnist", "1.0", lambda: _descriptor("new")).name == "new"
+
+
+def test_process_without_model_isnt_cached():
+    cache = ProcessCache(ttl=60)
+
+    # The process was read before its model was created
+    assert cache.get("mnist", None, lambda: _descriptor("mnist", None)).model_id is None
+    assert cache.get("mnist", None, lambda: _descriptor("mnist", 7)).model_id == 7
@@ -0,0 +1,31 @@
+from collections import namedtuple
+
+from src.main.core.model_centric.models.retention import RetentionPolicy
+
+Row = namedtuple("Row", ["number", "alias"])
+
+
+def test_expired_checkpoints():
+    rows = [Row(number, "") for number in range(1, 21)]
+    rows[19] = Row(20, "latest")
+    rows[2] = Row(3, "best")
+
+    policy = RetentionPolicy(keep_last=5, keep_every=10)
+    expired = {row.number for row in policy.expired(rows, latest_number=20)}
+
+    # Last 5, every 10th and the aliased checkpoints are kept
+    assert expired == set(range(1, 16)) - {3, 10}
+
+
+def test_disabled_policy_keeps_everything():
+    rows = [Row(number, "") for number in range(1, 5)]
+    assert RetentionPolicy().expired(rows, latest_number=4) == []
+
+
+def test_from_config():
+    default = RetentionPolicy(keep_last=10, keep_every=100)
+
+    assert RetentionPolicy.from_config(None, default) == default
+    assert RetentionPolicy.from_config({"keep_last": 3}, default) == (3, 100)
+    assert RetentionPolicy.from_config({"keep_every": -1}) == (0, 0)
+    assert not RetentionPolicy.from_config({}).enabled
@@ -0,0 +1,119 @@
+import pytest
+
+from src.main.events.model_centric.socket_handler import Singleton, SocketHandler
+
+
+class FakeSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.closed = False
+        self.fail = fail
+
+    def send(self, message):
+        if self.fail:
+            raise ConnectionError("closed")
+        self.sent.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def handler(clock):
+    Singleton._instances.pop(SocketHandler, None)
+    yield SocketHandler(idle_timeout=100, clock=clock)
+    Singleton._instances.pop(SocketHandler, None)
+
+
+def test_remove(handler):
+    sockets = {f"worker-{i}": FakeSocket() for i in range(3)}
+    for worker_id, socket in sockets.items():
+        handler.new_connection(worker_id, socket)
+
+    assert handler.remove(sockets["worker-1"]) == "worker-1"
+    assert handler.remove(sockets["worker-1"]) is None
+    assert set(handler.connections) == {"worker-0", "worker-2"}
+    assert len(handler) == 2
+
+
+def test_reconnection_replaces_the_socket(handler):
+    old, new = FakeSocket(), FakeSocket()
+    handler.new_connection("worker", old)
+    handler.new_connection("worker", new)
+
+    # Closing the old connection doesn't unlink the new one
+    assert handler.remove(old) is None
+    assert handler.send_msg("worker", "hello")
+    assert new.sent == ["hello"] and old.sent == []
+
+
+def test_is_bound(handler):
+    socket = FakeSocket()
+    handler.new_connection("worker", socket)
+
+    assert handler.is_bound("worker", socket)
+    assert not handler.is_bound("worker", FakeSocket())
+    assert not handler.is_bound("other", socket)
+    assert not handler.is_bound("other", None)
+
+
+def test_idle_eviction(handler, clock):
+    first, second = FakeSocket(), FakeSocket()
+    handler.new_connection("first", first)
+    clock.now = 60
+    handler.new_connection("second", second)
+
+    clock.now = 120
+    handler.touch(first)
+    assert handler.last_seen("first") == 120
+
+    clock.now = 170
+    assert handler.evict_idle() == ["second"]
+    assert second.closed and not first.closed
+    assert not handler.is_connected("second")
+
+
+def test_idle_subscribers_are_kept(handler, clock):
+    waiting, idle = FakeSocket(), FakeSocket()
+    handler.new_connection("waiting", waiting)
+    handler.new_connection("idle", idle)
+    subscribed = {"waiting"}
+    handler.keep_idle = subscribed.__contains__
+
+    clock.now = 150
+    assert handler.evict_idle() == ["idle"]
+    assert handler.is_connected("waiting")
+    assert handler.last_seen("waiting") == 0
+
+    # Checked again an idle timeout later
+    subscribed.clear()
+    clock.now = 200
+    assert handler.evict_idle() == []
+    clock.now = 251
+    assert handler.evict_idle() == ["waiting"]
+    assert waiting.closed
+
+
+def test_send_many_and_broadcast(handler):
+    sockets = {"a": FakeSocket(), "b": FakeSocket(), "c": FakeSocket(fail=True)}
+    for worker_id, socket in sockets.items():
+        handler.new_connection(worker_id, socket)
+
+    assert handler.send_many(["a", "c", "missing"], "cycle") == 1
+    # Failed sockets are dropped
+    assert not handler.is_connected("c")
+    assert handler.broadcast("all") == 2
+    assert sockets["a"].sent == ["cycle", "all"]
+    assert sockets["b"].sent == ["all"]
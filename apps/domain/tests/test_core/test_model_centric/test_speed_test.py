@@ -0,0 +1,28 @@
+import io
+
+from src.main.core.model_centric.workers import speed_test
+
+
+def test_sample_is_a_multipart_form():
+    completed = []
+    size = speed_test.CHUNK_SIZE * 3 + 10
+    sample = speed_test.SpeedTestSample(
+        size, on_complete=lambda *args: completed.append(args)
+    )
+
+    body = b"".join(sample)
+    boundary = sample.content_type.split("boundary=")[1]
+
+    assert len(body) == sample.content_length
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert body.endswith(f"\r\n--{boundary}--\r\n".encode())
+    assert body.count(b'name="sample"\r\n\r\n') == 1
+    assert completed[0][0] == size
+
+
+def test_drain():
+    num_bytes, seconds = speed_test.drain(io.BytesIO(b"x" * 100000), chunk_size=1024)
+    assert num_bytes == 100000
+    assert seconds >= 0
+    assert speed_test.kbps(1000, 1) == 8
+    assert speed_test.kbps(1000, 0) is None
@@ -0,0 +1,48 @@
+from src.main.core.model_centric.stats.tracker import DecayedCounts, StatsTracker
+from src.main.core.model_centric.workers.worker import Worker
+
+
+def test_counts_decay():
+    counts = DecayedCounts(now=0, requests=8)
+    counts.decay_to(20, half_life=10)
+    assert counts.requests == 2
+
+    # Counts aren't moved back in time
+    counts.decay_to(10, half_life=10)
+    assert counts.requests == 2 and counts.updated_at == 20
+
+    counts.add(DecayedCounts(now=10, requests=4, started_at=-5), half_life=10)
+    assert counts.requests == 4
+    assert counts.started_at == -5
+
+
+def test_rates():
+    tracker = StatsTracker(None, half_life=60, flush_interval=3600)
+    assert tracker.arrival_rate(1, now=0) is None
+    assert tracker.failure_rate(1, now=0) is None
+
+    for second in range(600):
+        tracker.record_request(1, now=second)
+    # Not enough data yet
+    assert tracker.arrival_rate(1, now=10) is None
+    assert abs(tracker.arrival_rate(1, now=600) - 1) < 0.02
+
+    tracker.record_cycle(1, assigned=100, reported=80, now=600)
+    tracker.record_cycle(1, assigned=100, reported=60, now=600)
+    assert abs(tracker.failure_rate(1, now=700) - 0.3) < 1e-9
+
+    tracker.forget(1)
+    assert tracker.arrival_rate(1, now=600) is None
+
+
+def test_worker_speed_moving_average():
+    tracker = StatsTracker(None, flush_interval=3600, speed_weight=0.5)
+    worker = Worker(id="worker", avg_upload=10.0)
+
+    tracker.record_worker_speed(worker, now=0, avg_upload=20.0, ping=8.0)
+    assert worker.avg_upload == 15.0
+    assert worker.ping == 8.0
+
+    tracker.record_worker_speed(worker, now=1, avg_upload=25.0)
+    assert worker.avg_upload == 20.0
+    assert tracker._speeds == {"worker": {"avg_upload": 20.0, "ping": 8.0}}
@@ -0,0 +1,78 @@
+import io
+import os
+
+import pytest
+
+from src.main.core.model_centric.blobs.uploads import ResumableUploads
+
+
+def test_resume_upload(tmpdir):
+    uploads = ResumableUploads(str(tmpdir))
+    data = bytes(range(256)) * 10
+
+    assert uploads.offset("worker:key") == 0
+    assert uploads.append("worker:key", 0, io.BytesIO(data[:1000]), 1000) == 1000
+    # Replayed and out of order chunks are ignored
+    assert uploads.append("worker:key", 0, io.BytesIO(data[:1000]), 1000) == 1000
+    assert uploads.append("worker:key", 2000, io.BytesIO(data[2000:]), 560) == 1000
+
+    # Interrupted chunk
+    assert uploads.append("worker:key", 1000, io.BytesIO(data[1000:1500]), 1560) == 1500
+    assert uploads.offset("worker:key") == 1500
+    assert uploads.append("worker:key", 1500, io.BytesIO(data[1500:]), 1060) == 2560
+
+    with uploads.open("worker:key") as upload:
+        assert upload.read() == data
+
+    uploads.discard("worker:key")
+    assert uploads.offset("worker:key") == 0
+
+
+def test_claim(tmpdir):
+    uploads = ResumableUploads(str(tmpdir))
+    uploads.append("worker:key", 0, io.BytesIO(b"diff"), 4, total=4)
+
+    with uploads.claim("worker:key") as upload:
+        assert uploads.offset("worker:key") == 0
+        assert upload.read() == b"diff"
+
+    # Claimed by another request
+    with pytest.raises(FileNotFoundError):
+        uploads.claim("worker:key")
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_cleanup(tmpdir):
+    uploads = ResumableUploads(str(tmpdir), ttl=60)
+    uploads.append("worker:key", 0, io.BytesIO(b"diff"), 4)
+
+    uploads.cleanup()
+    assert uploads.offset("worker:key") == 4
+    uploads.cleanup(now=os.path.getmtime(uploads.path("worker:key")) + 61)
+    assert uploads.offset("worker:key") == 0
+
+
+def test_upload_size_is_kept(tmpdir):
+    uploads = ResumableUploads(str(tmpdir))
+    uploads.append("worker:key", 0, io.BytesIO(b"di"), 2, total=4)
+
+    with pytest.raises(ValueError):
+        uploads.append("worker:key", 2, io.BytesIO(b"ff"), 2, total=6)
+    assert uploads.offset("worker:key") == 2
+
+    # Starting over with another diff replaces the partial upload
+    assert uploads.append("worker:key", 0, io.BytesIO(b"new"), 3, total=6) == 3
+    assert uploads.append("worker:key", 3, io.BytesIO(b"ff"), 2, total=6) == 5
+
+    uploads.discard("worker:key")
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_max_size(tmpdir):
+    uploads = ResumableUploads(str(tmpdir), max_size=4)
+
+    with pytest.raises(ValueError):
+        uploads.append("worker:key", 0, io.BytesIO(b"diff"), 4, total=5)
+    with pytest.raises(ValueError):
+        uploads.append("worker:key", 2, io.BytesIO(b"diff"), 4, total=4)
+    assert uploads.append("worker:key", 0, io.BytesIO(b"diff"), 4, total=4) == 4
@@ -0,0 +1,237 @@
+import importlib
+import io
+import json
+import struct
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.main.core.model_centric.blobs.uploads import ResumableUploads
+from src.main.core.model_centric.cache.download_cache import CachedAsset
+
+CHECKPOINT = CachedAsset(data=bytes(range(16)), etag="checkpoint-1")
+REPORT_URL = "/model-centric/report?worker_id=worker&request_key=key"
+
+
+@pytest.fixture
+def routes(app):
+    # The module the app was built from, whatever its import path
+    return sys.modules[app.view_functions["model-centric.get_model"].__module__]
+
+
+@pytest.fixture
+def checkpoint(routes, monkeypatch):
+    monkeypatch.setattr(
+        routes,
+        "process_manager",
+        SimpleNamespace(last=lambda **kwargs: SimpleNamespace(id=1)),
+    )
+    monkeypatch.setattr(
+        routes,
+        "model_manager",
+        SimpleNamespace(
+            get=lambda **kwargs: SimpleNamespace(id=1),
+            load=lambda **kwargs: SimpleNamespace(number=1),
+            download=lambda checkpoint: CHECKPOINT,
+        ),
+    )
+    return "/model-centric/retrieve-model?name=mnist"
+
+
+@pytest.fixture
+def reports(routes, monkeypatch, tmp_path):
+    reports = []
+
+    def report(message, socket):
+        reports.append(message["data"]["diff"].read())
+        return {"data": {"status": "success"}}
+
+    monkeypatch.setattr(
+        routes,
+        "cycle_manager",
+        SimpleNamespace(can_report=lambda worker_id, request_key: request_key == "key"),
+    )
+    monkeypatch.setattr(
+        routes, "report_uploads", ResumableUploads(str(tmp_path), max_size=16)
+    )
+    monkeypatch.setattr(routes, "report", report)
+    return reports
+
+
+@pytest.fixture
+def events(routes):
+    # Websocket events of the same app
+    return importlib.import_module("...events", routes.__package__)
+
+
+def _frame(header, payload=b""):
+    header = json.dumps(header).encode()
+    return bytearray(struct.pack(">I", len(header)) + header + payload)
+
+
+def _put_chunk(client, data, content_range):
+    return client.put(
+        REPORT_URL,
+        data=data,
+        content_type="application/octet-stream",
+        headers={"Content-Range": content_range},
+    )
+
+
+def test_range_download(client, checkpoint):
+    result = client.get(checkpoint, headers={"Range": "bytes=4-"})
+
+    assert result.status_code == 206
+    assert result.data == CHECKPOINT.data[4:]
+    assert result.headers["Content-Range"] == "bytes 4-15/16"
+
+
+def test_if_range(client, checkpoint):
+    result = client.get(
+        checkpoint, headers={"Range": "bytes=4-", "If-Range": '"checkpoint-1"'}
+    )
+    assert result.status_code == 206
+    assert result.data == CHECKPOINT.data[4:]
+
+    # The checkpoint changed since the partial download
+    result = client.get(
+        checkpoint, headers={"Range": "bytes=4-", "If-Range": '"checkpoint-0"'}
+    )
+    assert result.status_code == 200
+    assert result.data == CHECKPOINT.data
+
+
+def test_range_not_satisfiable(client, checkpoint):
+    result = client.get(checkpoint, headers={"Range": "bytes=16-"})
+
+    assert result.status_code == 416
+    assert result.headers["Content-Range"] == "bytes */16"
+
+
+def test_resumed_report(client, reports):
+    result = _put_chunk(client, b"", "bytes */8")
+    assert result.status_code == 308
+    assert "Range" not in result.headers
+
+    result = _put_chunk(client, b"diff", "bytes 0-3/8")
+    assert result.status_code == 308
+    assert result.headers["Range"] == "bytes=0-3"
+
+    # The connection dropped, the worker asks where to resume
+    result = _put_chunk(client, b"", "bytes */8")
+    assert result.status_code == 308
+    assert result.headers["Range"] == "bytes=0-3"
+
+    result = _put_chunk(client, b"body", "bytes 4-7/8")
+    assert result.status_code == 200
+    assert reports == [b"diffbody"]
+
+
+def test_report_size_is_checked(client, reports):
+    assert _put_chunk(client, b"diff", "bytes 0-3/8").status_code == 308
+
+    # Another total in the middle of the upload
+    assert _put_chunk(client, b"body", "bytes 4-7/12").status_code == 400
+    # Larger than MODEL_CENTRIC_MAX_DIFF_SIZE
+    assert _put_chunk(client, b"", "bytes */32").status_code == 400
+    assert _put_chunk(client, b"diff", "bytes 0-3/32").status_code == 400
+    assert reports == []
+
+
+def test_octet_stream_report(client, reports):
+    result = client.post(
+        REPORT_URL, data=b"diff", content_type="application/octet-stream"
+    )
+
+    assert result.status_code == 200
+    assert reports == [b"diff"]
+
+
+def test_multipart_report(client, reports):
+    result = client.post(
+        "/model-centric/report",
+        data={
+            "worker_id": "worker",
+            "request_key": "key",
+            "diff": (io.BytesIO(b"diff"), "diff"),
+        },
+        content_type="multipart/form-data",
+    )
+    assert result.status_code == 200
+    assert reports == [b"diff"]
+
+    result = client.post(
+        "/model-centric/report",
+        data={"worker_id": "worker", "request_key": "key"},
+        content_type="multipart/form-data",
+    )
+    assert result.status_code == 400
+    assert reports == [b"diff"]
+
+
+def test_oversized_report_is_refused(client, reports):
+    result = client.post(
+        REPORT_URL, data=bytes(17), content_type="application/octet-stream"
+    )
+
+    assert result.status_code == 400
+    assert reports == []
+
+
+def test_reported_worker_is_refused(client, reports):
+    result = client.post(
+        "/model-centric/report?worker_id=worker&request_key=reported",
+        data=b"diff",
+        content_type="application/octet-stream",
+    )
+
+    assert result.status_code == 401
+    assert reports == []
+
+
+def test_claimed_upload_isnt_reported_twice(client, reports, routes, monkeypatch):
+    uploads = routes.report_uploads
+    claim = uploads.claim
+
+    def concurrent_claim(key):
+        # Another request completing the same upload claims it first
+        claim(key).close()
+        return claim(key)
+
+    monkeypatch.setattr(uploads, "claim", concurrent_claim)
+    assert _put_chunk(client, b"diff", "bytes 0-3/8").status_code == 308
+
+    result = _put_chunk(client, b"body", "bytes 4-7/8")
+    assert result.status_code == 404
+    assert reports == []
+
+
+def test_parse_binary_message(events):
+    message = events.parse_binary_message(
+        _frame(
+            {"type": "model-centric/report", "data": {"worker_id": "worker"}},
+            b"diff",
+        )
+    )
+
+    assert message["data"]["worker_id"] == "worker"
+    assert bytes(message["data"]["diff"]) == b"diff"
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        bytearray(b"\x00\x00"),
+        # Header longer than the frame
+        bytearray(struct.pack(">I", 64) + b"{}"),
+        bytearray(struct.pack(">I", 2) + b"{x"),
+        _frame({"type": "model-centric/cycle-request"}, b"diff"),
+    ],
+)
+def test_malformed_binary_message(events, frame):
+    with pytest.raises(ValueError):
+        events.parse_binary_message(frame)
+
+    # Answered with an error instead of closing the connection
+    assert "error" in json.loads(events.route_requests(frame, None))
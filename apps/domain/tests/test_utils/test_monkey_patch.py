@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from src.main.utils.monkey_patch import mask_payload_fast
+
+
+class Header:
+    def __init__(self, mask: bytes):
+        self.mask = mask
+
+
+def mask_payload_reference(mask: bytes, payload: bytes) -> bytes:
+    return bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+
+@pytest.mark.parametrize("size", [0, 1, 3, 4, 7, 8, 9, 15, 16, 1021, 4096])
+def test_mask_payload(size):
+    header = Header(os.urandom(4))
+    payload = os.urandom(size)
+
+    masked = mask_payload_fast(header, payload)
+    assert bytes(masked) == mask_payload_reference(header.mask, payload)
+    # Masking is its own inverse
+    assert bytes(mask_payload_fast(header, masked)) == payload
@@ -36,7 +36,8 @@ from main.routes import (
     root_blueprint,
 )
 import config
-from main.core.node import create_network_app
+from main.core.instrumentation import init_metrics
+from main.core.node import create_network_app, get_node
 
 DEFAULT_SECRET_KEY = "justasecretkeythatishouldputhere"
 
@@ -51,7 +52,7 @@ Header.unmask_payload = mask_payload_fast
 
 # Setup log
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
     format="[%(asctime)s]: {} %(levelname)s %(message)s".format(os.getpid()),
     datefmt="%Y-%m-%d %H:%M:%S",
     handlers=[logging.StreamHandler()],
@@ -83,6 +84,9 @@ def create_app(
     # Create Domain APP
     app = create_network_app(app=app, args=args, testing=testing)
 
+    # Request, SQL and service timings, served on /metrics
+    init_metrics(app, node=get_node())
+
     app.debug = debug
     app.config["SECRET_KEY"] = secret_key
 
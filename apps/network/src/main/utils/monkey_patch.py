@@ -1,24 +1,25 @@
 import numpy
-import math
 
 
-def mask_payload_fast(self, payload: bytes) -> str:
+def mask_payload_fast(self, payload: bytes) -> bytearray:
     """Monkey patch geventwebsocket.websocket.Header.mask_payload(). Version
     currently in geventwebsocket does a very slow python for loop to mask the
     payload.
 
-    We take advantage of numpy to do this faster.
+    We take advantage of numpy to do this faster: the payload is copied once
+    and XORed in place, 8 bytes at a time, with the 4 bytes mask repeated
+    twice. The unaligned tail (less than 8 bytes) is masked separately, so
+    every payload size takes the fast path.
     """
-    key = (self.mask * int(math.ceil(float(len(payload)) / float(len(self.mask)))))[
-        : len(payload)
-    ]
+    masked = bytearray(payload)
+    key = bytes(self.mask) * 2
 
-    # Select the type size in bytes
-    if len(payload) % 8 == 0:
-        dt = numpy.dtype("<Q")
-    else:
-        dt = numpy.dtype("B")
+    aligned = len(masked) // 8 * 8
+    if aligned:
+        words = numpy.frombuffer(masked, dtype=numpy.uint64, count=aligned // 8)
+        numpy.bitwise_xor(words, numpy.frombuffer(key, dtype=numpy.uint64), out=words)
 
-    return numpy.bitwise_xor(
-        numpy.fromstring(key, dtype=dt), numpy.fromstring(payload, dtype=dt)
-    ).tostring()
+    for i in range(aligned, len(masked)):
+        masked[i] ^= key[i - aligned]
+
+    return masked
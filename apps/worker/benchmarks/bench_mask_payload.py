@@ -0,0 +1,85 @@
+"""Benchmark the WebSocket frame masking patched into geventwebsocket.
+
+Compares the previous implementation (repeated key string and a byte-wise
+XOR for payloads whose size isn't a multiple of 8, with numpy.frombuffer in
+place of the deprecated numpy.fromstring) against mask_payload_fast, for
+aligned and unaligned frames.
+
+Usage:
+    poetry run python benchmarks/bench_mask_payload.py --sizes 1024 1048576
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import numpy
+
+from main.utils.monkey_patch import mask_payload_fast
+
+
+class Header:
+    def __init__(self, mask: bytes):
+        self.mask = mask
+
+
+def legacy_mask_payload(self, payload: bytes) -> bytes:
+    key = (self.mask * int(math.ceil(float(len(payload)) / float(len(self.mask)))))[
+        : len(payload)
+    ]
+    if len(payload) % 8 == 0:
+        dt = numpy.dtype("<Q")
+    else:
+        dt = numpy.dtype("B")
+    return numpy.bitwise_xor(
+        numpy.frombuffer(key, dtype=dt), numpy.frombuffer(payload, dtype=dt)
+    ).tobytes()
+
+
+def timeit(func, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return sorted(elapsed)[len(elapsed) // 2] * 1000
+
+
+def main():
+    kb = 1024
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[kb, 64 * kb, kb * kb, 16 * kb * kb, 64 * kb * kb],
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    header = Header(os.urandom(4))
+    print(f"{'bytes':>10} {'legacy (ms)':>12} {'fast (ms)':>10} {'speedup':>8}")
+
+    for size in args.sizes:
+        # Aligned and unaligned (tail of 3 bytes) frames
+        for frame_size in (size, size + 3):
+            payload = os.urandom(frame_size)
+            assert mask_payload_fast(header, payload) == legacy_mask_payload(
+                header, payload
+            )
+
+            legacy_ms = timeit(
+                lambda: legacy_mask_payload(header, payload), args.repeat
+            )
+            fast_ms = timeit(lambda: mask_payload_fast(header, payload), args.repeat)
+            print(
+                f"{frame_size:>10} {legacy_ms:>12.3f} {fast_ms:>10.3f} "
+                f"{legacy_ms / fast_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
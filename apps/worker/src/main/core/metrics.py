@@ -0,0 +1,217 @@
+"""In-process metrics collected by the node, exposed in the
+Prometheus text format (see `Metrics.render`)."""
+# Standard python imports
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets of durations (seconds)
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+
+class Histogram:
+    """Running count/sum/max of an observed value, and the number of
+    observations falling in each bucket."""
+
+    __slots__ = ("count", "sum", "max", "buckets", "bucket_counts")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = buckets
+        # The last count is for the values above the largest bucket
+        self.bucket_counts = [0] * (len(buckets) + 1)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "max": self.max}
+
+
+class Metrics:
+    """Thread safe registry of histograms and gauges, identified by a metric
+    name and its labels.
+
+    Observing a value costs a dictionary lookup and a bisection under a
+    lock, the exposition is only built when the metrics are scraped.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._gauges = {}
+        self._buckets = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def declare(self, name: str, description: str = None, buckets=None):
+        """Describe a metric, declaring metrics is optional.
+
+        Args:
+            name: Metric name.
+            description: Help text of the metric.
+            buckets: Sorted upper bounds of the histogram buckets (default: DEFAULT_BUCKETS).
+        """
+        with self._lock:
+            if description is not None:
+                self._help[name] = description
+            if buckets is not None:
+                self._buckets[name] = tuple(buckets)
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value.
+
+        Args:
+            name: Metric name.
+            value: Observed value.
+            labels: Metric labels (e.g. encoding="binary").
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(
+                    self._buckets.get(name, DEFAULT_BUCKETS)
+                )
+            histogram.observe(value)
+
+    def set(self, name: str, value: float, **labels):
+        """Set the current value of a gauge.
+
+        Args:
+            name: Metric name.
+            value: Current value.
+            labels: Metric labels.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Record the seconds spent inside the `with` block.
+
+        Args:
+            name: Metric name.
+            labels: Metric labels.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Current value of every metric.
+
+        Returns:
+            metrics: Dictionary mapping metric names to a list of
+                {"labels": ..., "count": ..., "sum": ..., "max": ...} for
+                histograms or {"labels": ..., "value": ...} for gauges.
+        """
+        result = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                result.setdefault(name, []).append(
+                    {"labels": dict(labels), **histogram.to_dict()}
+                )
+            for (name, labels), value in self._gauges.items():
+                result.setdefault(name, []).append(
+                    {"labels": dict(labels), "value": value}
+                )
+        return result
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format.
+
+        Returns:
+            text: Exposition text.
+        """
+        histograms = {}
+        gauges = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                histograms.setdefault(name, []).append(
+                    (
+                        labels,
+                        histogram.buckets,
+                        list(histogram.bucket_counts),
+                        histogram.sum,
+                        histogram.count,
+                    )
+                )
+            for (name, labels), value in self._gauges.items():
+                gauges.setdefault(name, []).append((labels, value))
+            help_texts = dict(self._help)
+
+        lines = []
+        for name in sorted(histograms):
+            _header(lines, name, "histogram", help_texts.get(name))
+            for labels, buckets, counts, total, count in histograms[name]:
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}"
+                    )
+                lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for name in sorted(gauges):
+            _header(lines, name, "gauge", help_texts.get(name))
+            for labels, value in gauges[name]:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: list, name: str, kind: str, description: str = None):
+    if description:
+        lines.append(f"# HELP {name} {_escape(description)}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(labels: tuple, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if value.is_integer() else repr(value)
+
+
+metrics = Metrics()